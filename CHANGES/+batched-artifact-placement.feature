@@ -0,0 +1 @@
+Imports place artifact files one batch at a time: the artifacts are fetched in one query, existing files are detected with a stat or a cached directory listing, missing files are copied by a pool of threads, and the throughput is shown in the progress report.
@@ -0,0 +1,3 @@
+The content app cache now resolves the base-key, the content guard flag and the cached entry of a
+request in a single Redis round trip, sets entries and their expiration atomically and records the
+number of Redis round trips per request as the `cache.redis.round_trips` metric.
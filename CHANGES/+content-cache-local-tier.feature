@@ -0,0 +1,2 @@
+Content app cache entries are now stored in a compact, compressed binary format, and can be kept in
+an in-process cache in front of Redis via `CACHE_SETTINGS["LOCAL_MAX_ENTRIES"]`.
@@ -0,0 +1 @@
+Repository versions now store their content ids as the difference to a snapshot stored on an earlier version, instead of a full copy per version.
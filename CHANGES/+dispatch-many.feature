@@ -0,0 +1 @@
+Pulp imports and replication now create their per-repository tasks in bulk, waking up the workers only once.
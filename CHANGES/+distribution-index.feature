@@ -0,0 +1,2 @@
+Added the `CONTENT_DISTRIBUTION_INDEX` setting to let the content app match distributions and their
+content guards from an in-process index, kept fresh through Postgres notifications.
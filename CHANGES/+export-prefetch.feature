@@ -0,0 +1 @@
+Exports from non-filesystem storages download the next artifacts concurrently, into bounded temporary space, while the current one is written to the tarball.
@@ -0,0 +1 @@
+Validating the relative paths of a new repository version now only checks the content added since the previous version, against the paths it may overlap with.
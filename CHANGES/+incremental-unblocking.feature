@@ -0,0 +1 @@
+Workers now only reconsider the waiting tasks sharing resources with the tasks dispatched or finished since their last unblocking pass, instead of all incomplete tasks on every wakeup.
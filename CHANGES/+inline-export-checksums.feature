@@ -0,0 +1 @@
+Exports now checksum the tar file, or its chunks, while writing them, and no longer use the `split` command. Imports validate the checksums of the chunks in parallel.
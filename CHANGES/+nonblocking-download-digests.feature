@@ -0,0 +1 @@
+Downloaders no longer block the event loop while writing and hashing downloaded data.
@@ -0,0 +1 @@
+Building PRNs and API links of master model objects no longer fetches their detail objects from the database.
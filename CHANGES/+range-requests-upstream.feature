@@ -0,0 +1,2 @@
+Added the `REMOTE_CONTENT_RANGE_REQUESTS` setting to forward ranged on-demand requests to the remote,
+and `REMOTE_CONTENT_RANGE_COMPLETION_THRESHOLD` to save often partially requested content in the background.
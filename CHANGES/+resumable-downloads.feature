@@ -0,0 +1 @@
+Interrupted downloads are now resumed with a range request on retry when the remote server advertises byte ranges and an `ETag` or `Last-Modified` validator, instead of transferring the whole file again.
@@ -0,0 +1 @@
+Added the opt-in `DOWNLOADER_SEGMENT_SETTINGS` to download large files from remotes in parallel ranged requests using idle download slots.
@@ -0,0 +1 @@
+Downloaders of remotes with the same TLS, header and timeout settings now share a pooled HTTP session per process, reusing connections across on-demand requests. See `DOWNLOADER_SESSION_SETTINGS`.
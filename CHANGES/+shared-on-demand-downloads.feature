@@ -0,0 +1,2 @@
+Concurrent content app requests for the same on-demand artifact now share a single upstream
+download, which is saved only once.
@@ -0,0 +1 @@
+Added the "stages" task diagnostic reporting per-stage counters of Stages API pipelines: items, batch sizes, queue depth and the time spent waiting on neighbouring stages or processing. The counters are also emitted as OpenTelemetry metrics.
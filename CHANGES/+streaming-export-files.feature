@@ -0,0 +1 @@
+Export-files are written row by row while walking the exported objects by primary key, and are only spooled to disk when large. Imports load rows into datasets without re-encoding them as JSON.
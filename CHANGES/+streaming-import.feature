@@ -0,0 +1 @@
+Imports no longer extract the export into a temporary directory. The members of the export are indexed once, the repository version imports are handed the part of the index they need, and artifacts are copied straight from the tarball into storage.
@@ -0,0 +1 @@
+Added the `TASK_PROCESS_POOL` setting to let workers execute tasks in a warm, recycled process instead of forking a new process for every task.
@@ -0,0 +1 @@
+Added `AdaptiveBatchPolicy` and per-stage `queue_size` to the Stages API. The database bound stages of `DeclarativeVersion` now size their batches by the time a batch takes to process, see `DeclarativeVersion.database_stage`.
@@ -0,0 +1 @@
+`dispatch` now returns unsaved tasks when called within `batched_dispatch`, as done by `Replicator.sync` during replication. These tasks are created, and refreshed from the database, when the context is left.
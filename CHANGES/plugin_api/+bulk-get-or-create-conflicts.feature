@@ -0,0 +1 @@
+`BulkCreateManager.bulk_get_or_create` now skips rows conflicting with existing ones in the same insert and fetches those in a single query, instead of saving every object of the batch individually.
@@ -0,0 +1 @@
+Added `Content.BULK_SAVE` to let the `ContentSaver` stage insert new units of a content type in bulk.
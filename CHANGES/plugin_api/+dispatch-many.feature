@@ -0,0 +1 @@
+Added `dispatch_many` to the plugin API to create many deferred tasks in a single statement, and the `batched_dispatch` context manager to do the same for tasks dispatched within it.
@@ -0,0 +1 @@
+Added `cast()` and `acast()` to the querysets of master models, see `MasterModelQuerySet`. They return the detail objects of a whole queryset with one query per detail type.
@@ -0,0 +1 @@
+`DownloaderFactory._session_config_digest` is the hook deciding which remotes share a pooled HTTP session. Factories that add remote-specific state to their sessions should extend it; until they do, their sessions are not shared between remotes.
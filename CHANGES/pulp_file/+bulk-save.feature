@@ -0,0 +1 @@
+File content is now saved in bulk during sync.
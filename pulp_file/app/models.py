@@ -32,6 +32,7 @@ class FileContent(Content):
     """
 
     PROTECTED_FROM_RECLAIM = False
+    BULK_SAVE = True
 
     TYPE = "file"
     repo_key_fields = ("relative_path",)
@@ -1,9 +1,16 @@
+import decimal
 import os
 import io
 import json
+import shutil
 import tarfile
 import tempfile
 import logging
+from collections import deque
+from contextlib import closing
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
 
 from django.conf import settings
 from django.db.models.query import QuerySet
@@ -17,11 +24,51 @@ from pulpcore.app.modelresource import (
     ContentArtifactResource,
     RepositoryResource,
 )
-from pulpcore.constants import TASK_STATES, EXPORT_BATCH_SIZE
+from pulpcore.constants import (
+    TASK_STATES,
+    EXPORT_BATCH_SIZE,
+    EXPORT_PREFETCH_ARTIFACTS,
+    EXPORT_PREFETCH_BYTES,
+    EXPORT_SPOOL_SIZE,
+)
 
 log = logging.getLogger(__name__)
 
 
+def _json_default(obj):
+    """Serialize the values json can't, the same way as `tablib.Dataset.json`."""
+    if isinstance(obj, (decimal.Decimal, UUID)):
+        return str(obj)
+    elif hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_json_encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False)
+
+
+def _export_datasets(resource):
+    """
+    Yield the export of a resource as a series of Datasets.
+
+    If the resource is the type of QuerySet, then the data is exported in batches to save memory.
+    The batches are walked by primary-key (keyset pagination), so each one is a single indexed
+    query no matter how far into the QuerySet it is. Otherwise, all data is exported in oneshot.
+    """
+    if not isinstance(resource.queryset, QuerySet):
+        yield resource.export(queryset=resource.queryset)
+        return
+
+    model = resource.queryset.model
+    resource_pks = resource.queryset.order_by("pk").values_list("pk", flat=True)
+    batch = list(resource_pks[:EXPORT_BATCH_SIZE])
+    while batch:
+        yield resource.export(queryset=model.objects.filter(pk__in=batch))
+        if len(batch) < EXPORT_BATCH_SIZE:
+            break
+        batch = list(resource_pks.filter(pk__gt=batch[-1])[:EXPORT_BATCH_SIZE])
+
+
 def _write_export(the_tarfile, resource, dest_dir=None):
     """
     Write the JSON export for the specified resource to the specified tarfile.
@@ -42,42 +89,24 @@ def _write_export(the_tarfile, resource, dest_dir=None):
     else:
         dest_filename = filename
 
-    # If the resource is the type of QuerySet, then export the data in batch to save memory.
-    # Otherwise, export all data in oneshot. This is because the underlying libraries
-    # (json; django-import-export) do not support to stream the output to file, we export
-    # the data in batches to memory and concatenate the json lists via string manipulation.
-    with tempfile.NamedTemporaryFile(dir=".", mode="w", encoding="utf8") as temp_file:
-        if isinstance(resource.queryset, QuerySet):
-            temp_file.write("[")
-
-            def process_batch(batch):
-                model = resource.queryset.model
-                queryset = model.objects.filter(pk__in=batch)
-                dataset = resource.export(queryset)
-                # Strip "[" and "]" as we are writing the dataset in batch
-                temp_file.write(dataset.json.lstrip("[").rstrip("]"))
-
-            first_loop = True
-            resource_pks = resource.queryset.values_list("pk", flat=True)
-            for offset in range(0, len(resource_pks), EXPORT_BATCH_SIZE):
-                batch = resource_pks[offset : offset + EXPORT_BATCH_SIZE]
-
-                if not first_loop:
-                    temp_file.write(", ")
-                else:
-                    first_loop = False
-                process_batch(batch)
-
-            temp_file.write("]")
-        else:
-            dataset = resource.export(resource.queryset)
-            temp_file.write(dataset.json)
+    # Rows are serialized one by one as they are exported. The size of a tarfile member has to be
+    # known before its data is written, so the JSON is spooled in memory, or in a temporary file
+    # if it grows large, before being added to the tarfile.
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE, dir=".") as spool:
+        spool.write(b"[")
+        first_row = True
+        for dataset in _export_datasets(resource):
+            for row in dataset.dict:
+                if not first_row:
+                    spool.write(b", ")
+                first_row = False
+                spool.write(_json_encoder.encode(row).encode("utf8"))
+        spool.write(b"]")
 
-        temp_file.flush()
         info = tarfile.TarInfo(name=dest_filename)
-        info.size = os.path.getsize(temp_file.name)
-        with open(temp_file.name, "rb") as fd:
-            the_tarfile.addfile(info, fd)
+        info.size = spool.tell()
+        spool.seek(0)
+        the_tarfile.addfile(info, spool)
 
 
 def export_versions(export, version_info):
@@ -99,6 +128,78 @@ def export_versions(export, version_info):
     export.tarfile.addfile(info, io.BytesIO(version_json))
 
 
+def _iter_artifacts(artifact_pks):
+    """Iterate over the Artifacts with the given pks, querying them in batches."""
+    for offset in range(0, len(artifact_pks), EXPORT_BATCH_SIZE):
+        batch = artifact_pks[offset : offset + EXPORT_BATCH_SIZE]
+        batch_qs = Artifact.objects.filter(pk__in=batch).only("file", "size", "pulp_domain_id")
+        yield from batch_qs.iterator()
+
+
+def _download_artifact(artifact, temp_dir):
+    """Stream the file of an Artifact from storage into a temporary file and return its path."""
+    with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp_file:
+        try:
+            with artifact.file.open("rb") as artifact_file:
+                shutil.copyfileobj(artifact_file, temp_file)
+        except BaseException:
+            os.unlink(temp_file.name)
+            raise
+    return temp_file.name
+
+
+def _prefetch_artifacts(artifacts, temp_dir):
+    """
+    Yield Artifacts along with the path of a local copy of their file, downloading ahead.
+
+    While an Artifact is being consumed, the files of up to `EXPORT_PREFETCH_ARTIFACTS` next
+    Artifacts, totalling about `EXPORT_PREFETCH_BYTES`, are downloaded concurrently. The local copy
+    is removed as soon as the consumer moves on to the next Artifact.
+
+    Args:
+        artifacts (iterable): Artifacts to be downloaded, in order.
+        temp_dir (str): Directory to download the files into.
+    """
+    artifacts = iter(artifacts)
+    pending = deque()
+    pending_size = 0
+    with ThreadPoolExecutor(max_workers=EXPORT_PREFETCH_ARTIFACTS) as executor:
+        try:
+            while True:
+                while len(pending) < EXPORT_PREFETCH_ARTIFACTS and (
+                    not pending or pending_size < EXPORT_PREFETCH_BYTES
+                ):
+                    artifact = next(artifacts, None)
+                    if artifact is None:
+                        break
+                    # The storage of the Artifact depends on the current domain
+                    future = executor.submit(
+                        copy_context().run, _download_artifact, artifact, temp_dir
+                    )
+                    pending.append((artifact, future))
+                    pending_size += artifact.size
+                if not pending:
+                    return
+                artifact, future = pending.popleft()
+                pending_size -= artifact.size
+                path = future.result()
+                try:
+                    yield artifact, path
+                finally:
+                    os.unlink(path)
+        finally:
+            for artifact, future in pending:
+                future.cancel()
+
+
+def _artifact_tarfile_loc(artifact):
+    """Return the location of the file of an Artifact in the export tarball."""
+    # If we're domain-enabled, replace our domain-pk with "DOMAIN" in the tarfile
+    if settings.DOMAIN_ENABLED:
+        return artifact.file.name.replace(str(artifact.pulp_domain_id), "DOMAIN")
+    return artifact.file.name
+
+
 def export_artifacts(export, artifact_pks):
     """
     Export a set of Artifacts, ArtifactResources, and RepositoryResources
@@ -115,45 +216,15 @@ def export_artifacts(export, artifact_pks):
         pb.BATCH_INTERVAL = 5000
 
         if settings.STORAGES["default"]["BACKEND"] != "pulpcore.app.models.storage.FileSystem":
-            with tempfile.TemporaryDirectory(dir=".") as temp_dir:
-                for offset in range(0, len(artifact_pks), EXPORT_BATCH_SIZE):
-                    batch = artifact_pks[offset : offset + EXPORT_BATCH_SIZE]
-                    batch_qs = Artifact.objects.filter(pk__in=batch).only("file")
-
-                    for artifact in pb.iter(batch_qs.iterator()):
-                        with tempfile.NamedTemporaryFile(dir=temp_dir) as temp_file:
-                            # TODO: this looks like a memory usage threat
-                            # TODO: it's probably very slow, going one-by-one over the net
-                            # TODO: probably we could skip the temp file entirely and add
-                            #       artifact.file.read() directly to the tarfile with
-                            #       tarfile.addfile()
-                            temp_file.write(artifact.file.read())
-                            temp_file.flush()
-                            artifact.file.close()
-                            # If we're domain-enabled, replace our domain-pk with "DOMAIN" in
-                            # the tarfile
-                            if settings.DOMAIN_ENABLED:
-                                tarfile_loc = artifact.file.name.replace(
-                                    str(artifact.pulp_domain_id), "DOMAIN"
-                                )
-                            else:
-                                tarfile_loc = artifact.file.name
-                            export.tarfile.add(temp_file.name, tarfile_loc)
+            # The next files are downloaded while the current one is streamed into the tarfile.
+            with tempfile.TemporaryDirectory(dir=".") as temp_dir, closing(
+                _prefetch_artifacts(_iter_artifacts(artifact_pks), temp_dir)
+            ) as artifacts:
+                for artifact, path in pb.iter(artifacts):
+                    export.tarfile.add(path, _artifact_tarfile_loc(artifact))
         else:
-            for offset in range(0, len(artifact_pks), EXPORT_BATCH_SIZE):
-                batch = artifact_pks[offset : offset + EXPORT_BATCH_SIZE]
-                batch_qs = Artifact.objects.filter(pk__in=batch).only("file")
-
-                for artifact in pb.iter(batch_qs.iterator()):
-                    # If we're domain-enabled, replace our domain-pk with "DOMAIN" in
-                    # the tarfile
-                    if settings.DOMAIN_ENABLED:
-                        tarfile_loc = artifact.file.name.replace(
-                            str(artifact.pulp_domain_id), "DOMAIN"
-                        )
-                    else:
-                        tarfile_loc = artifact.file.name
-                    export.tarfile.add(artifact.file.path, tarfile_loc)
+            for artifact in pb.iter(_iter_artifacts(artifact_pks)):
+                export.tarfile.add(artifact.file.path, _artifact_tarfile_loc(artifact))
 
     resource = ArtifactResource()
     resource.queryset = Artifact.objects.filter(pk__in=artifact_pks)
@@ -8,7 +8,10 @@ from django.core.management import BaseCommand, CommandError
 from django.conf import settings
 
 from pulpcore.app.models import Repository
-from pulpcore.app.util import get_url, extract_pk
+from pulpcore.app.util import batch_qs, get_url, extract_pk
+
+# How many repositories are cast to their detail type at once.
+CAST_BATCH_SIZE = 1000
 
 
 def gather_repository_sizes(repositories, include_versions=False, include_on_demand=False):
@@ -35,28 +38,31 @@ def gather_repository_sizes(repositories, include_versions=False, include_on_dem
     into account missing artifacts or incorrect/missing on-demand artifact sizes.
     """
     full_report = []
-    for repo in repositories.order_by("name").iterator():
-        try:
-            repo = repo.cast()
-            report = {"name": repo.name, "href": get_url(repo), "disk-size": repo.disk_size}
-            if include_on_demand:
-                report["on-demand-size"] = repo.on_demand_size
-            if include_versions:
-                versions = []
-                try:
-                    for version in repo.versions.iterator():
-                        v_report = {"version": version.number, "disk-size": version.disk_size}
-                        if include_on_demand:
-                            v_report["on-demand-size"] = version.on_demand_size
-                        versions.append(v_report)
-                except Exception:
-                    pass
-                else:
-                    report["versions"] = versions
-        except Exception:
-            continue
-        else:
-            full_report.append(report)
+    # Skip the repositories of plugins that are not installed, which cannot be cast.
+    repositories = repositories.filter(pulp_type__in=Repository._pulp_model_map.keys())
+    # Cast one batch at a time, to keep the memory usage bounded.
+    for batch in batch_qs(repositories.order_by("name", "pk"), batch_size=CAST_BATCH_SIZE):
+        for repo in batch.cast():
+            try:
+                report = {"name": repo.name, "href": get_url(repo), "disk-size": repo.disk_size}
+                if include_on_demand:
+                    report["on-demand-size"] = repo.on_demand_size
+                if include_versions:
+                    versions = []
+                    try:
+                        for version in repo.versions.iterator():
+                            v_report = {"version": version.number, "disk-size": version.disk_size}
+                            if include_on_demand:
+                                v_report["on-demand-size"] = version.on_demand_size
+                            versions.append(v_report)
+                    except Exception:
+                        pass
+                    else:
+                        report["versions"] = versions
+            except Exception:
+                continue
+            else:
+                full_report.append(report)
 
     return full_report
 
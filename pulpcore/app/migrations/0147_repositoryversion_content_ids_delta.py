@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 04:27
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0146_task_finished_at_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="repositoryversion",
+            name="content_ids_added",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.UUIDField(), default=None, null=True, size=None
+            ),
+        ),
+        migrations.AddField(
+            model_name="repositoryversion",
+            name="content_ids_base",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="core.repositoryversion",
+            ),
+        ),
+        migrations.AddField(
+            model_name="repositoryversion",
+            name="content_ids_removed",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.UUIDField(), default=None, null=True, size=None
+            ),
+        ),
+    ]
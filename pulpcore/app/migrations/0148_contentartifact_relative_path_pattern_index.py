@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0147_repositoryversion_content_ids_delta"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="contentartifact",
+            index=models.Index(
+                fields=["relative_path"],
+                name="core_ca_relpath_pattern_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ),
+    ]
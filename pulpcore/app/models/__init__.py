@@ -4,6 +4,7 @@
 from .base import (
     BaseModel,
     MasterModel,
+    MasterModelQuerySet,
     pulp_uuid,
 )
 
@@ -108,6 +109,7 @@ __all__ = [
     "AppStatus",
     "BaseModel",
     "MasterModel",
+    "MasterModelQuerySet",
     "pulp_uuid",
     "AccessPolicy",
     "AutoAddObjPermsMixin",
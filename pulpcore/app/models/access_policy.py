@@ -76,6 +76,42 @@ class AutoAddObjPermsMixin:
                 if hasattr(permission_class, "handle_creation_hooks"):
                     permission_class.handle_creation_hooks(self)
 
+    @classmethod
+    def bulk_add_perms(cls, objs):
+        """
+        Handle the creation hooks for several newly created objects of this model at once.
+
+        This is meant for objects created with `bulk_create`, which skips the ``after_create``
+        hooks. Roles for the object creator are added with one query per role, other hooks are
+        called for every object.
+
+        Args:
+            objs (list): The newly created objects.
+        """
+        from pulpcore.app.role_util import assign_role_to_objects
+
+        if not objs:
+            return
+        try:
+            viewset = get_viewset_for_model(cls)
+        except LookupError:
+            return
+        for permission_class in viewset.get_permissions(viewset):
+            if not hasattr(permission_class, "handle_creation_hooks"):
+                continue
+            creation_hooks = permission_class.get_access_policy(viewset).get("creation_hooks")
+            for creation_hook in creation_hooks or []:
+                hook_name = creation_hook["function"]
+                kwargs = creation_hook.get("parameters") or {}
+                if hook_name == "add_roles_for_object_creator":
+                    current_user = get_current_authenticated_user()
+                    if current_user and isinstance(current_user, get_user_model()):
+                        for role in _ensure_iterable(kwargs["roles"]):
+                            assign_role_to_objects(role, current_user, objs)
+                else:
+                    for obj in objs:
+                        obj.REGISTERED_CREATION_HOOKS[hook_name](**kwargs)
+
     def add_roles_for_users(self, roles, users):
         """
         Adds object-level roles for one or more users for this newly created object.
@@ -1,5 +1,7 @@
 from gettext import gettext as _
 
+from collections import defaultdict
+
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
 from django.db.models import options
@@ -97,6 +99,59 @@ class MasterModelMeta(ModelBase):
         return new_class
 
 
+def _detail_pks(objs):
+    """Group the pks of the objects that are not instances of their detail model yet."""
+    detail_pks = defaultdict(list)
+    for obj in objs:
+        if obj.pulp_type != obj.get_pulp_type():
+            detail_pks[obj.detail_model].append(obj.pk)
+    return detail_pks
+
+
+def _replace_with_details(objs, details):
+    result = []
+    for obj in objs:
+        if obj.pulp_type == obj.get_pulp_type():
+            result.append(obj)
+        else:
+            detail = details[obj.pk]
+            # Keep all the prefetched data around.
+            detail._state.fields_cache.update(obj._state.fields_cache)
+            result.append(detail)
+    return result
+
+
+class MasterModelQuerySet(models.QuerySet):
+    """
+    A queryset that provides ``cast()`` and ``acast()`` for master models.
+    """
+
+    def cast(self):
+        """
+        Return the "Detail" model instances of the objects in this queryset.
+
+        This issues one query per detail type instead of one query per object. The order of the
+        queryset is preserved.
+        """
+        objs = list(self)
+        details = {}
+        for detail_model, pks in _detail_pks(objs).items():
+            details.update(detail_model.objects.in_bulk(pks))
+        return _replace_with_details(objs, details)
+
+    async def acast(self):
+        """
+        Return the "Detail" model instances of the objects in this queryset (async).
+
+        See `cast()`.
+        """
+        objs = [obj async for obj in self]
+        details = {}
+        for detail_model, pks in _detail_pks(objs).items():
+            details.update(await detail_model.objects.ain_bulk(pks))
+        return _replace_with_details(objs, details)
+
+
 class MasterModel(BaseModel, metaclass=MasterModelMeta):
     """
     Base model for the "Master" model in a "Master-Detail" relationship.
@@ -136,6 +191,8 @@ class MasterModel(BaseModel, metaclass=MasterModelMeta):
     # the TYPE attribute on the Model being saved (seen above).
     pulp_type = models.TextField(null=False, default=None, db_index=True)
 
+    objects = MasterModelQuerySet.as_manager()
+
     class Meta:
         abstract = True
 
@@ -166,7 +223,8 @@ class MasterModel(BaseModel, metaclass=MasterModelMeta):
     def cast(self):
         """Return the "Detail" model instance of this master-detail object.
 
-        If this is already an instance of its detail type, it will return itself.
+        If this is already an instance of its detail type, it will return itself. Use
+        `MasterModelQuerySet.cast()` to cast many objects at once.
         """
         if self.pulp_type == self.get_pulp_type():
             return self
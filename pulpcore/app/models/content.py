@@ -19,7 +19,8 @@ from itertools import chain
 from django.conf import settings
 from django.contrib.postgres.fields import HStoreField
 from django.core import validators
-from django.db import IntegrityError, models, transaction
+from django.db import models, transaction
+from django.db.models.constants import OnConflict
 from django.forms.models import model_to_dict
 from django.utils.timezone import now
 from django_guid import get_guid
@@ -28,7 +29,7 @@ from django_lifecycle import BEFORE_UPDATE, BEFORE_SAVE, hook
 from pulpcore.constants import ALL_KNOWN_CONTENT_CHECKSUMS
 from pulpcore.app import pulp_hashlib
 from pulpcore.app.util import gpg_verify, get_domain_pk
-from pulpcore.app.models import MasterModel, BaseModel, fields, storage
+from pulpcore.app.models import MasterModel, MasterModelQuerySet, BaseModel, fields, storage
 from pulpcore.exceptions import (
     DigestValidationError,
     SizeValidationError,
@@ -72,31 +73,76 @@ class BulkCreateManager(models.Manager):
         and do not set the primary key attribute if it is an autoincrement field (except if
         features.can_return_ids_from_bulk_insert=True). Multi-table models are not supported.
 
-        If an IntegrityError is raised while performing a bulk insert, this method falls back to
-        inserting each instance individually. The already-existing instances are retrieved from
-        the database and returned with the other newly created instances.
+        Objects conflicting with rows already in the database are not inserted. Instead, the
+        existing rows are retrieved with one query per batch and returned in their place.
 
         Args:
             objs (iterable of models.Model): an iterable of Django Model instances
             batch_size (int): how many are created in a single query
 
         Returns:
-            List of instances that were inserted into the database.
+            List of the inserted or already existing instances, in the order of `objs`.
         """
 
         objs = list(objs)
-        try:
-            with transaction.atomic():
-                return super().bulk_create(objs, batch_size=batch_size)
-        except IntegrityError:
-            for i in range(len(objs)):
-                try:
-                    with transaction.atomic():
-                        objs[i].save()
-                except IntegrityError:
-                    objs[i] = objs[i].__class__.objects.get(objs[i].q())
+        if not objs:
+            return objs
+        batch_size = batch_size or len(objs)
+        opts = self.model._meta
+        with transaction.atomic():
+            for obj in objs:
+                obj._prepare_related_fields_for_save(operation_name="bulk_get_or_create")
+            for i in range(0, len(objs), batch_size):
+                batch = objs[i : i + batch_size]
+                # A conflicting row returns nothing, or None if it was inserted on its own.
+                rows = self._insert(
+                    batch,
+                    fields=opts.concrete_fields,
+                    returning_fields=[opts.pk],
+                    on_conflict=OnConflict.IGNORE,
+                )
+                inserted = {row[0] for row in rows if row}
+                existing = []
+                for j, obj in enumerate(batch, start=i):
+                    if obj.pk in inserted:
+                        obj._state.adding = False
+                        obj._state.db = self.db
+                    else:
+                        existing.append(j)
+                if existing:
+                    for j, obj in zip(existing, self._get_existing([objs[j] for j in existing])):
+                        objs[j] = obj
         return objs
 
+    def _get_existing(self, objs):
+        """
+        Retrieve the existing rows the unsaved `objs` conflicted with, matched by their `q()`.
+        """
+        lookups = [dict(obj.q().children) for obj in objs]
+        key_fields = {
+            tuple(sorted(lookup)): [
+                self.model._meta.get_field(name).attname for name in sorted(lookup)
+            ]
+            for lookup in lookups
+            if lookup
+        }
+        found = {}
+        if key_fields:
+            query = models.Q()
+            for lookup in lookups:
+                if lookup:
+                    query |= models.Q(**lookup)
+            for row in self.filter(query):
+                for names, attnames in key_fields.items():
+                    found[names, tuple(getattr(row, attname) for attname in attnames)] = row
+        result = []
+        for obj, lookup in zip(objs, lookups):
+            names = tuple(sorted(lookup))
+            values = tuple(getattr(lookup[name], "pk", lookup[name]) for name in names)
+            # A plain get() raises if the conflicting row is not found.
+            result.append(found.get((names, values)) or self.get(obj.q()))
+        return result
+
 
 class BulkTouchQuerySet(models.QuerySet):
     """
@@ -294,7 +340,7 @@ class Artifact(HandleTempFilesMixin, BaseModel):
         for digest_name in self.DIGEST_FIELDS:
             digest_value = getattr(self, digest_name)
             if digest_value:
-                return models.Q(**{digest_name: digest_value}, pulp_domain=self.pulp_domain)
+                return models.Q(**{digest_name: digest_value}, pulp_domain_id=self.pulp_domain_id)
         return models.Q()
 
     def is_equal(self, other):
@@ -498,7 +544,7 @@ class PulpTemporaryFile(HandleTempFilesMixin, BaseModel):
         return PulpTemporaryFile(file=file)
 
 
-class ContentQuerySet(BulkTouchQuerySet):
+class ContentQuerySet(MasterModelQuerySet, BulkTouchQuerySet):
     def orphaned(self, orphan_protection_time, content_pks=None):
         """Returns set of orphaned content that is ready to be cleaned up."""
         expiration = now() - datetime.timedelta(minutes=orphan_protection_time)
@@ -516,6 +562,65 @@ class ContentQuerySet(BulkTouchQuerySet):
             timestamp_of_interest__lt=expiration,
         )
 
+    def bulk_insert_or_get(self, objs, batch_size=500):
+        """
+        Insert unsaved units of this content type in bulk and get the conflicting existing ones.
+
+        The master and detail rows are inserted with one query per batch each, ignoring units
+        whose natural key already exists. Those are retrieved from the database instead. Unlike
+        `save()`, this does not run overridden `save()` methods, lifecycle hooks or signals.
+
+        Args:
+            objs (iterable of Content): Unsaved instances of a type directly subclassing Content.
+            batch_size (int): how many are inserted in a single query
+
+        Returns:
+            List of the inserted or already existing instances, in the order of `objs`.
+        """
+        objs = list(objs)
+        parents = self.model._meta.parents
+        if list(parents) != [Content] or not self.model.natural_key_fields():
+            raise TypeError(
+                _("{model} does not support bulk inserts.").format(model=self.model.__name__)
+            )
+        ptr_attname = parents[Content].attname
+        master_fields = Content._meta.local_concrete_fields
+        detail_fields = self.model._meta.local_concrete_fields
+        with transaction.atomic():
+            for obj in objs:
+                setattr(obj, ptr_attname, obj.pulp_id)
+            for i in range(0, len(objs), batch_size):
+                batch = objs[i : i + batch_size]
+                Content._base_manager._insert(batch, fields=master_fields)
+                self.model._base_manager._insert(
+                    batch, fields=detail_fields, on_conflict=OnConflict.IGNORE
+                )
+            inserted = set()
+            for i in range(0, len(objs), batch_size):
+                pks = [obj.pk for obj in objs[i : i + batch_size]]
+                inserted.update(
+                    self.model._base_manager.filter(pk__in=pks).values_list("pk", flat=True)
+                )
+            conflicting = []
+            orphaned_pks = []
+            for i, obj in enumerate(objs):
+                if obj.pk in inserted:
+                    obj._state.adding = False
+                    obj._state.db = self.db
+                else:
+                    conflicting.append(i)
+                    orphaned_pks.append(obj.pulp_id)
+            # The existing units are fetched with one query per batch.
+            for i in range(0, len(conflicting), batch_size):
+                indexes = conflicting[i : i + batch_size]
+                existing = self.model.objects._get_existing([objs[j] for j in indexes])
+                for j, obj in zip(indexes, existing):
+                    objs[j] = obj
+            if orphaned_pks:
+                # The master rows of the units whose detail rows were not inserted.
+                Content._base_manager.filter(pk__in=orphaned_pks).delete()
+        return objs
+
 
 ContentManager = BulkCreateManager.from_queryset(ContentQuerySet)
 
@@ -536,6 +641,8 @@ class Content(MasterModel, QueryMixin):
     """
 
     PROTECTED_FROM_RECLAIM = True
+    # Content types without side effects in save() may be saved in bulk by the ContentSaver stage.
+    BULK_SAVE = False
     _repository_types = defaultdict(set)
 
     TYPE = "content"
@@ -657,7 +764,15 @@ class ContentArtifact(BaseModel, QueryMixin):
 
     class Meta:
         unique_together = ("content", "relative_path")
-        indexes = [models.Index(fields=["relative_path"])]
+        indexes = [
+            models.Index(fields=["relative_path"]),
+            # Serves the prefix searches on relative_path, see `overlapping_paths`.
+            models.Index(
+                fields=["relative_path"],
+                name="core_ca_relpath_pattern_idx",
+                opclasses=["text_pattern_ops"],
+            ),
+        ]
 
     @staticmethod
     def sort_key(ca):
@@ -20,7 +20,7 @@ from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django_lifecycle import hook, AFTER_UPDATE, BEFORE_DELETE
 
-from .base import MasterModel, BaseModel
+from .base import MasterModel, MasterModelQuerySet, BaseModel
 from .content import Artifact, Content, ContentArtifact
 from .repository import Remote, Repository, RepositoryVersion
 from .task import CreatedResource
@@ -29,13 +29,18 @@ from pulpcore.cache import Cache
 from rest_framework.exceptions import APIException
 from pulpcore.app.models import AutoAddObjPermsMixin
 from pulpcore.responses import ArtifactResponse
-from pulpcore.app.util import get_domain_pk, cache_key, get_url
+from pulpcore.app.util import (
+    get_domain_pk,
+    cache_key,
+    get_url,
+    notify_distribution_change,
+)
 
 
 _logger = logging.getLogger(__name__)
 
 
-class PublicationQuerySet(models.QuerySet):
+class PublicationQuerySet(MasterModelQuerySet):
     """A queryset that provides publication filtering methods."""
 
     def with_content(self, content):
@@ -182,6 +187,8 @@ class Publication(MasterModel):
                 Cache().delete(base_key=cache_key(base_paths))
 
         with transaction.atomic():
+            if settings.CONTENT_DISTRIBUTION_INDEX and self.distribution_set.exists():
+                notify_distribution_change(self.pulp_domain_id)
             CreatedResource.objects.filter(object_id=self.pk).delete()
             return super().delete(**kwargs)
 
@@ -366,6 +373,12 @@ class ContentGuard(MasterModel):
             if base_paths:
                 Cache().delete(base_key=cache_key(base_paths))
 
+    @hook(BEFORE_DELETE)
+    @hook(AFTER_UPDATE)
+    def invalidate_distribution_index(self):
+        """Drops the guard from the content apps' distribution index."""
+        notify_distribution_change(self.pulp_domain_id)
+
     class Meta:
         unique_together = ("name", "pulp_domain")
 
@@ -686,6 +699,12 @@ class Distribution(MasterModel):
             Cache().delete(base_key=cache_key(self.base_path))
             # Can also preload cache here possibly
 
+    @hook(BEFORE_DELETE)
+    @hook(AFTER_UPDATE)
+    def invalidate_distribution_index(self):
+        """Drops the distribution from the content apps' distribution index."""
+        notify_distribution_change(self.pulp_domain_id)
+
 
 class ArtifactDistribution(Distribution):
     """Serve artifacts by their uuid."""
@@ -24,6 +24,7 @@ from pulpcore.app.util import (
     get_view_name_for_model,
     get_domain_pk,
     cache_key,
+    notify_distribution_change,
     reverse,
 )
 from pulpcore.constants import ALL_KNOWN_CONTENT_CHECKSUMS, PROTECTED_REPO_VERSION_MESSAGE
@@ -40,6 +41,37 @@ from .task import CreatedResource, Task
 
 _logger = logging.getLogger(__name__)
 
+# The content ids of a repository version are stored as a difference to a full snapshot stored on
+# an earlier version. A new snapshot is taken once the difference grows beyond this many ids and a
+# `CONTENT_IDS_DELTA_RATIO` fraction of the snapshot.
+CONTENT_IDS_DELTA_MIN_SIZE = 1000
+CONTENT_IDS_DELTA_RATIO = 4
+# PostgreSQL's limit on the number of parameters in a query
+MAX_QUERY_PARAMS = 65535
+
+
+def _unnest(version_pk, field):
+    """A subquery for the ids stored in an array `field` of a repository version."""
+    return (
+        RepositoryVersion.objects.filter(pk=version_pk)
+        .annotate(cids=Func(F(field), function="unnest"))
+        .values_list("cids", flat=True)
+    )
+
+
+def _diff_content_ids(added, removed, base_added, base_removed):
+    """
+    Compare two content sets stored as differences to the same snapshot.
+
+    Returns:
+        tuple: The sets of ids in the first content set but not in the second one, and vice versa.
+    """
+    added, removed = set(added), set(removed)
+    base_added, base_removed = set(base_added), set(base_removed)
+    return (added - base_added) | (base_removed - removed), (base_added - added) | (
+        removed - base_removed
+    )
+
 
 class Repository(MasterModel):
     """
@@ -478,6 +510,12 @@ class Repository(MasterModel):
                     Cache().delete(base_key=cache_key(base_paths))
                 # Could do preloading here for immediate artifacts with artifacts_for_version
 
+    @hook(BEFORE_DELETE)
+    def invalidate_distribution_index(self):
+        """Drops the distributions of this repository from the content apps' index."""
+        if settings.CONTENT_DISTRIBUTION_INDEX and self.distributions.exists():
+            notify_distribution_change(self.pulp_domain_id)
+
 
 class Remote(MasterModel):
     """
@@ -723,6 +761,12 @@ class Remote(MasterModel):
             if base_paths:
                 Cache().delete(base_key=cache_key(base_paths))
 
+    @hook(BEFORE_DELETE)
+    def invalidate_distribution_index(self):
+        """Drops the distributions using this remote from the content apps' index."""
+        if settings.CONTENT_DISTRIBUTION_INDEX and self.distribution_set.exists():
+            notify_distribution_change(self.pulp_domain_id)
+
     class Meta:
         default_related_name = "remotes"
         unique_together = ("name", "pulp_domain")
@@ -839,6 +883,11 @@ class RepositoryVersion(BaseModel):
     base_version = models.ForeignKey("RepositoryVersion", null=True, on_delete=models.SET_NULL)
     info = models.JSONField(default=dict)
     content_ids = ArrayField(models.UUIDField(), default=None, null=True)
+    content_ids_base = models.ForeignKey(
+        "RepositoryVersion", null=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    content_ids_added = ArrayField(models.UUIDField(), default=None, null=True)
+    content_ids_removed = ArrayField(models.UUIDField(), default=None, null=True)
 
     class Meta:
         default_related_name = "versions"
@@ -861,27 +910,132 @@ class RepositoryVersion(BaseModel):
         """
         Returns the content ids for a repository version
         """
+        if self.content_ids_base_id is not None:
+            return Content.objects.filter(self._content_ids_q()).values_list("pk", flat=True)
         if self.content_ids is not None:
             return self.content_ids
         return self._content_relationships().values_list("content_id", flat=True)
 
+    def _content_ids_q(self):
+        """
+        Returns a Q object matching the content of a repository version.
+
+        The content ids are either stored in full in `content_ids`, or as the ids added to and
+        removed from the snapshot stored on `content_ids_base`. Versions created before content ids
+        were stored are matched through their repository content relationships.
+        """
+        if self.content_ids_base_id is not None:
+            q = Q(pk__in=_unnest(self.content_ids_base_id, "content_ids"))
+            if self.content_ids_removed:
+                q &= ~self._ids_q("content_ids_removed")
+            if self.content_ids_added:
+                q |= self._ids_q("content_ids_added")
+            return q
+        if self.content_ids is not None:
+            return self._ids_q("content_ids")
+        return Q(pk__in=self._content_relationships().values("content_id"))
+
+    def _ids_q(self, field):
+        ids = getattr(self, field)
+        if len(ids) < MAX_QUERY_PARAMS:
+            return Q(pk__in=ids)
+        return Q(pk__in=_unnest(self.pk, field))
+
+    def _content_ids_delta(self):
+        """
+        Returns the snapshot the content ids are based on and the ids added and removed, or None.
+        """
+        if self.content_ids_base_id is not None:
+            return self.content_ids_base_id, self.content_ids_added, self.content_ids_removed
+        if self.content_ids is not None:
+            return self.pk, [], []
+        return None
+
     @hook(BEFORE_CREATE)
     def set_content_ids(self):
         """
         Sets the content ids for the new repository version based on the previous version.
+
+        The ids are stored as the difference to the snapshot the previous version is based on,
+        unless that difference grew too large. Then a new snapshot is taken.
         """
-        try:
-            previous = self.previous()
-        except self.DoesNotExist:
-            pass
+        previous = (
+            self.repository.versions.complete()
+            .filter(number__lt=self.number)
+            .order_by("-number")
+            .defer("content_ids")
+            .annotate(content_ids_count=Func(F("content_ids"), function="cardinality"))
+            .first()
+        )
+        if previous is None:
+            self.content_ids = list(
+                self._content_relationships().values_list("content_id", flat=True)
+            )
+        elif previous.content_ids_base_id is not None:
+            if previous._content_ids_delta_exceeded():
+                self.content_ids = list(previous._get_content_ids())
+            else:
+                self.content_ids_base_id = previous.content_ids_base_id
+                self.content_ids_added = list(previous.content_ids_added)
+                self.content_ids_removed = list(previous.content_ids_removed)
+        elif previous.content_ids_count is not None:
+            self.content_ids_base = previous
+            self.content_ids_added = []
+            self.content_ids_removed = []
         else:
-            if previous.content_ids is not None:
-                self.content_ids = previous.content_ids
-        if self.content_ids is None:
             self.content_ids = list(
                 self._content_relationships().values_list("content_id", flat=True)
             )
 
+    def _content_ids_delta_exceeded(self):
+        """
+        Returns whether the content ids stored as a difference warrant a new snapshot.
+        """
+        delta_size = len(self.content_ids_added) + len(self.content_ids_removed)
+        if delta_size <= CONTENT_IDS_DELTA_MIN_SIZE:
+            return False
+        snapshot_size = (
+            RepositoryVersion.objects.filter(pk=self.content_ids_base_id)
+            .values_list(Func(F("content_ids"), function="cardinality"), flat=True)
+            .get()
+        )
+        return delta_size > snapshot_size // CONTENT_IDS_DELTA_RATIO
+
+    def _rebase_content_ids(self):
+        """
+        Move the versions based on the snapshot of this version to a new snapshot.
+
+        The first of them stores its content ids in full, the others are rebased onto it.
+        """
+        dependents = list(
+            RepositoryVersion.objects.filter(content_ids_base=self)
+            .defer("content_ids")
+            .order_by("number")
+        )
+        if not dependents:
+            return
+        snapshot = dependents[0]
+        for version in dependents[1:]:
+            version.content_ids_added, version.content_ids_removed = map(
+                list,
+                _diff_content_ids(
+                    version.content_ids_added,
+                    version.content_ids_removed,
+                    snapshot.content_ids_added,
+                    snapshot.content_ids_removed,
+                ),
+            )
+            version.content_ids_base = snapshot
+        RepositoryVersion.objects.filter(pk=snapshot.pk).update(
+            content_ids=list(snapshot._get_content_ids()),
+            content_ids_base=None,
+            content_ids_added=None,
+            content_ids_removed=None,
+        )
+        RepositoryVersion.objects.bulk_update(
+            dependents[1:], ["content_ids_base", "content_ids_added", "content_ids_removed"]
+        )
+
     def get_content(self, content_qs=None):
         """
         Returns a set of content for a repository version
@@ -905,15 +1059,7 @@ class RepositoryVersion(BaseModel):
         if content_qs is None:
             content_qs = Content.objects
 
-        content_ids = self._get_content_ids()
-        if isinstance(content_ids, list) and len(content_ids) >= 65535:
-            # Workaround for PostgreSQL's limit on the number of parameters in a query
-            content_ids = (
-                RepositoryVersion.objects.filter(pk=self.pk)
-                .annotate(cids=Func(F("content_ids"), function="unnest"))
-                .values_list("cids", flat=True)
-            )
-        return content_qs.filter(pk__in=content_ids)
+        return content_qs.filter(self._content_ids_q())
 
     @property
     def content(self):
@@ -1027,9 +1173,9 @@ class RepositoryVersion(BaseModel):
         if not base_version:
             return Content.objects.filter(version_memberships__version_added=self)
 
-        return Content.objects.filter(pk__in=self._get_content_ids()).exclude(
-            pk__in=base_version._get_content_ids()
-        )
+        if (diff := self._diff(base_version)) is not None:
+            return Content.objects.filter(pk__in=diff[0])
+        return Content.objects.filter(self._content_ids_q()).exclude(base_version._content_ids_q())
 
     def removed(self, base_version=None):
         """
@@ -1042,9 +1188,24 @@ class RepositoryVersion(BaseModel):
         if not base_version:
             return Content.objects.filter(version_memberships__version_removed=self)
 
-        return Content.objects.filter(pk__in=base_version._get_content_ids()).exclude(
-            pk__in=self._get_content_ids()
-        )
+        if (diff := self._diff(base_version)) is not None:
+            return Content.objects.filter(pk__in=diff[1])
+        return Content.objects.filter(base_version._content_ids_q()).exclude(self._content_ids_q())
+
+    def _diff(self, base_version):
+        """
+        Compare the content ids of two versions based on the same snapshot without querying it.
+
+        Returns:
+            tuple: The sets of content ids added and removed since `base_version`, or None.
+        """
+        delta, base_delta = self._content_ids_delta(), base_version._content_ids_delta()
+        if delta is None or base_delta is None or delta[0] != base_delta[0]:
+            return None
+        added, removed = _diff_content_ids(*delta[1:], *base_delta[1:])
+        if max(len(added), len(removed)) >= MAX_QUERY_PARAMS:
+            return None
+        return added, removed
 
     def contains(self, content):
         """
@@ -1053,6 +1214,14 @@ class RepositoryVersion(BaseModel):
         Returns:
             bool: True if the repository version contains the content, False otherwise
         """
+        if self.content_ids_base_id is not None:
+            if content.pk in self.content_ids_added:
+                return True
+            if content.pk in self.content_ids_removed:
+                return False
+            return RepositoryVersion.objects.filter(
+                pk=self.content_ids_base_id, content_ids__contains=[content.pk]
+            ).exists()
         if self.content_ids is not None:
             return content.pk in self.content_ids
         return self.content.filter(pk=content.pk).exists()
@@ -1078,10 +1247,20 @@ class RepositoryVersion(BaseModel):
             .exists()
         )
         repo_content = []
-        to_add = set(content.values_list("pk", flat=True)) - set(self._get_content_ids())
+        to_add = set(
+            Content.objects.filter(pk__in=content)
+            .exclude(self._content_ids_q())
+            .values_list("pk", flat=True)
+        )
         with transaction.atomic():
             if to_add:
-                self.content_ids += list(to_add)
+                if self.content_ids_base_id is not None:
+                    # Content removed from the snapshot earlier is simply not removed anymore.
+                    removed = set(self.content_ids_removed)
+                    self.content_ids_removed = list(removed - to_add)
+                    self.content_ids_added += list(to_add - removed)
+                else:
+                    self.content_ids += list(to_add)
                 self.save()
 
             # Normalize representation if content has already been removed in this version and
@@ -1126,12 +1305,24 @@ class RepositoryVersion(BaseModel):
             .exclude(pulp_domain_id=get_domain_pk())
             .exists()
         )
-        content_ids = set(self._get_content_ids())
-        to_remove = set(content.values_list("pk", flat=True))
         with transaction.atomic():
-            if to_remove:
-                self.content_ids = list(content_ids - to_remove)
-                self.save()
+            if self.content_ids_base_id is not None:
+                to_remove = set(
+                    Content.objects.filter(pk__in=content)
+                    .filter(self._content_ids_q())
+                    .values_list("pk", flat=True)
+                )
+                if to_remove:
+                    # Content added since the snapshot is simply not added anymore.
+                    added = set(self.content_ids_added)
+                    self.content_ids_added = list(added - to_remove)
+                    self.content_ids_removed += list(to_remove - added)
+                    self.save()
+            else:
+                to_remove = set(content.values_list("pk", flat=True))
+                if to_remove:
+                    self.content_ids = list(set(self._get_content_ids()) - to_remove)
+                    self.save()
 
             # Normalize representation if content has already been added in this version.
             # Undo addition by deleting the RepositoryContent.
@@ -1289,6 +1480,7 @@ class RepositoryVersion(BaseModel):
                     raise RuntimeError(
                         _("Some repo relations of this version were not translated.")
                     )
+                self._rebase_content_ids()
                 super().delete(**kwargs)
 
         else:
@@ -7,6 +7,7 @@ import logging
 import traceback
 from gettext import gettext as _
 
+from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField, HStoreField
 from django.contrib.postgres.indexes import GinIndex
 from django.core.serializers.json import DjangoJSONEncoder
@@ -23,9 +24,9 @@ from pulpcore.app.models.status import AppStatus
 from pulpcore.app.models.fields import EncryptedJSONField
 from pulpcore.constants import TASK_CHOICES, TASK_INCOMPLETE_STATES, TASK_STATES
 from pulpcore.exceptions import exception_to_dict
-from pulpcore.app.util import get_domain_pk
+from pulpcore.app.util import get_current_authenticated_user, get_domain_pk
 from pulpcore.app.contexts import _current_task
-from pulpcore.app.role_util import get_users_with_perms
+from pulpcore.app.role_util import assign_role_to_objects, get_users_with_perms
 from pulpcore.app.loggers import deprecation_logger
 
 _logger = logging.getLogger(__name__)
@@ -196,6 +197,14 @@ class Task(BaseModel, AutoAddObjPermsMixin):
         """Set the "core.task_user_dispatcher" role for the current user after creation."""
         self.add_roles_for_object_creator("core.task_user_dispatcher")
 
+    @classmethod
+    def bulk_add_perms(cls, objs):
+        """Handle the creation hooks of several new tasks at once, see `add_role_dispatcher`."""
+        super().bulk_add_perms(objs)
+        current_user = get_current_authenticated_user()
+        if current_user and isinstance(current_user, get_user_model()):
+            assign_role_to_objects("core.task_user_dispatcher", current_user, objs)
+
     def _cleanup_progress_reports(self, state):
         """Find any running progress-reports and set their states to the specified end-state."""
         self.progress_reports.filter(state=TASK_STATES.RUNNING).update(state=state)
@@ -390,6 +399,7 @@ class Task(BaseModel, AutoAddObjPermsMixin):
             models.Index(fields=["unblocked_at"]),
             models.Index(fields=["state"]),
             models.Index(fields=["state", "pulp_created"]),
+            models.Index(fields=["finished_at"]),
             GinIndex(
                 name="pulp_task_resources_index",
                 fields=["reserved_resources_record"],
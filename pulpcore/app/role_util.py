@@ -34,16 +34,7 @@ def assign_role(rolename, entity, obj=None, domain=None):
     """
     if obj and domain:
         raise BadRequest(_("Object and domain can not both be set."))
-    try:
-        role = Role.objects.get(name=rolename)
-    except Role.DoesNotExist:
-        raise BadRequest(_("The role '{}' does not exist.").format(rolename))
-    if obj is not None:
-        ctype = ContentType.objects.get_for_model(obj, for_concrete_model=False)
-        if not role.permissions.filter(content_type__pk=ctype.id).exists():
-            raise BadRequest(
-                _("The role '{}' does not carry any permission for that object.").format(rolename)
-            )
+    role = _get_role_for_object(rolename, obj)
     if domain is not None:
         # Check that at least one permission is on a model with a domain
         for permission in role.permissions.all():
@@ -62,6 +53,42 @@ def assign_role(rolename, entity, obj=None, domain=None):
         UserRole.objects.create(role=role, user=entity, content_object=obj, domain=domain)
 
 
+def assign_role_to_objects(rolename, entity, objs):
+    """
+    Assign a role to a user or a group on several objects of the same model at once.
+
+    Args:
+        rolename (str): Name of the role to assign.
+        entity (django.contrib.auth.User or pulpcore.app.models.Group): Entity to gain the role.
+        objs (list): Objects of the same model the role permissions are to be asserted on.
+    """
+    if not objs:
+        return
+    role = _get_role_for_object(rolename, objs[0])
+    if isinstance(entity, Group):
+        GroupRole.objects.bulk_create(
+            GroupRole(role=role, group=entity, content_object=obj) for obj in objs
+        )
+    else:
+        UserRole.objects.bulk_create(
+            UserRole(role=role, user=entity, content_object=obj) for obj in objs
+        )
+
+
+def _get_role_for_object(rolename, obj):
+    try:
+        role = Role.objects.get(name=rolename)
+    except Role.DoesNotExist:
+        raise BadRequest(_("The role '{}' does not exist.").format(rolename))
+    if obj is not None:
+        ctype = ContentType.objects.get_for_model(obj, for_concrete_model=False)
+        if not role.permissions.filter(content_type__pk=ctype.id).exists():
+            raise BadRequest(
+                _("The role '{}' does not carry any permission for that object.").format(rolename)
+            )
+    return role
+
+
 def remove_role(rolename, entity, obj=None, domain=None):
     """
     Remove a role from a user or a group.
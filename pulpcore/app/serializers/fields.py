@@ -268,7 +268,9 @@ class RepositoryVersionIdentityField(RepositoryVersionFieldGetURLMixin, Identity
 
 
 class RepositoryVersionRelatedField(RepositoryVersionFieldGetURLMixin, RelatedField):
-    queryset = models.RepositoryVersion.objects.all().defer("content_ids")
+    queryset = models.RepositoryVersion.objects.all().defer(
+        "content_ids", "content_ids_base", "content_ids_added", "content_ids_removed"
+    )
 
     def get_object(self, view_name, view_args, view_kwargs):
         lookup_kwargs = {
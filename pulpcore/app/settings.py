@@ -298,6 +298,14 @@ WORKER_TTL = 30
 # On SIGINT, this value represents the time before the worker will attempt to kill the subprocess.
 TASK_GRACE_INTERVAL = 600
 
+# Execute the tasks of a worker in a warm process instead of forking a new one for each task.
+# The process is replaced after MAX_TASKS tasks or once its peak memory exceeds MAX_RSS bytes.
+TASK_PROCESS_POOL = {
+    "ENABLED": False,
+    "MAX_TASKS": 100,
+    "MAX_RSS": None,
+}
+
 # how long to protect ephemeral items in minutes
 ORPHAN_PROTECTION_TIME = 24 * 60
 
@@ -322,11 +330,35 @@ ALLOWED_EXPORT_PATHS = []
 CACHE_ENABLED = False
 CACHE_SETTINGS = {
     "EXPIRES_TTL": 600,  # 10 minutes
+    "LOCAL_MAX_ENTRIES": 0,  # disabled
+    "LOCAL_EXPIRES_TTL": 60,  # 1 minute
 }
 
+# Keep an in-process index of matched distributions in every content app worker.
+CONTENT_DISTRIBUTION_INDEX = False
+
 # The time in seconds a RemoteArtifact will be ignored after failure.
 REMOTE_CONTENT_FETCH_FAILURE_COOLDOWN = 5 * 60  # 5 minutes
 
+# The aiohttp sessions shared by the downloaders of equally configured remotes.
+DOWNLOADER_SESSION_SETTINGS = {
+    "POOL_SIZE": 32,  # sessions kept open without being in use
+    "CONNECTION_LIMIT": 100,  # simultaneous connections per session
+    "KEEPALIVE_TIMEOUT": 60,  # seconds idle connections are kept open
+    "DNS_CACHE_TTL": 300,  # seconds resolved host names are cached
+}
+
+# Split downloads of at least MIN_SIZE bytes into up to SEGMENTS parallel ranged requests.
+DOWNLOADER_SEGMENT_SETTINGS = {
+    "MIN_SIZE": None,  # None disables segmented downloads
+    "SEGMENTS": 4,
+}
+
+# Forward ranged requests for on-demand content to the remote instead of fetching everything.
+REMOTE_CONTENT_RANGE_REQUESTS = False
+# Ranged requests for the same artifact after which it is downloaded in full. (0 means never)
+REMOTE_CONTENT_RANGE_COMPLETION_THRESHOLD = 3
+
 SPECTACULAR_SETTINGS = {
     "OAS_VERSION": "3.1.1",
     "SERVE_URLCONF": ROOT_URLCONF,
@@ -374,8 +406,11 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 #    lines and functions, at the time of peak RSS of the task process. This adds significant
 #    runtime overhead to the task process, 20-40%. Tweaking code might be warranted for
 #    some advanced settings.
+# * "stages" - Dumps a JSON report of the Stages API pipelines run by the task, showing for each
+#    stage the items and batches processed, the time spent waiting on the neighbouring stages and
+#    the time spent processing.
 # NOTE: "memray" and "pyinstrument" require additional packages to be installed on the system.
-TASK_DIAGNOSTICS = []  # ["memory", "pyinstrument", "memray"]
+TASK_DIAGNOSTICS = []  # ["memory", "pyinstrument", "memray", "stages"]
 
 ANALYTICS = True
 
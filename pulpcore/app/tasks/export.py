@@ -2,12 +2,11 @@ import json
 import logging
 import os
 import os.path
-import subprocess
+import sys
 import tarfile
 
 from distutils.util import strtobool
 from gettext import gettext as _
-from glob import glob
 from pathlib import Path
 
 from django.conf import settings
@@ -39,6 +38,88 @@ from pulpcore.constants import FS_EXPORT_METHODS
 log = logging.getLogger(__name__)
 
 
+class ChunkedFileWriter:
+    """
+    A write-only fileobj that splits the data into chunk files and checksums them on the fly.
+
+    The chunks are named like the ones of `split -a 4 -d`, i.e. `<path>.0000`, `<path>.0001`...
+    If no `chunk_size` is given, all data is written to `path` itself.
+
+    Attributes:
+        checksums (dict): The checksum of every written file by its path, once it is closed.
+    """
+
+    def __init__(self, path, chunk_size=None, hasher=Crc32Hasher):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.hasher = hasher
+        self.checksums = {}
+        self.paths = []
+        self._file = None
+        self._hasher = None
+        self._remaining = 0
+        self._offset = 0
+
+    def _next_file(self):
+        self._close_file()
+        if self.chunk_size is None:
+            path = self.path
+            self._remaining = sys.maxsize
+        else:
+            if len(self.paths) == 10000:
+                raise RuntimeError(_("Export chunk suffixes exhausted, increase the chunk_size."))
+            path = f"{self.path}.{len(self.paths):04d}"
+            self._remaining = self.chunk_size
+        self.paths.append(path)
+        self._file = open(path, "wb")
+        self._hasher = self.hasher()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self.checksums[self._file.name] = self._hasher.hexdigest()
+            self._file = None
+
+    def write(self, data):
+        data = memoryview(data)
+        while data:
+            if not self._remaining:
+                self._next_file()
+            piece = data[: self._remaining]
+            self._file.write(piece)
+            self._hasher.update(piece)
+            self._remaining -= len(piece)
+            self._offset += len(piece)
+            data = data[len(piece) :]
+
+    def tell(self):
+        return self._offset
+
+    def close(self):
+        if self.chunk_size is None and not self.paths:
+            # Create the (empty) file.
+            self._next_file()
+        self._close_file()
+
+    def remove(self):
+        """Close and delete all the files written so far."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.remove()
+
+
 class UnexportableArtifactException(RuntimeError):
     """Exception for artifacts that are unavailable for export."""
 
@@ -394,55 +475,15 @@ def pulp_export(exporter_pk, params):
         if not path.is_dir():
             path.mkdir(mode=0o775, parents=True)
 
-        rslts = {}
-        if the_export.validated_chunk_size:
-            # write it into chunks
-            with subprocess.Popen(
-                [
-                    "split",
-                    "-a",
-                    "4",
-                    "-b",
-                    str(the_export.validated_chunk_size),
-                    "-d",
-                    "-",
-                    tarfile_fp + ".",
-                ],
-                stdin=subprocess.PIPE,
-            ) as split_process:
-                try:
-                    with tarfile.open(
-                        tarfile_fp,
-                        "w|",
-                        fileobj=split_process.stdin,
-                    ) as tar:
-                        _do_export(pulp_exporter, tar, the_export)
-                except Exception:
-                    # no matter what went wrong, we can't trust the files we (may have) created.
-                    # Delete the ones we can find and pass the problem up.
-                    for pathname in glob(tarfile_fp + ".*"):
-                        os.remove(pathname)
-                    raise
-            # compute the hashes
-            paths = sorted([str(Path(p)) for p in glob(tarfile_fp + ".*")])
-            for a_file in paths:
-                a_hash = compute_file_hash(a_file, hasher=hasher())
-                rslts[a_file] = a_hash
-
-        else:
-            # write into the file
-            try:
-                with tarfile.open(tarfile_fp, "w") as tar:
-                    _do_export(pulp_exporter, tar, the_export)
-            except Exception:
-                # no matter what went wrong, we can't trust the file we created.
-                # Delete it if it exists and pass the problem up.
-                if os.path.exists(tarfile_fp):
-                    os.remove(tarfile_fp)
-                raise
-            # compute the hash
-            tarfile_hash = compute_file_hash(tarfile_fp, hasher=hasher())
-            rslts[tarfile_fp] = tarfile_hash
+        # Write the tar file, or its chunks, and checksum them on the fly. No matter what goes
+        # wrong, we can't trust the files we (may have) created. The writer deletes them and the
+        # problem is passed up.
+        with ChunkedFileWriter(
+            tarfile_fp, chunk_size=the_export.validated_chunk_size or None, hasher=hasher
+        ) as writer:
+            with tarfile.open(tarfile_fp, "w|", fileobj=writer) as tar:
+                _do_export(pulp_exporter, tar, the_export)
+        rslts = dict(writer.checksums)
 
         # store the outputfile/hash info
         the_export.output_file_info = rslts
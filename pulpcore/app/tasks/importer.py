@@ -1,17 +1,19 @@
 import json
 import os
 import re
-import tempfile
 import tarfile
-from contextlib import ExitStack, nullcontext
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from gettext import gettext as _
 from logging import getLogger
 
 import json_stream
 from django.conf import settings
-from django.core.files.storage import default_storage
+from django.core.files.storage import FileSystemStorage, default_storage
 from django.db.models import F
-from io import StringIO
 from rest_framework.serializers import ValidationError
 from tablib import Dataset
 
@@ -42,7 +44,7 @@ from pulpcore.app.util import (
     get_domain_pk,
 )
 from pulpcore.constants import TASK_STATES
-from pulpcore.tasking.tasks import dispatch
+from pulpcore.tasking.tasks import dispatch_many
 
 from pulpcore.plugin.importexport import BaseContentResource
 
@@ -57,6 +59,19 @@ CONTENT_MAPPING_FILE = "content_mapping.json"
 # How many entities from an import-file should be processed at one time
 IMPORT_BATCH_SIZE = 100
 
+# How many chunks of an import are validated in parallel, and the size of the reads to do so
+CHUNK_VALIDATION_WORKERS = 4
+CHUNK_VALIDATION_BLOCKSIZE = 1024 * 1024
+
+# How many artifact files are copied from an import into storage in parallel
+ARTIFACT_PLACEMENT_WORKERS = 4
+
+# On storages other than the filesystem, an artifact directory is listed instead of checking its
+# files one at a time once a batch has this many artifacts in it. At most this many listings are
+# kept.
+ARTIFACT_LISTING_THRESHOLD = 16
+ARTIFACT_LISTINGS_CACHED = 32
+
 # Concurrent imports w/ overlapping content can collide - how many attempts are we willing to
 # make before we decide this is a fatal error?
 MAX_ATTEMPTS = 3
@@ -178,21 +193,118 @@ class ChunkedFile(ExitStack):
         data = dict(
             message="Validating Chunks", code="validate.chunks", total=len(self.chunk_paths)
         )
-        with ProgressReport(**data) as pb:
-            for chunk_name, chunk_path in pb.iter(zip(self.chunk_names, self.chunk_paths)):
+        # The chunks are read in parallel, checksumming releases the GIL.
+        with ProgressReport(**data) as pb, ThreadPoolExecutor(
+            max_workers=CHUNK_VALIDATION_WORKERS
+        ) as executor:
+            futures = {
+                executor.submit(
+                    compute_file_hash,
+                    chunk_path,
+                    hasher=Crc32Hasher(),
+                    blocksize=CHUNK_VALIDATION_BLOCKSIZE,
+                ): chunk_name
+                for chunk_name, chunk_path in zip(self.chunk_names, self.chunk_paths)
+            }
+            for future in as_completed(futures):
+                chunk_name = futures[future]
                 expected_hash = self.toc["files"][chunk_name]
-                chunk_hash = compute_file_hash(chunk_path, hasher=Crc32Hasher())
+                chunk_hash = future.result()
                 if chunk_hash != expected_hash:
                     err_str = "File {} expected checksum : {}, computed checksum : {}".format(
                         chunk_name, expected_hash, chunk_hash
                     )
                     errs.append(err_str)
+                pb.increment()
+        errs.sort()
 
         # if there are any errors, report and fail
         if errs:
             raise ValidationError(_("Import chunk hash mismatch: {}).").format(str(errs)))
 
 
+class ImportArchive(ExitStack):
+    """
+    Read the members of an export in place, without extracting the tarball.
+
+    The archive keeps an index from member names to the offset and size of their data, so each
+    member is read by seeking straight to it. The index is built by a single pass over the member
+    headers, unless it is handed over by the task that built it, so other tasks don't have to scan
+    the tarball again.
+
+    Members can only be read using this object as a context manager.
+    """
+
+    def __init__(self, path, toc_path=None, index=None):
+        super().__init__()
+        self.path = path
+        self.toc_path = toc_path
+        self.index = index
+
+    def __enter__(self):
+        super().__enter__()
+        if self.toc_path:
+            fileobj = self.enter_context(ChunkedFile(self.toc_path))
+        else:
+            fileobj = self.enter_context(open(self.path, "rb"))
+        self.tar = self.enter_context(tarfile.open(self.path, "r", fileobj=fileobj))
+        if self.index is None:
+            self.index = {
+                member.name: [member.offset_data, member.size]
+                for member in self.tar
+                if member.isreg()
+            }
+        return self
+
+    def __exit__(self, *exc):
+        super().__exit__(*exc)
+        del self.tar
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def clone(self):
+        """Return a new, unopened archive of the same export sharing this archive's index."""
+        return ImportArchive(self.path, toc_path=self.toc_path, index=self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def open(self, name):
+        """
+        Open a member of the archive for reading.
+
+        Args:
+            name (str): The name of the member in the tarball.
+
+        Returns:
+            A binary file object reading the data of the member straight from the tarball.
+
+        Raises:
+            KeyError: When the archive has no such member.
+        """
+        offset, size = self.index[name]
+        member = tarfile.TarInfo(name)
+        member.offset_data = offset
+        member.size = size
+        return self.tar.extractfile(member)
+
+
+def _repo_version_members(archive, src_repo_name):
+    """
+    Return the part of the archive's index holding the repository version of `src_repo_name`.
+
+    Only this part is needed by the task importing that repository version, and it is small enough
+    to be handed over in the arguments of the task.
+    """
+    for name in archive:
+        match = re.search(rf"(^repository-{src_repo_name}_[0-9]+)/.+", name)
+        if match:
+            prefix = f"{match.group(1)}/"
+            return {name: loc for name, loc in archive.index.items() if name.startswith(prefix)}
+    return {}
+
+
 def _get_destination_repo_name(importer, source_repo_name):
     """
     Return the name of a destination repository considering the mapping or source repository name.
@@ -206,41 +318,47 @@ def _get_destination_repo_name(importer, source_repo_name):
 
 def _impfile_iterator(fd):
     """
-    Iterate over an import-file returning batches of rows as a json-array-string.
+    Iterate over an import-file returning batches of rows as a tablib Dataset.
 
-    We use naya.json.stream_array() to get individual rows; once a batch is gathered,
-    we yield the result of json.dumps() for that batch. Repeat until all rows have been
-    called for.
+    We use json_stream.load() to get individual rows; once a batch is gathered, we yield a
+    Dataset holding that batch. Repeat until all rows have been called for.
     """
     data = json_stream.load(fd)
     batch = []
     for row in data:
         batch.append(json_stream.to_standard_types(row))
         if len(batch) >= IMPORT_BATCH_SIZE:
-            yield json.dumps(batch)
-            batch.clear()
-    yield json.dumps(batch)
+            yield _dataset(batch)
+            batch = []
+    yield _dataset(batch)
+
 
+def _dataset(rows):
+    """Return a Dataset of the rows (dicts) of an import-file."""
+    dataset = Dataset()
+    dataset.dict = rows
+    return dataset
 
-def _import_file(fpath, resource_class, retry=False):
+
+def _import_file(archive, fpath, resource_class, retry=False):
     """
     Import the specified resource-file in batches to limit memory-use.
 
-    We process resource-files one "batch" at a time. Because of the way django-import's
-    internals work, we have to feed it batches as StringIO-streams of json-formatted strings.
-    The file-to-json-to-string-to-import is overhead, but it lets us put an upper bound on the
-    number of entities in memory at any one time at import-time.
+    We process resource-files one "batch" at a time, streaming the rows of the file into a
+    Dataset per batch. This puts an upper bound on the number of entities in memory at any one
+    time at import-time.
+
+    The resource-file is streamed from the `archive` it is a member of.
     """
     try:
         log.info(f"Importing file {fpath}.")
-        with open(fpath, "r") as json_file:
+        with archive.open(fpath) as json_file:
             resource = resource_class()
             log.info(f"...Importing resource {resource.__class__.__name__}.")
             # Load one batch-sized chunk of the specified import-file at a time. If requested,
             # retry a batch if it looks like we collided with some other repo being imported with
             # overlapping content.
-            for batch_str in _impfile_iterator(json_file):
-                data = Dataset().load(StringIO(batch_str))
+            for data in _impfile_iterator(json_file):
                 if retry:
                     curr_attempt = 1
 
@@ -318,7 +436,14 @@ def _check_versions(version_json):
 
 
 def import_repository_version(
-    importer_pk, src_repo_name, src_repo_type, dest_repo_name, dest_repo_pk, tar_path, toc_path=None
+    importer_pk,
+    src_repo_name,
+    src_repo_type,
+    dest_repo_name,
+    dest_repo_pk,
+    tar_path,
+    toc_path=None,
+    members=None,
 ):
     """
     Import a repository version from a Pulp export.
@@ -331,6 +456,8 @@ def import_repository_version(
         dest_repo_pk (str): The primary key of a destination repository if any
         tar_path (str): The path of an exported tarball.
         toc_path (str): The path to the TableOfContents file for the import (if it was provided).
+        members (dict): The index of the members of the exported tarball belonging to the
+            repository version, as built by `pulp_import`.
     """
     importer = PulpImporter.objects.get(pk=importer_pk)
 
@@ -341,36 +468,24 @@ def import_repository_version(
     )
     pb.save()
 
-    with tempfile.TemporaryDirectory(dir=".") as temp_dir:
-        if toc_path:
-            fileobj = ChunkedFile(toc_path)
-        else:
-            fileobj = nullcontext()
-        # Extract the repo file for the repo info
-        with fileobj as fp:
-            with tarfile.open(tar_path, "r", fileobj=fp) as tar:
-                tar.extract(REPO_FILE, path=temp_dir)
-
-                rv_name = ""
-                # Extract the repo version files
-                for mem in tar.getmembers():
-                    match = re.search(rf"(^repository-{src_repo_name}_[0-9]+)/.+", mem.name)
-                    if match:
-                        rv_name = match.group(1)
-                        tar.extract(mem, path=temp_dir)
-
-                if not rv_name:
-                    raise ValidationError(_("No RepositoryVersion found for {}").format(rv_name))
-
-                rv_path = os.path.join(temp_dir, rv_name)
-
-                # see if we have a Content mapping
-                mapping_path = f"{rv_name}/{CONTENT_MAPPING_FILE}"
-                mapping = {}
-                if mapping_path in tar.getnames():
-                    tar.extract(mapping_path, path=temp_dir)
-                    with open(os.path.join(temp_dir, mapping_path), "r") as mapping_file:
-                        mapping = json.load(mapping_file)
+    with ImportArchive(tar_path, toc_path=toc_path, index=members) as archive:
+        rv_name = ""
+        # Find the repo version files
+        for name in archive:
+            match = re.search(rf"(^repository-{src_repo_name}_[0-9]+)/.+", name)
+            if match:
+                rv_name = match.group(1)
+                break
+
+        if not rv_name:
+            raise ValidationError(_("No RepositoryVersion found for {}").format(rv_name))
+
+        # see if we have a Content mapping
+        mapping_path = f"{rv_name}/{CONTENT_MAPPING_FILE}"
+        mapping = {}
+        if mapping_path in archive:
+            with archive.open(mapping_path) as mapping_file:
+                mapping = json.load(mapping_file)
 
         # Content
         app_label = src_repo_type.split(".")[0]
@@ -381,8 +496,8 @@ def import_repository_version(
             if issubclass(res_class, RepositoryResource) and dest_repo_pk:
                 continue
 
-            filename = f"{res_class.__module__}.{res_class.__name__}.json"
-            for a_result in _import_file(os.path.join(rv_path, filename), res_class, retry=True):
+            filename = f"{rv_name}/{res_class.__module__}.{res_class.__name__}.json"
+            for a_result in _import_file(archive, filename, res_class, retry=True):
                 if issubclass(res_class, RepositoryResource) and a_result.rows:
                     repo_resource = a_result.rows[0]
                     if repo_resource.import_type in ("new", "update"):
@@ -396,9 +511,9 @@ def import_repository_version(
                     )
 
         # Once all content exists, create the ContentArtifact links
-        ca_path = os.path.join(rv_path, CA_FILE)
+        ca_path = f"{rv_name}/{CA_FILE}"
         # We don't do anything with the imported batches, we just need to get them imported
-        for a_batch in _import_file(ca_path, ContentArtifactResource, retry=True):
+        for a_batch in _import_file(archive, ca_path, ContentArtifactResource, retry=True):
             pass
 
         content_count = 0
@@ -428,6 +543,115 @@ def import_repository_version(
     gpr.update(done=F("done") + 1)
 
 
+class _ArtifactPlacer(ExitStack):
+    """
+    Copy the files of imported artifacts from an export into storage, one batch at a time.
+
+    The artifacts of a batch are fetched in one query, and the ones already in storage are
+    skipped. Existence is checked per file, except on storages other than the filesystem for the
+    artifact directories holding many artifacts of a batch, which are listed instead. The most
+    recently used listings are kept for the following batches. The remaining files are copied by
+    a bounded pool of threads, each reading from its own handle on the export.
+
+    The throughput is reported in the suffix of the progress report.
+    """
+
+    def __init__(self, archive, progress_report):
+        super().__init__()
+        self.archive = archive
+        self.pb = progress_report
+        self.listings = OrderedDict()
+        self.thread_archives = threading.local()
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+        self.bytes_copied = 0
+
+        # If we are domain-enabled, and not importing into "default", then the destination is "to
+        # the current domain's artifact directory". Otherwise, it's just to /artifact/.
+        if settings.DOMAIN_ENABLED and "default" != get_domain().name:
+            self.destination_dir = os.path.join("artifact", str(get_domain_pk()))
+        else:
+            self.destination_dir = "artifact"
+
+    def __enter__(self):
+        super().__enter__()
+        # The thread archives are closed only after the pool has shut down.
+        self.archives = self.enter_context(ExitStack())
+        self.executor = self.enter_context(
+            ThreadPoolExecutor(max_workers=ARTIFACT_PLACEMENT_WORKERS)
+        )
+        return self
+
+    def place(self, rows):
+        """Place the files of the artifacts imported as `rows`."""
+        pks = [row.object_id for row in rows]
+        files = {}
+        for sha256, size in Artifact.objects.filter(pk__in=pks).values_list("sha256", "size"):
+            destination_path = os.path.join(self.destination_dir, sha256[0:2], sha256[2:])
+            # If *the upstream* was domain-enabled, the tarfile will have artifact/DOMAIN/ in its
+            # path, and the Artifact will have artifact/current-domain-id in its "file" attribute.
+            # We need to copy from artifact/DOMAIN/ in the tarfile.
+            tar_path = os.path.join("artifact", "DOMAIN", sha256[0:2], sha256[2:])
+            if tar_path not in self.archive:
+                tar_path = os.path.join("artifact", sha256[0:2], sha256[2:])
+            files[destination_path] = (tar_path, size)
+
+        existing = self._existing(files)
+        futures = [
+            self.executor.submit(self._copy, tar_path, destination_path, size)
+            for destination_path, (tar_path, size) in files.items()
+            if destination_path not in existing
+        ]
+        for future in futures:
+            future.result()
+
+        elapsed = max(time.monotonic() - self.start, 1e-6)
+        self.pb.suffix = "{:.1f} artifacts/s, {:.1f} MiB/s".format(
+            (self.pb.done + len(rows)) / elapsed, self.bytes_copied / elapsed / 1024 / 1024
+        )
+        self.pb.increase_by(len(rows))
+
+    def _existing(self, paths):
+        """Return which of `paths` already exist in storage."""
+        if isinstance(default_storage, FileSystemStorage):
+            return {path for path in paths if default_storage.exists(path)}
+        directories = defaultdict(list)
+        for path in paths:
+            directory, name = os.path.split(path)
+            directories[directory].append(name)
+
+        # No copies are running while the batch is checked, so the listings need no locking here.
+        existing = set()
+        for directory, names in directories.items():
+            listing = self.listings.get(directory)
+            if listing is None and len(names) >= ARTIFACT_LISTING_THRESHOLD:
+                listing = self.listings[directory] = set(default_storage.listdir(directory)[1])
+                if len(self.listings) > ARTIFACT_LISTINGS_CACHED:
+                    self.listings.popitem(last=False)
+            if listing is None:
+                paths = (os.path.join(directory, name) for name in names)
+                existing.update(path for path in paths if default_storage.exists(path))
+            else:
+                self.listings.move_to_end(directory)
+                existing.update(os.path.join(directory, name) for name in names if name in listing)
+        return existing
+
+    def _copy(self, tar_path, destination_path, size):
+        """Copy a file straight out of the export into storage, in a worker thread."""
+        archive = getattr(self.thread_archives, "archive", None)
+        if archive is None:
+            with self.lock:
+                archive = self.archives.enter_context(self.archive.clone())
+            self.thread_archives.archive = archive
+        with archive.open(tar_path) as f:
+            default_storage.save(destination_path, f)
+        with self.lock:
+            self.bytes_copied += size
+            directory, name = os.path.split(destination_path)
+            if directory in self.listings:
+                self.listings[directory].add(name)
+
+
 def pulp_import(importer_pk, path, toc, create_repositories):
     """
     Import a Pulp export into Pulp.
@@ -442,11 +666,8 @@ def pulp_import(importer_pk, path, toc, create_repositories):
     """
     if toc:
         path = toc
-        fileobj = ChunkedFile(toc)
         log.info(_("Validating TOC {}.").format(toc))
-        fileobj.validate_chunks()
-    else:
-        fileobj = nullcontext()
+        ChunkedFile(toc).validate_chunks()
     log.info(_("Importing {}.").format(path))
     current_task = Task.current()
     task_group = TaskGroup.current()
@@ -456,30 +677,11 @@ def pulp_import(importer_pk, path, toc, create_repositories):
     )
     CreatedResource.objects.create(content_object=the_import)
 
-    with tempfile.TemporaryDirectory(dir=".") as temp_dir:
-        with fileobj as fp:
-            with tarfile.open(path, "r", fileobj=fp) as tar:
-
-                def is_within_directory(directory, target):
-                    abs_directory = os.path.abspath(directory)
-                    abs_target = os.path.abspath(target)
-
-                    prefix = os.path.commonprefix([abs_directory, abs_target])
-
-                    return prefix == abs_directory
-
-                def safe_extract(tar, path=".", members=None, *, numeric_owner=False):
-                    for member in tar.getmembers():
-                        member_path = os.path.join(path, member.name)
-                        if not is_within_directory(path, member_path):
-                            raise Exception("Attempted Path Traversal in Tar File")
-
-                    tar.extractall(path, members, numeric_owner=numeric_owner)
-
-                safe_extract(tar, path=temp_dir)
-
+    # The export is never extracted. Its members are indexed once, and each repository-version
+    # import is handed the part of the index it reads its members through.
+    with ImportArchive(path, toc_path=toc) as archive:
         # Check version info
-        with open(os.path.join(temp_dir, VERSIONS_FILE)) as version_file:
+        with archive.open(VERSIONS_FILE) as version_file:
             version_json = json.load(version_file)
             _check_versions(version_json)
 
@@ -488,47 +690,11 @@ def pulp_import(importer_pk, path, toc, create_repositories):
             message="Importing Artifacts",
             code="import.artifacts",
         )
-        into_default = "default" == get_domain().name
-        with ProgressReport(**data) as pb:
+        with ProgressReport(**data) as pb, _ArtifactPlacer(archive, pb) as placer:
             # Import artifacts, and place their binary blobs, one batch at a time.
             # Skip artifacts that already exist in storage.
-            for ar_result in _import_file(os.path.join(temp_dir, ARTIFACT_FILE), ArtifactResource):
-                for row in pb.iter(ar_result.rows):
-                    artifact = Artifact.objects.get(pk=row.object_id)
-
-                    # If we are domain-enabled, and not importing into "default", then the
-                    # destination is "to the current domain's artifact directory". Otherwise, it's
-                    # just to /artifact/.
-                    if settings.DOMAIN_ENABLED and not into_default:
-                        destination_path = os.path.join(
-                            "artifact",
-                            str(get_domain_pk()),
-                            artifact.sha256[0:2],
-                            artifact.sha256[2:],
-                        )
-
-                    else:
-                        destination_path = os.path.join(
-                            "artifact", artifact.sha256[0:2], artifact.sha256[2:]
-                        )
-
-                    # If *the upstream* was domain-enabled, the tarfile will have artifact/DOMAIN/
-                    # in its path, and the Artifact will have artifact/current-domain-id in its
-                    # "file" attribute. We need to copy from artifact/DOMAIN/ in the tarfile.
-                    domain_path = os.path.join(
-                        "artifact", "DOMAIN", artifact.sha256[0:2], artifact.sha256[2:]
-                    )
-                    if os.path.exists(os.path.join(temp_dir, domain_path)):
-                        tar_path = domain_path
-                    else:
-                        tar_path = os.path.join(
-                            "artifact", artifact.sha256[0:2], artifact.sha256[2:]
-                        )
-                    src_in_tar = os.path.join(temp_dir, tar_path)
-
-                    if not default_storage.exists(destination_path):
-                        with open(src_in_tar, "rb") as f:
-                            default_storage.save(destination_path, f)
+            for ar_result in _import_file(archive, ARTIFACT_FILE, ArtifactResource):
+                placer.place(ar_result.rows)
 
         # Now import repositories, in parallel.
 
@@ -543,7 +709,7 @@ def pulp_import(importer_pk, path, toc, create_repositories):
         total_workers = AppStatus.objects.online().filter(app_type="worker").count()
         import_workers = max(1, int(total_workers * (import_workers_percent / 100.0)))
 
-        with open(os.path.join(temp_dir, REPO_FILE), "r") as repo_data_file:
+        with archive.open(REPO_FILE) as repo_data_file:
             data = json.load(repo_data_file)
             gpr = GroupProgressReport(
                 message="Importing repository versions",
@@ -554,6 +720,7 @@ def pulp_import(importer_pk, path, toc, create_repositories):
             )
             gpr.save()
 
+            dispatches = []
             for index, src_repo in enumerate(data):
                 # Lock the repo we're importing-into
                 dest_repo_name = _get_destination_repo_name(importer, src_repo["name"])
@@ -578,17 +745,20 @@ def pulp_import(importer_pk, path, toc, create_repositories):
                     exclusive_resources.append(dest_repo)
                     dest_repo_pk = dest_repo.pk
 
-                dispatch(
-                    import_repository_version,
-                    exclusive_resources=exclusive_resources,
-                    args=(
-                        importer.pk,
-                        src_repo["name"],
-                        src_repo["pulp_type"],
-                        dest_repo_name,
-                        dest_repo_pk,
-                        path,
-                        toc,
-                    ),
-                    task_group=task_group,
+                dispatches.append(
+                    {
+                        "func": import_repository_version,
+                        "exclusive_resources": exclusive_resources,
+                        "args": (
+                            importer.pk,
+                            src_repo["name"],
+                            src_repo["pulp_type"],
+                            dest_repo_name,
+                            dest_repo_pk,
+                            path,
+                            toc,
+                            _repo_version_members(archive, src_repo["name"]),
+                        ),
+                    }
                 )
+            dispatch_many(dispatches, task_group=task_group)
@@ -49,11 +49,10 @@ def reclaim_space(repo_pks, keeplist_rv_pks=None, force=False):
             rv_content |= rv.content
         c_reclaim_qs = c_reclaim_qs.exclude(pk__in=rv_content)
 
-    content_distinct = c_reclaim_qs.distinct("pulp_type")
     unprotected = []
-    for content in content_distinct:
-        if not content.cast().PROTECTED_FROM_RECLAIM:
-            unprotected.append(content.pulp_type)
+    for pulp_type in c_reclaim_qs.order_by().values_list("pulp_type", flat=True).distinct():
+        if not Content.get_model_for_pulp_type(pulp_type).PROTECTED_FROM_RECLAIM:
+            unprotected.append(pulp_type)
 
     ca_qs = ContentArtifact.objects.select_related("content", "artifact").filter(
         content__in=c_reclaim_qs.values("pk"), artifact__isnull=False
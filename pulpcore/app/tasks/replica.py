@@ -9,7 +9,7 @@ from pulpcore.constants import TASK_STATES
 from pulpcore.app.apps import pulp_plugin_configs, PulpAppConfig
 from pulpcore.app.models import UpstreamPulp, Task, TaskGroup
 from pulpcore.app.replica import ReplicaContext
-from pulpcore.tasking.tasks import dispatch
+from pulpcore.tasking.tasks import batched_dispatch, dispatch
 
 from pulp_glue.common import __version__ as pulp_glue_version
 from pulp_glue.common.context import PluginRequirement
@@ -77,41 +77,43 @@ def replicate_distributions(server_pk):
                     replicator = replicator_class(ctx, task_group, tls_settings, server)
                     supported_replicators.append(replicator)
 
-    for replicator in supported_replicators:
-        distros = replicator.upstream_distributions(q=server.q_select)
-        distro_names = []
-        for distro in distros:
-            # Create remote
-            remote = replicator.create_or_update_remote(upstream_distribution=distro)
-            if not remote:
-                # The upstream distribution is not serving any content,
-                # let if fall through the cracks and be cleanup below.
-                continue
-            # Check if there is already a repository
-            repository = replicator.create_or_update_repository(remote=remote)
-            if not repository:
-                # No update occured because server.policy==LABELED and there was
-                # an already existing local repository with the same name
-                continue
-
-            # Dispatch a sync task if needed
-            if replicator.requires_syncing(distro):
-                replicator.sync(repository, remote)
-
-            # Get or create a distribution
-            replicator.create_or_update_distribution(repository, distro)
-
-            # Add name to the list of known distribution names
-            distro_names.append(distro["name"])
-
-        replicator.remove_missing(distro_names)
-
-    dispatch(
-        finalize_replication,
-        task_group=task_group,
-        exclusive_resources=[server],
-        args=[server.pk],
-    )
+    # The replicators dispatch tasks for every distribution, create them all at once.
+    with batched_dispatch():
+        for replicator in supported_replicators:
+            distros = replicator.upstream_distributions(q=server.q_select)
+            distro_names = []
+            for distro in distros:
+                # Create remote
+                remote = replicator.create_or_update_remote(upstream_distribution=distro)
+                if not remote:
+                    # The upstream distribution is not serving any content,
+                    # let if fall through the cracks and be cleanup below.
+                    continue
+                # Check if there is already a repository
+                repository = replicator.create_or_update_repository(remote=remote)
+                if not repository:
+                    # No update occured because server.policy==LABELED and there was
+                    # an already existing local repository with the same name
+                    continue
+
+                # Dispatch a sync task if needed
+                if replicator.requires_syncing(distro):
+                    replicator.sync(repository, remote)
+
+                # Get or create a distribution
+                replicator.create_or_update_distribution(repository, distro)
+
+                # Add name to the list of known distribution names
+                distro_names.append(distro["name"])
+
+            replicator.remove_missing(distro_names)
+
+        dispatch(
+            finalize_replication,
+            task_group=task_group,
+            exclusive_resources=[server],
+            args=[server.pk],
+        )
 
 
 def finalize_replication(server_pk):
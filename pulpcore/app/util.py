@@ -25,6 +25,7 @@ from pulpcore.app.loggers import deprecation_logger
 from pulpcore.app.apps import pulp_plugin_configs
 from pulpcore.app import models
 from pulpcore.app.contexts import _current_domain, _current_user_func
+from pulpcore.constants import DISTRIBUTION_INDEX_CHANNEL
 from pulpcore.exceptions.validation import InvalidSignatureError
 
 
@@ -115,10 +116,9 @@ def get_prn(instance=None, uri=None):
     if not isinstance(instance, Model):
         raise ValidationError(_("instance({}) must be a Model").format(instance))
 
-    if isinstance(instance, models.MasterModel):
-        instance = instance.cast()
+    model = instance.detail_model if isinstance(instance, models.MasterModel) else instance
 
-    return f"prn:{instance._meta.label_lower}:{instance.pk}"
+    return f"prn:{model._meta.label_lower}:{instance.pk}"
 
 
 def resolve_prn(prn):
@@ -298,7 +298,8 @@ def get_view_name_for_model(model_obj, view_action):
     from pulpcore.app.urls import all_routers
 
     if isinstance(model_obj, models.MasterModel):
-        model_obj = model_obj.cast()
+        # The detail model is all that is needed, do not fetch the detail object.
+        model_obj = model_obj.detail_model
     viewset = get_viewset_for_model(model_obj)
 
     # return the complete view name, joining the registered viewset base name with
@@ -628,6 +629,17 @@ def cache_key(base_path):
     return base_path
 
 
+def notify_distribution_change(domain_pk):
+    """
+    Notify the content apps to drop their in-process distribution index for a domain.
+
+    The notification is only delivered once the surrounding transaction is committed.
+    """
+    if settings.CONTENT_DISTRIBUTION_INDEX:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", (DISTRIBUTION_INDEX_CHANNEL, str(domain_pk)))
+
+
 @lru_cache(maxsize=1)
 def get_worker_name():
     return settings.WORKER_NAME_TEMPLATE.format(
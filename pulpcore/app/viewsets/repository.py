@@ -234,7 +234,11 @@ class RepositoryVersionQuerysetMixin:
     """A mixin to hold the shared get_queryset logic used by RepositoryVersionViewSets."""
 
     def get_queryset(self):
-        qs = super().get_queryset().defer("content_ids")
+        qs = (
+            super()
+            .get_queryset()
+            .defer("content_ids", "content_ids_base", "content_ids_added", "content_ids_removed")
+        )
         if getattr(self, "action", "") == "list":
             # Fetch info for repository (DetailRelatedField),
             # base_version (RepositoryVersionRelatedField), and
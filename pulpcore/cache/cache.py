@@ -1,7 +1,14 @@
+import asyncio
+import contextvars
 import enum
 import json
+import logging
+import struct
+import threading
 import time
+import zlib
 
+from collections import OrderedDict
 from functools import wraps
 
 from django.http import HttpResponseRedirect, HttpResponse, FileResponse as ApiFileResponse
@@ -21,10 +28,51 @@ from pulpcore.app.redis_connection import (
 )
 from pulpcore.responses import ArtifactResponse
 
-from pulpcore.metrics import artifacts_size_counter
+from pulpcore.metrics import artifacts_size_counter, cache_round_trips_recorder
+
+log = logging.getLogger(__name__)
 
 DEFAULT_EXPIRES_TTL = settings.CACHE_SETTINGS["EXPIRES_TTL"]
 
+# Redis channel announcing deleted base-keys to the content apps' local caches.
+INVALIDATION_CHANNEL = "pulp_cache_invalidation"
+
+# Binary entry layout: version, flags, length of the JSON metadata, metadata, raw body.
+ENTRY_VERSION = 1
+ENTRY_HEADER = struct.Struct("!BBI")
+ENTRY_FLAG_COMPRESSED = 0x01
+ENTRY_FLAG_TEXT = 0x02
+# Bodies at least this large are stored compressed if that makes them smaller.
+COMPRESSION_THRESHOLD = 1024
+
+# Finds the first existing base-key and fetches the given fields of it in a single round trip.
+FIND_BASE_KEY_SCRIPT = """
+for index, base_key in ipairs(KEYS) do
+    if redis.call("EXISTS", base_key) == 1 then
+        if #ARGV > 0 then
+            return {index, redis.call("HMGET", base_key, unpack(ARGV))}
+        end
+        return {index, {}}
+    end
+end
+return {0, {}}
+"""
+
+_MISSING = object()
+
+
+class _RequestState:
+    """The Redis state of the content request being served in the current context."""
+
+    def __init__(self):
+        self.prefetched = {}
+        self.round_trips = 0
+        # Read before the first Redis query, to discard values cached across an invalidation.
+        self.generation = local_cache.generation
+
+
+_request_state = contextvars.ContextVar("pulp_cache_request_state", default=None)
+
 
 class CacheKeys(enum.Enum):
     """Available keys to construct the index key for cache entry."""
@@ -64,6 +112,174 @@ def aconnection_error_wrapper(func):
     return wrapper
 
 
+def encode_entry(entry):
+    """
+    Serialize a content cache entry to its compact binary format.
+
+    The response body ("body" as bytes or "text" as str) is stored raw after the JSON encoded
+    metadata, compressed with zlib when large enough to benefit from it.
+    """
+    entry = dict(entry)
+    flags = 0
+    if (body := entry.pop("body", None)) is None:
+        if (text := entry.pop("text", None)) is not None:
+            body = text.encode("utf-8")
+            flags |= ENTRY_FLAG_TEXT
+        else:
+            body = b""
+    if len(body) >= COMPRESSION_THRESHOLD:
+        compressed = zlib.compress(body, 1)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= ENTRY_FLAG_COMPRESSED
+    metadata = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+    return ENTRY_HEADER.pack(ENTRY_VERSION, flags, len(metadata)) + metadata + body
+
+
+def decode_entry(data):
+    """
+    Deserialize a content cache entry, accepting both the binary and the legacy JSON format.
+
+    Returns:
+        dict: The entry or None if it can not be decoded.
+    """
+    if data[:1] == b"{":
+        entry = json.loads(data)
+        if binary := entry.pop("body", None):
+            # raw binary data were translated to their hexadecimal representation and saved in
+            # the cache as a regular string; now, it is necessary to translate the data back
+            # to its original representation that will be returned in the HTTP response BODY:
+            # https://docs.aiohttp.org/en/stable/web_reference.html#response
+            entry["body"] = bytes.fromhex(binary)
+        return entry
+    if len(data) < ENTRY_HEADER.size:
+        return None
+    version, flags, metadata_length = ENTRY_HEADER.unpack_from(data)
+    if version != ENTRY_VERSION:
+        return None
+    body_offset = ENTRY_HEADER.size + metadata_length
+    entry = json.loads(data[ENTRY_HEADER.size : body_offset])
+    body = data[body_offset:]
+    if flags & ENTRY_FLAG_COMPRESSED:
+        body = zlib.decompress(body)
+    if flags & ENTRY_FLAG_TEXT:
+        entry["text"] = body.decode("utf-8")
+    elif body:
+        entry["body"] = bytes(body)
+    return entry
+
+
+class LocalCache:
+    """
+    A bounded, in-process LRU of decoded content cache entries in front of Redis.
+
+    Entries are dropped when their base-key is deleted in Redis, which is announced on the
+    `INVALIDATION_CHANNEL`. The local cache is only used while subscribed to that channel, so
+    entries are never served after a missed invalidation.
+    """
+
+    RECONNECT_INTERVAL = 5
+
+    def __init__(self, max_entries, expires_ttl):
+        """
+        Args:
+            max_entries (int): The number of entries to keep, 0 disables the local cache.
+            expires_ttl (int): The number of seconds an entry is kept at most.
+        """
+        self.max_entries = max_entries
+        self.expires_ttl = expires_ttl
+        self.active = False
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self):
+        """A counter bumped on every invalidation, to be read before querying Redis."""
+        return self._generation
+
+    def get(self, key, base_key):
+        """Gets a copy of the entry or value of key or None if it is not cached locally."""
+        if not self.active:
+            return None
+        with self._lock:
+            item = self._entries.get((base_key, key))
+            if item is None:
+                return None
+            entry, expires = item
+            if expires < time.monotonic():
+                del self._entries[(base_key, key)]
+                return None
+            self._entries.move_to_end((base_key, key))
+        return dict(entry) if isinstance(entry, dict) else entry
+
+    def set(self, key, entry, base_key, generation):
+        """
+        Caches the entry of key locally.
+
+        The entry is discarded if an invalidation arrived since `generation` was read, because the
+        entry may have been fetched before its base-key was deleted.
+        """
+        with self._lock:
+            if not self.active or generation != self._generation:
+                return
+            self._entries[(base_key, key)] = (entry, time.monotonic() + self.expires_ttl)
+            self._entries.move_to_end((base_key, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key, base_key):
+        """Drops the entry of key."""
+        with self._lock:
+            self._entries.pop((base_key, key), None)
+
+    def invalidate(self, base_keys=None):
+        """Drops all entries under the base_keys, or all entries if none are given."""
+        with self._lock:
+            self._generation += 1
+            if base_keys is None:
+                self._entries.clear()
+            else:
+                base_keys = set(base_keys)
+                for entry_key in [k for k in self._entries if k[0] in base_keys]:
+                    del self._entries[entry_key]
+
+    async def listen(self):
+        """
+        Keep the local cache coherent by listening for base-key invalidations.
+
+        This runs for the lifetime of the content app and resubscribes whenever the Redis
+        connection is lost.
+        """
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_async_redis_connection().pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.invalidate()
+                self.active = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.invalidate(json.loads(message["data"]))
+            except AConnectionError as e:
+                log.warning("Local cache lost its Redis subscription: %s", e)
+            except Exception:
+                log.exception("Local cache failed to process its Redis subscription.")
+            finally:
+                # Nothing is served locally until invalidations are received again.
+                self.active = False
+                self.invalidate()
+                if pubsub is not None:
+                    await pubsub.aclose()
+            await asyncio.sleep(self.RECONNECT_INTERVAL)
+
+
+local_cache = LocalCache(
+    max_entries=settings.CACHE_SETTINGS.get("LOCAL_MAX_ENTRIES", 0),
+    expires_ttl=settings.CACHE_SETTINGS.get("LOCAL_EXPIRES_TTL", 60),
+)
+
+
 class Cache:
     """Base class for Pulp's cache"""
 
@@ -86,10 +302,12 @@ class Cache:
     def set(self, key, value, expires=None, base_key=None):
         """Sets the cached entry at key"""
         base_key = base_key or self.default_base_key
-        ret = self.redis.hset(base_key, key, value)
-        if expires:
-            self.redis.expire(base_key, expires)
-        return ret
+        if not expires:
+            return self.redis.hset(base_key, key, value)
+        with self.redis.pipeline() as pipe:
+            pipe.hset(base_key, key, value)
+            pipe.expire(base_key, expires)
+            return pipe.execute()[0]
 
     @connection_error_wrapper
     def exists(self, key=None, base_key=None):
@@ -115,11 +333,14 @@ class Cache:
         key and base_key should not both be lists
         """
         base_key = base_key or self.default_base_key
-        if key:
-            return self.redis.hdel(base_key, key)
-        if isinstance(base_key, str):
-            base_key = [base_key]
-        return self.redis.delete(*base_key)
+        base_keys = [base_key] if isinstance(base_key, str) else list(base_key)
+        with self.redis.pipeline(transaction=False) as pipe:
+            if key:
+                pipe.hdel(base_key, key)
+            else:
+                pipe.delete(*base_keys)
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(base_keys))
+            return pipe.execute()[0]
 
 
 class SyncContentCache(Cache):
@@ -251,23 +472,63 @@ class AsyncCache:
     def __init__(self):
         """Creates asynchronous cache instance"""
         self.redis = get_async_redis_connection()
+        self._find_base_key_script = None
+        if self.redis is not None:
+            self._find_base_key_script = self.redis.register_script(FIND_BASE_KEY_SCRIPT)
+
+    @staticmethod
+    def _count_round_trip():
+        """Accounts a Redis round trip to the request being served, if any."""
+        if (state := _request_state.get()) is not None:
+            state.round_trips += 1
 
     @aconnection_error_wrapper
     async def get(self, key, base_key=None):
-        """Gets cached entry of key"""
+        """Gets cached entry of key, preferring a value prefetched by `find_base_key`"""
         base_key = base_key or self.default_base_key
         if key is None:
+            self._count_round_trip()
             return await self.redis.hgetall(base_key)
+        if (state := _request_state.get()) is not None:
+            value = state.prefetched.pop((base_key, key), _MISSING)
+            if value is not _MISSING:
+                return value
+        self._count_round_trip()
         return await self.redis.hget(base_key, key)
 
     @aconnection_error_wrapper
     async def set(self, key, value, expires=None, base_key=None):
         """Sets the cached entry at key"""
         base_key = base_key or self.default_base_key
-        ret = await self.redis.hset(base_key, key, value)
-        if expires:
-            await self.redis.expire(base_key, expires)
-        return ret
+        self._count_round_trip()
+        if not expires:
+            return await self.redis.hset(base_key, key, value)
+        async with self.redis.pipeline() as pipe:
+            pipe.hset(base_key, key, value)
+            pipe.expire(base_key, expires)
+            return (await pipe.execute())[0]
+
+    @aconnection_error_wrapper
+    async def find_base_key(self, base_keys, fields=()):
+        """
+        Finds the first of the base_keys having cached entries.
+
+        The values of `fields` under the found base-key are fetched in the same round trip and
+        served by subsequent calls to `get` made while handling the same request.
+
+        Returns:
+            int: The index of the found base-key in base_keys, or None if none exists.
+        """
+        if not base_keys:
+            return None
+        self._count_round_trip()
+        index, values = await self._find_base_key_script(keys=base_keys, args=fields)
+        if not index:
+            return None
+        base_key = base_keys[index - 1]
+        if (state := _request_state.get()) is not None:
+            state.prefetched.update(((base_key, f), v) for f, v in zip(fields, values))
+        return index - 1
 
     @aconnection_error_wrapper
     async def exists(self, key=None, base_key=None):
@@ -275,6 +536,7 @@ class AsyncCache:
         if not base_key and base_key is not None:
             return False  # Failsafe for passing empty list/str
         base_key = base_key or self.default_base_key
+        self._count_round_trip()
         if key:
             return await self.redis.hexists(base_key, key)
         else:
@@ -293,11 +555,15 @@ class AsyncCache:
         key and base_key should not both be lists
         """
         base_key = base_key or self.default_base_key
-        if key:
-            return await self.redis.hdel(base_key, key)
-        if isinstance(base_key, str):
-            base_key = [base_key]
-        return await self.redis.delete(*base_key)
+        base_keys = [base_key] if isinstance(base_key, str) else list(base_key)
+        self._count_round_trip()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if key:
+                pipe.hdel(base_key, key)
+            else:
+                pipe.delete(*base_keys)
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(base_keys))
+            return (await pipe.execute())[0]
 
 
 class AsyncContentCache(AsyncCache):
@@ -341,21 +607,27 @@ class AsyncContentCache(AsyncCache):
 
         async def cached_function(*args, **kwargs):
             request = self.get_request_from_args(args)
-            bk = self.default_base_key
-            if callable(self.default_base_key):
-                bk = await self.default_base_key(request, self)
-            if self.auth:
-                await self.auth(request, self, bk)
-            key = self.make_key(request)
-            # Check cache
-            response = await self.make_response(key, bk)
-            if response is None:
-                # Cache miss, create new entry
-                response = await self.make_entry(
-                    key, bk, func, args, kwargs, self.default_expires_ttl
-                )
-            elif size := response.headers.get("X-PULP-ARTIFACT-SIZE"):
-                artifacts_size_counter.add(size)
+            state = _RequestState()
+            token = _request_state.set(state)
+            try:
+                bk = self.default_base_key
+                if callable(self.default_base_key):
+                    bk = await self.default_base_key(request, self)
+                if self.auth:
+                    await self.auth(request, self, bk)
+                key = self.make_key(request)
+                # Check cache
+                response = await self.make_response(key, bk)
+                if response is None:
+                    # Cache miss, create new entry
+                    response = await self.make_entry(
+                        key, bk, func, args, kwargs, self.default_expires_ttl
+                    )
+                elif size := response.headers.get("X-PULP-ARTIFACT-SIZE"):
+                    artifacts_size_counter.add(size)
+            finally:
+                _request_state.reset(token)
+                cache_round_trips_recorder.record(state.round_trips)
 
             return response
 
@@ -367,27 +639,47 @@ class AsyncContentCache(AsyncCache):
             if isinstance(arg, Request):
                 return arg
 
-    async def make_response(self, key, base_key):
-        """Tries to find the cached entry and turn it into a proper response"""
-        entry = await self.get(key, base_key)
-        if not entry:
-            return None
-        entry = json.loads(entry)
+    def find_local_base_key(self, base_keys, fields):
+        """
+        Finds the first of the base_keys under which all fields are held by the local cache.
 
-        if binary := entry.pop("body", None):
-            # raw binary data were translated to their hexadecimal representation and saved in
-            # the cache as a regular string; now, it is necessary to translate the data back
-            # to its original representation that will be returned in the HTTP response BODY:
-            # https://docs.aiohttp.org/en/stable/web_reference.html#response
-            entry["body"] = bytes.fromhex(binary)
+        Returns:
+            int: The index of the found base-key in base_keys, or None if none holds them all.
+        """
+        for index, base_key in enumerate(base_keys):
+            if all(local_cache.get(field, base_key) is not None for field in fields):
+                return index
+        return None
 
-        response_type = entry.pop("type", None)
+    def get_local(self, key, base_key=None):
+        """Gets the value of key from the local cache, or None if it is not held there"""
+        return local_cache.get(key, base_key or self.default_base_key)
+
+    def set_local(self, key, value, base_key=None):
+        """Keeps the value of key, as read from or written to Redis, in the local cache"""
+        if (state := _request_state.get()) is not None:
+            local_cache.set(key, value, base_key or self.default_base_key, state.generation)
+
+    async def make_response(self, key, base_key):
+        """Tries to find the cached entry and turn it into a proper response"""
+        entry = local_cache.get(key, base_key)
+        if entry is None:
+            generation = local_cache.generation
+            data = await self.get(key, base_key)
+            if not data:
+                return None
+            entry = decode_entry(data)
+            if entry is not None:
+                local_cache.set(key, dict(entry), base_key, generation)
+
+        response_type = entry and entry.pop("type", None)
         # None means "doesn't expire", unset means "already expired".
-        expires = entry.pop("expires", -1)
+        expires = entry and entry.pop("expires", -1)
         if (not response_type or response_type not in self.RESPONSE_TYPES) or (
             expires and expires < time.time()
         ):
             # Bad entry, delete from cache
+            local_cache.delete(key, base_key)
             await self.delete(key, base_key)
             return None
         response = self.RESPONSE_TYPES[response_type](**entry)
@@ -423,8 +715,7 @@ class AsyncContentCache(AsyncCache):
         elif isinstance(response, (Response, HTTPSuccessful)):
             body = response.body
             if isinstance(body, bytes):
-                # convert bytes into a json dump-able string
-                entry["body"] = body.hex()
+                entry["body"] = body
             else:
                 entry["text"] = getattr(body, "_value", body).decode("utf-8")
             entry["type"] = "Response"
@@ -435,8 +726,7 @@ class AsyncContentCache(AsyncCache):
             # We don't cache errors
             return response
 
-        # TODO look into smaller format, maybe some compression on the text
-        await self.set(key, json.dumps(entry), expires, base_key=base_key)
+        await self.set(key, encode_entry(entry), expires, base_key=base_key)
         return original_response
 
     def make_key(self, request):
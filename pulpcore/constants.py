@@ -15,6 +15,9 @@ WORKER_CLEANUP_LOCK = 11
 TASK_WAKEUP_UNBLOCK = "unblock"
 TASK_WAKEUP_HANDLE = "handle"
 
+# Postgres channel used to tell the content apps that distributions of a domain have changed.
+DISTRIBUTION_INDEX_CHANNEL = "pulp_content_distributions"
+
 #: All valid task states.
 TASK_STATES = SimpleNamespace(
     WAITING="waiting",
@@ -79,6 +82,12 @@ FS_EXPORT_CHOICES = (
 )
 
 EXPORT_BATCH_SIZE = 2000
+# How many artifacts, and roughly how many bytes of them, an export from a non-filesystem storage
+# downloads ahead of the one being written to the tarball
+EXPORT_PREFETCH_ARTIFACTS = 8
+EXPORT_PREFETCH_BYTES = 1024 * 1024 * 1024
+# Export-files up to this size are assembled in memory before being added to the tarball
+EXPORT_SPOOL_SIZE = 64 * 1024 * 1024
 
 # Mapping of http-response-headers to what various block-storage-apis call them
 # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/client/get_object.html
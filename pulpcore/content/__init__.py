@@ -24,8 +24,12 @@ from django.db.utils import (  # noqa: E402: module level not at top of file
 from pulpcore.app.apps import pulp_plugin_configs  # noqa: E402: module level not at top of file
 from pulpcore.app.models import AppStatus  # noqa: E402: module level not at top of file
 from pulpcore.app.util import get_worker_name  # noqa: E402: module level not at top of file
+from pulpcore.cache.cache import local_cache  # noqa: E402: module level not at top of file
 
 from .handler import Handler  # noqa: E402: module level not at top of file
+from .distribution_index import (  # noqa: E402: module level not at top of file
+    distribution_index,
+)
 from .authentication import authenticate, guid  # noqa: E402: module level not at top of file
 
 
@@ -95,6 +99,26 @@ async def _heartbeat_ctx(app):
         pass
 
 
+async def _local_cache_ctx(app):
+    listener_task = asyncio.create_task(local_cache.listen())
+    yield
+    listener_task.cancel()
+    try:
+        await listener_task
+    except asyncio.CancelledError:
+        pass
+
+
+async def _distribution_index_ctx(app):
+    listener_task = asyncio.create_task(distribution_index.listen())
+    yield
+    listener_task.cancel()
+    try:
+        await listener_task
+    except asyncio.CancelledError:
+        pass
+
+
 async def server(*args, **kwargs):
     os.chdir(settings.WORKING_DIRECTORY)
 
@@ -112,4 +136,8 @@ async def server(*args, **kwargs):
     app.add_routes([web.get(path_prefix, Handler().list_distributions)])
     app.add_routes([web.get(path_prefix + "{path:.+}", Handler().stream_content)])
     app.cleanup_ctx.append(_heartbeat_ctx)
+    if settings.CONTENT_DISTRIBUTION_INDEX:
+        app.cleanup_ctx.append(_distribution_index_ctx)
+    if settings.CACHE_ENABLED and local_cache.max_entries:
+        app.cleanup_ctx.append(_local_cache_ctx)
     return app
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import threading
+
+import psycopg
+from django.db import connection
+
+from pulpcore.constants import DISTRIBUTION_INDEX_CHANNEL
+
+log = logging.getLogger(__name__)
+
+RECONNECT_INTERVAL = 5
+
+
+class DistributionIndex:
+    """
+    A per-process index of the distributions matched by the content app.
+
+    Distributions are grouped by distribution model and domain and keyed by their `base_path`, so
+    resolving a request path is a handful of dictionary lookups along the path's parents. Entries
+    are dropped whenever a change notification is received for their domain.
+
+    The index is only consulted while `active` is set, i.e. while a listener is subscribed to the
+    change notifications. A lost notification connection disables and empties the index, so
+    missed notifications never lead to stale distributions being served.
+    """
+
+    def __init__(self):
+        self.active = False
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self):
+        """A counter bumped on every invalidation, to be read before querying the database."""
+        return self._generation
+
+    def get(self, distro_model, domain_pk, base_paths):
+        """
+        Find an indexed distribution serving one of the `base_paths`.
+
+        Args:
+            distro_model (type): The distribution model the handler matches against.
+            domain_pk (uuid.UUID): The domain of the request.
+            base_paths (list): The candidate base paths as returned by `Handler._base_paths`.
+
+        Returns:
+            The detail distribution or None if it is not indexed.
+        """
+        if not self.active:
+            return None
+        if entries := self._entries.get((distro_model, str(domain_pk))):
+            for base_path in base_paths:
+                if (distro := entries.get(base_path)) is not None:
+                    return distro
+        return None
+
+    def add(self, distro_model, domain_pk, distro, generation):
+        """
+        Index a distribution that was fetched from the database.
+
+        The entry is discarded if an invalidation arrived since `generation` was read, because the
+        distribution may have been fetched before the change was committed.
+        """
+        with self._lock:
+            if self.active and generation == self._generation:
+                key = (distro_model, str(domain_pk))
+                self._entries.setdefault(key, {})[distro.base_path] = distro
+
+    def invalidate(self, domain_pk=None):
+        """Drop the indexed distributions of a domain, or of all domains if none is given."""
+        with self._lock:
+            self._generation += 1
+            if domain_pk is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] == str(domain_pk)]:
+                    del self._entries[key]
+
+    async def listen(self):
+        """
+        Keep the index fresh by listening for distribution change notifications.
+
+        This runs for the lifetime of the content app and reconnects whenever the notification
+        connection is lost.
+        """
+        conn_params = connection.get_connection_params()
+        # Those are tailored to Django's own (synchronous) cursors.
+        conn_params.pop("cursor_factory", None)
+        conn_params.pop("context", None)
+        while True:
+            try:
+                aconn = await psycopg.AsyncConnection.connect(autocommit=True, **conn_params)
+                async with aconn:
+                    await aconn.execute(f"LISTEN {DISTRIBUTION_INDEX_CHANNEL}")
+                    self.invalidate()
+                    self.active = True
+                    async for notification in aconn.notifies():
+                        self.invalidate(notification.payload or None)
+            except psycopg.Error as e:
+                log.warning("Distribution index listener lost its connection: %s", e)
+            finally:
+                self.active = False
+                self.invalidate()
+            await asyncio.sleep(RECONNECT_INTERVAL)
+
+
+distribution_index = DistributionIndex()
@@ -1,4 +1,5 @@
 import asyncio
+from collections import Counter
 import logging
 from multidict import CIMultiDict
 import os
@@ -58,6 +59,7 @@ from pulpcore.app.util import (  # noqa: E402: module level not at top of file
     get_domain,
     cache_key,
 )
+from pulpcore.download import HttpDownloader  # noqa: E402: module level not at top of file
 
 from pulpcore.exceptions import (  # noqa: E402
     UnsupportedDigestValidationError,
@@ -67,6 +69,7 @@ from pulpcore.metrics import artifacts_size_counter  # noqa: E402
 
 from jinja2 import Template  # noqa: E402: module level not at top of file
 from pulpcore.cache import AsyncContentCache  # noqa: E402
+from pulpcore.content.distribution_index import distribution_index  # noqa: E402
 
 log = logging.getLogger(__name__)
 
@@ -149,6 +152,56 @@ class ArtifactNotFound(Exception):
     pass
 
 
+class SharedDownload:
+    """
+    A download of a RemoteArtifact shared by all the requests asking for it at the same time.
+
+    A single task downloads (and optionally saves) the RemoteArtifact while every request streams
+    the growing temporary file to its own client.
+    """
+
+    CHUNK_SIZE = 1048576  # 1 megabyte
+
+    def __init__(self):
+        """Initialize an empty download, referenced by the task driving it."""
+        self.headers = None
+        self.size = 0
+        self.done = False
+        self.error = None
+        self.content_artifacts = None
+        self.fd = None
+        self.task = None
+        self._references = 1
+        self._changed = asyncio.Condition()
+
+    async def notify(self):
+        """Wake up all requests waiting for progress."""
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def wait(self, offset):
+        """Wait until data past `offset` is available or the download is done."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.size > offset or self.done)
+
+    async def read(self, offset):
+        """Read the next chunk of downloaded data starting at `offset`."""
+        length = min(self.size - offset, self.CHUNK_SIZE)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, os.pread, self.fd, length, offset)
+
+    def acquire(self):
+        """Add a reference to the downloaded file."""
+        self._references += 1
+
+    def release(self):
+        """Drop a reference to the downloaded file and close it if it was the last one."""
+        self._references -= 1
+        if self._references == 0 and self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
 class Handler:
     """
     A default Handler for the Content App that also can be subclassed to create custom handlers.
@@ -188,6 +241,15 @@ class Handler:
 
     distribution_model = None
 
+    # Cache field recording whether the distribution of a base-key is protected by a content guard
+    CACHE_GUARD_KEY = "DISTRO#GUARD#PRESENT"
+
+    # SharedDownloads in progress by (remote, url, content artifact)
+    _shared_downloads = {}
+    # Number of ranged requests forwarded to the remote by (remote, url, content artifact)
+    _range_request_counts = Counter()
+    MAX_RANGE_REQUEST_COUNTS = 10000
+
     @staticmethod
     def _reset_db_connection():
         """
@@ -233,13 +295,18 @@ class Handler:
         """
         path = request.match_info["path"]
         base_paths = cls._base_paths(path)
-        multiplied_base_paths = []
-        for i, base_path in enumerate(base_paths):
-            copied_by_index_base_path = cache_key([base_path for _ in range(i + 1)])
-            multiplied_base_paths.extend(copied_by_index_base_path)
-        index_p1 = await cached.exists(base_key=multiplied_base_paths)
-        if index_p1:
-            return cache_key(base_paths[index_p1 - 1])
+        key = cached.make_key(request)
+        # Requests fully served by the local cache don't go to Redis at all.
+        index = cached.find_local_base_key(cache_key(base_paths), [cls.CACHE_GUARD_KEY, key])
+        if index is None:
+            # Prefetch the guard flag, and the entry of this request unless it is held locally,
+            # along with the base-key lookup.
+            fields = [cls.CACHE_GUARD_KEY]
+            if cached.find_local_base_key(cache_key(base_paths), [key]) is None:
+                fields.append(key)
+            index = await cached.find_base_key(cache_key(base_paths), fields=fields)
+        if index is not None:
+            return cache_key(base_paths[index])
         else:
             distro = await sync_to_async(cls._match_distribution)(
                 path, add_trailing_slash=cached.ADD_TRAILING_SLASH
@@ -256,8 +323,12 @@ class Handler:
             cached (CacheAiohttp) The Pulp cache
             base_key (str): The base_key associated with this response
         """
-        guard_key = "DISTRO#GUARD#PRESENT"
-        present = await cached.get(guard_key, base_key=base_key)
+        guard_key = cls.CACHE_GUARD_KEY
+        present = cached.get_local(guard_key, base_key=base_key)
+        if present is None:
+            present = await cached.get(guard_key, base_key=base_key)
+            if present is not None:
+                cached.set_local(guard_key, present, base_key=base_key)
         if present == b"True" or present is None:
             path = request.match_info["path"]
             distro = await sync_to_async(cls._match_distribution)(
@@ -271,6 +342,7 @@ class Handler:
             finally:
                 if not present:
                     await cached.set(guard_key, str(guard), base_key=base_key)
+                    cached.set_local(guard_key, str(guard).encode(), base_key=base_key)
 
     @AsyncContentCache(
         base_key=lambda req, cac: Handler.find_base_path_cached(req, cac),
@@ -334,6 +406,9 @@ class Handler:
         base_paths = cls._base_paths(path)
         distro_model = cls.distribution_model or Distribution
         domain = get_domain()
+        if distro_object := distribution_index.get(distro_model, domain.pk, base_paths):
+            return distro_object
+        generation = distribution_index.generation
         try:
             distro_object = (
                 distro_model.objects.filter(pulp_domain=domain)
@@ -345,10 +420,14 @@ class Handler:
                     "remote",
                     "pulp_domain",
                     "publication__repository_version",
+                    "content_guard",
                 )
                 .get(base_path__in=base_paths)
                 .cast()
             )
+            if distro_object.content_guard:
+                distro_object.content_guard = distro_object.content_guard.cast()
+            distribution_index.add(distro_model, domain.pk, distro_object, generation)
             return distro_object
         except ObjectDoesNotExist:
             if path.rstrip("/") in base_paths:
@@ -1274,7 +1353,7 @@ class Handler:
 
         data_size_handled = 0
 
-        async def handle_data(data):
+        async def write_data(data):
             nonlocal data_size_handled
             # If we got here, and the response hasn't had "prepare()" called on it, it's due to
             # some code-path (i.e., FileDownloader) that doesn't know/care about
@@ -1297,28 +1376,88 @@ class Handler:
                     data_size_handled = data_size_handled + len(data)
                 else:
                     await response.write(data)
-            if remote.policy != Remote.STREAMED:
-                await original_handle_data(data)
 
-        async def finalize():
-            if save_artifact and remote.policy != Remote.STREAMED:
-                await original_finalize()
+        if (
+            (range_start or range_stop)
+            and request.method == "GET"
+            and settings.REMOTE_CONTENT_RANGE_REQUESTS
+        ):
+            range_passed_through = False
+
+            async def handle_range_response_headers(headers):
+                nonlocal range_passed_through
+                if "Content-Range" not in headers:
+                    # The remote ignored the range, so the full content is sliced here.
+                    await handle_response_headers(headers)
+                    return
+                range_passed_through = True
+                for name, value in headers.items():
+                    lower_name = name.lower()
+                    if lower_name not in self.hop_by_hop_headers or lower_name == "content-length":
+                        response.headers[name] = value
+                if content_length := headers.get("content-length"):
+                    artifacts_size_counter.add(content_length)
+                await response.prepare(request)
 
-        downloader = remote.get_downloader(
-            remote_artifact=remote_artifact,
-            headers_ready_callback=handle_response_headers,
-        )
-        original_handle_data = downloader.handle_data
-        downloader.handle_data = handle_data
-        original_finalize = downloader.finalize
-        downloader.finalize = finalize
-        try:
-            download_result = await downloader.run(
-                extra_data={"disable_retry_list": (DigestValidationError,)}
+            async def handle_range_data(data):
+                if range_passed_through:
+                    await response.write(data)
+                else:
+                    await write_data(data)
+
+            async def finalize():
+                pass
+
+            # Ranged data can neither be validated against the digests nor saved.
+            downloader = remote.get_downloader(
+                url=remote_artifact.url,
+                headers={"Range": request.headers["Range"]},
+                headers_ready_callback=handle_range_response_headers,
             )
-        except DigestValidationError:
-            remote_artifact.failed_at = timezone.now()
-            await remote_artifact.asave()
+            if isinstance(downloader, HttpDownloader):
+                downloader.handle_data = handle_range_data
+                downloader.finalize = finalize
+                await downloader.run()
+                await response.write_eof()
+                if save_artifact and remote.policy != Remote.STREAMED:
+                    self._count_range_request(remote, remote_artifact, request)
+                return response
+
+        if remote.policy == Remote.STREAMED:
+            # Nothing is written to disk, so the download cannot be shared with other requests.
+            async def finalize():
+                pass
+
+            downloader = remote.get_downloader(
+                remote_artifact=remote_artifact,
+                headers_ready_callback=handle_response_headers,
+            )
+            downloader.handle_data = write_data
+            downloader.finalize = finalize
+            await downloader.run()
+            await response.write_eof()
+
+            if response.status == 404:
+                raise HTTPNotFound()
+            return response
+
+        download = self._join_shared_download(remote, remote_artifact, save_artifact, request)
+        try:
+            offset = 0
+            while True:
+                await download.wait(offset)
+                if download.headers is not None and not response.prepared:
+                    await handle_response_headers(download.headers)
+                if download.size > offset:
+                    data = await download.read(offset)
+                    offset += len(data)
+                    await write_data(data)
+                elif download.done:
+                    break
+        finally:
+            download.release()
+
+        if isinstance(download.error, DigestValidationError):
             close_tcp_connection(request.transport._sock)
             REMOTE_CONTENT_FETCH_FAILURE_COOLDOWN = settings.REMOTE_CONTENT_FETCH_FAILURE_COOLDOWN
             raise RuntimeError(
@@ -1334,12 +1473,13 @@ class Handler:
                 "Learn more on <https://pulpproject.org/pulpcore/docs/user/learn/"
                 "on-demand-downloading/#on-demand-and-streamed-limitations>"
             )
+        elif download.error:
+            if response.prepared:
+                close_tcp_connection(request.transport._sock)
+            raise download.error
 
-        if save_artifact and remote.policy != Remote.STREAMED:
-            content_artifacts = await asyncio.shield(
-                sync_to_async(self._save_artifact)(download_result, remote_artifact, request)
-            )
-            ca = content_artifacts[remote_artifact.content_artifact.relative_path]
+        if download.content_artifacts:
+            ca = download.content_artifacts[remote_artifact.content_artifact.relative_path]
             # If cache is enabled, add the future response to our stream response
             if settings.CACHE_ENABLED:
                 response.future_response = self._build_response_from_content_artifact(
@@ -1354,6 +1494,132 @@ class Handler:
             raise HTTPNotFound()
         return response
 
+    @staticmethod
+    def _shared_download_key(remote, remote_artifact):
+        """The key identifying the download of a RemoteArtifact in this process."""
+        content_artifact = remote_artifact.content_artifact
+        return (
+            remote.pk,
+            remote_artifact.url,
+            None if content_artifact._state.adding else content_artifact.pk,
+        )
+
+    def _count_range_request(self, remote, remote_artifact, request):
+        """
+        Count a ranged request forwarded to the remote and complete the artifact if it is popular.
+
+        Once `REMOTE_CONTENT_RANGE_COMPLETION_THRESHOLD` ranged requests were made for the same
+        RemoteArtifact, the whole artifact is downloaded and saved in the background, so further
+        requests are served by Pulp.
+        """
+        threshold = settings.REMOTE_CONTENT_RANGE_COMPLETION_THRESHOLD
+        key = self._shared_download_key(remote, remote_artifact)
+        if not threshold or key in self._shared_downloads:
+            return
+        if len(self._range_request_counts) >= self.MAX_RANGE_REQUEST_COUNTS:
+            self._range_request_counts.clear()
+        self._range_request_counts[key] += 1
+        if self._range_request_counts[key] >= threshold:
+            del self._range_request_counts[key]
+            download = self._join_shared_download(remote, remote_artifact, True, request)
+            download.release()
+
+    def _join_shared_download(self, remote, remote_artifact, save_artifact, request):
+        """
+        Join the download of a RemoteArtifact, starting it if no other request did already.
+
+        Concurrent requests for the same RemoteArtifact share a single upstream download, so the
+        artifact is downloaded and saved only once. The caller must `release()` the download.
+
+        Args:
+            remote (pulpcore.plugin.models.Remote) The detail Remote to download with.
+            remote_artifact (pulpcore.plugin.models.RemoteArtifact) The RemoteArtifact
+                to fetch.
+            save_artifact (bool): Whether to save the downloaded Artifact.
+            request(aiohttp.web.Request) The request that starts the download.
+
+        Returns:
+            The [SharedDownload][] of the RemoteArtifact.
+        """
+        key = self._shared_download_key(remote, remote_artifact)
+        if download := self._shared_downloads.get(key):
+            download.acquire()
+            return download
+
+        download = SharedDownload()
+        download.acquire()
+        self._shared_downloads[key] = download
+        download.task = asyncio.create_task(
+            self._run_shared_download(
+                key, download, remote, remote_artifact, save_artifact, request
+            )
+        )
+        return download
+
+    async def _run_shared_download(
+        self, key, download, remote, remote_artifact, save_artifact, request
+    ):
+        """
+        Download and optionally save a RemoteArtifact on behalf of all requests sharing it.
+
+        The download is not bound to any single client, so it is neither interrupted when the
+        client that started it goes away nor when any other client does.
+        """
+
+        async def handle_response_headers(headers):
+            download.headers = headers
+            await download.notify()
+
+        async def handle_data(data):
+            nonlocal path
+            await original_handle_data(data)
+            downloader._writer.flush()
+            if download.fd is None:
+                path = downloader.path
+                download.fd = os.open(path, os.O_RDONLY)
+            elif downloader.path != path:
+                # Clients already received data from a file the downloader gave up on
+                raise RuntimeError(
+                    _("Download of {url} was restarted after streaming had begun.").format(
+                        url=remote_artifact.url
+                    )
+                )
+            download.size += len(data)
+            await download.notify()
+
+        async def finalize():
+            if save_artifact:
+                await original_finalize()
+
+        path = None
+        downloader = remote.get_downloader(
+            remote_artifact=remote_artifact,
+            headers_ready_callback=handle_response_headers,
+        )
+        original_handle_data = downloader.handle_data
+        downloader.handle_data = handle_data
+        original_finalize = downloader.finalize
+        downloader.finalize = finalize
+        try:
+            download_result = await downloader.run(
+                extra_data={"disable_retry_list": (DigestValidationError,)}
+            )
+            if save_artifact:
+                download.content_artifacts = await sync_to_async(self._save_artifact)(
+                    download_result, remote_artifact, request
+                )
+        except DigestValidationError as e:
+            download.error = e
+            remote_artifact.failed_at = timezone.now()
+            await remote_artifact.asave()
+        except Exception as e:
+            download.error = e
+        finally:
+            del self._shared_downloads[key]
+            download.done = True
+            await download.notify()
+            download.release()
+
 
 def close_tcp_connection(sock):
     """Configure socket to close TCP connection immediately."""
@@ -2,8 +2,7 @@ from gettext import gettext as _
 
 import asyncio
 from collections import namedtuple
-import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
 import tempfile
@@ -105,6 +104,7 @@ class BaseDownloader:
             self.semaphore = asyncio.Semaphore()  # This will always be acquired
         self._digests = {}
         self._size = 0
+        self._interrupted_data = None
         if self.expected_digests:
             if not set(self.expected_digests).intersection(set(Artifact.DIGEST_FIELDS)):
                 raise UnsupportedDigestValidationError(
@@ -143,6 +143,7 @@ class BaseDownloader:
             self.path = self._writer.name
             self._digests = {n: pulp_hashlib.new(n) for n in Artifact.DIGEST_FIELDS}
             self._size = 0
+            self._interrupted_data = None
 
     async def handle_data(self, data):
         """
@@ -153,12 +154,33 @@ class BaseDownloader:
         the concatenation of all the arguments: m.handle_data(a); m.handle_data(b) is equivalent to
         m.handle_data(a+b).
 
+        The data is written and hashed in the `THREADPOOL`, one job per digest, without blocking
+        the event loop. The jobs run to completion even if handling the data is interrupted, and
+        are kept with the size of the data in `_interrupted_data` then.
+
         Args:
             data (bytes): The data to be handled by the downloader.
         """
         self._ensure_writer_has_open_file()
-        self._writer.write(data)
-        self._record_size_and_digests_for_data(data)
+        loop = asyncio.get_running_loop()
+        jobs = asyncio.gather(
+            loop.run_in_executor(THREADPOOL, self._writer.write, data),
+            *(
+                loop.run_in_executor(THREADPOOL, algorithm.update, data)
+                for algorithm in self._digests.values()
+            ),
+            return_exceptions=True,
+        )
+        try:
+            results = await asyncio.shield(jobs)
+        except BaseException:
+            self._interrupted_data = (jobs, len(data))
+            raise
+        for result in results:
+            if isinstance(result, BaseException):
+                self._interrupted_data = (jobs, len(data))
+                raise result
+        self._size += len(data)
 
     async def finalize(self):
         """
@@ -176,14 +198,32 @@ class BaseDownloader:
                 :meth:`~pulpcore.plugin.download.BaseDownloader.handle_data`.
         """
         self._ensure_writer_has_open_file()
-        self._writer.flush()
-        os.fsync(self._writer.fileno())
+        await asyncio.get_running_loop().run_in_executor(THREADPOOL, self._flush_writer)
         self._writer.close()
         self._writer = None
         self.validate_digests()
         self.validate_size()
         log.debug(f"Downloaded file from {self.url}")
 
+    def _record_size_and_digests_for_data(self, data):
+        """
+        Record the size and digest for an available chunk of data.
+
+        This is kept for downloaders that handle the data themselves. It hashes the data in the
+        calling thread, `handle_data` does so off the event loop.
+
+        Args:
+            data (bytes): The data to have its size and digest values recorded.
+        """
+        for algorithm in self._digests.values():
+            algorithm.update(data)
+        self._size += len(data)
+
+    def _flush_writer(self):
+        """Flush the written data to disk."""
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+
     def fetch(self, extra_data=None):
         """
         Run the download synchronously and return the `DownloadResult`.
@@ -197,20 +237,6 @@ class BaseDownloader:
         result = asyncio.get_event_loop().run_until_complete(self.run(extra_data=extra_data))
         return result
 
-    def _record_size_and_digests_for_data(self, data):
-        """
-        Record the size and digest for an available chunk of data.
-
-        Args:
-            data (bytes): The data to have its size and digest values recorded.
-        """
-        global THREADPOOL
-        futures = [
-            THREADPOOL.submit(algorithm.update, data) for algorithm in self._digests.values()
-        ]
-        concurrent.futures.wait(futures, timeout=None, return_when=ALL_COMPLETED)
-        self._size += len(data)
-
     @property
     def artifact_attributes(self):
         """
@@ -1,16 +1,22 @@
 from aiohttp import __version__ as aiohttp_version
 import asyncio
 import atexit
+from collections import OrderedDict, deque
 import copy
 from gettext import gettext as _
+import hashlib
+import json
 from multidict import MultiDict
 import platform
 import ssl
 import sys
 from tempfile import NamedTemporaryFile
+import threading
 from urllib.parse import urlparse
+import weakref
 
 import aiohttp
+from django.conf import settings
 
 from pulpcore.app.apps import PulpAppConfig
 from .http import HttpDownloader
@@ -24,6 +30,98 @@ PROTOCOL_MAP = {
 }
 
 
+class SessionPool:
+    """
+    A process-wide pool of [aiohttp.ClientSession][] objects shared by the downloader factories.
+
+    Sessions are keyed on the event loop and on the remote settings they are built from, so equally
+    configured remotes share their connections, while any change to those settings results in a
+    new session. Sessions are reference counted by the factories using them. Beyond the
+    configured pool size, the least recently used sessions without references are closed.
+    """
+
+    def __init__(self):
+        self._sessions = OrderedDict()
+        self._releases = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, key, make_session):
+        """
+        Get the session for key, creating it with `make_session` if needed.
+
+        Every call must be paired with a call to `release`.
+        """
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None or entry[0].closed:
+                entry = self._sessions[key] = [make_session(), 0]
+            self._sessions.move_to_end(key)
+            entry[1] += 1
+            session = entry[0]
+            self._apply_releases()
+            evicted = self._evict()
+        self._close(evicted)
+        return session
+
+    def release(self, key):
+        """
+        Drop a reference to the session for key.
+
+        This is called from finalizers, which may run in the middle of `acquire` in the same
+        thread. So the release is only queued, and applied when the pool is not busy.
+        """
+        self._releases.append(key)
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._apply_releases()
+            evicted = self._evict()
+        finally:
+            self._lock.release()
+        self._close(evicted)
+
+    def _apply_releases(self):
+        while self._releases:
+            if entry := self._sessions.get(self._releases.popleft()):
+                entry[1] -= 1
+
+    def _evict(self):
+        idle_keys = [key for key, (_, references) in self._sessions.items() if not references]
+        excess = len(self._sessions) - settings.DOWNLOADER_SESSION_SETTINGS["POOL_SIZE"]
+        evicted = []
+        for key in idle_keys:
+            loop = key[0]
+            if excess > 0 or loop.is_closed():
+                evicted.append((loop, self._sessions.pop(key)[0]))
+                excess -= 1
+        return evicted
+
+    @staticmethod
+    def _close(sessions):
+        for loop, session in sessions:
+            if loop.is_closed():
+                continue
+            if loop.is_running():
+                loop.call_soon_threadsafe(loop.create_task, session.close())
+            else:
+                try:
+                    loop.run_until_complete(session.close())
+                except RuntimeError:
+                    # Another event loop is running in this thread.
+                    pass
+
+    def close(self):
+        """Close all sessions."""
+        with self._lock:
+            sessions = [(key[0], session) for key, (session, _) in self._sessions.items()]
+            self._sessions.clear()
+        self._close(sessions)
+
+
+_session_pool = SessionPool()
+atexit.register(_session_pool.close)
+
+
 class DownloaderFactory:
     """
     A factory for creating downloader objects that are configured from with remote settings.
@@ -71,9 +169,10 @@ class DownloaderFactory:
             "http": self._http_or_https,
             "file": self._generic,
         }
-        self._session = self._make_aiohttp_session_from_remote()
+        session_key = (asyncio.get_event_loop(), type(self), self._session_config_digest())
+        self._session = _session_pool.acquire(session_key, self._make_aiohttp_session_from_remote)
+        weakref.finalize(self, _session_pool.release, session_key)
         self._semaphore = asyncio.Semaphore(value=download_concurrency)
-        atexit.register(self._session_cleanup)
 
     @staticmethod
     def user_agent():
@@ -86,19 +185,63 @@ class DownloaderFactory:
         system = f"{uname.system} {uname.machine}"
         return f"pulpcore/{pulp_version} ({python}, {system}) (aiohttp {aiohttp_version})"
 
-    def _session_cleanup(self):
-        asyncio.get_event_loop().run_until_complete(self._session.close())
+    def _session_config_digest(self):
+        """
+        Digest the remote settings the session is built from.
+
+        Factories whose digests are equal share one pooled session, including its cookie jar. The
+        digest therefore covers the credentials of the remote as well, so cookies issued to one
+        user are never sent on behalf of another.
+
+        Plugin factories that put more remote-specific state into the session (e.g. tokens or
+        headers in an overridden `_make_aiohttp_session_from_remote`) must extend this hook to
+        cover that state, e.g. by digesting it together with `super()._session_config_digest()`.
+        As long as they don't, their sessions are not shared between remotes at all.
+
+        Returns:
+            str: A digest that differs for any difference in those settings.
+        """
+        config = [
+            self._remote.ca_cert,
+            self._remote.client_cert,
+            self._remote.client_key,
+            self._remote.tls_validation,
+            self._remote.headers,
+            self._remote.total_timeout,
+            self._remote.sock_connect_timeout,
+            self._remote.sock_read_timeout,
+            self._remote.connect_timeout,
+            self._remote.username,
+            self._remote.password,
+            self._remote.proxy_url,
+            self._remote.proxy_username,
+            self._remote.proxy_password,
+        ]
+        cls = type(self)
+        if (
+            cls._make_aiohttp_session_from_remote
+            is not DownloaderFactory._make_aiohttp_session_from_remote
+            and cls._session_config_digest is DownloaderFactory._session_config_digest
+        ):
+            config += [str(self._remote.pk), str(self._remote.pulp_last_updated)]
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
 
     def _make_aiohttp_session_from_remote(self):
         """
         Build a [aiohttp.ClientSession][] from the remote's settings and timing settings.
 
-        This method is what provides the force_close of the TCP connection with each request.
+        The session keeps its connections alive to be reused by all downloaders of equally
+        configured remotes, see `SessionPool`.
 
         Returns:
             [aiohttp.ClientSession][]
         """
-        tcp_conn_opts = {}
+        session_settings = settings.DOWNLOADER_SESSION_SETTINGS
+        tcp_conn_opts = {
+            "limit": session_settings["CONNECTION_LIMIT"],
+            "keepalive_timeout": session_settings["KEEPALIVE_TIMEOUT"],
+            "ttl_dns_cache": session_settings["DNS_CACHE_TTL"],
+        }
 
         sslcontext = None
         if self._remote.ca_cert:
@@ -126,6 +269,7 @@ class DownloaderFactory:
         headers = MultiDict({"User-Agent": DownloaderFactory.user_agent()})
         if self._remote.headers is not None:
             for header_dict in self._remote.headers:
+                header_dict = dict(header_dict)
                 user_agent_header = header_dict.pop("User-Agent", None)
                 if user_agent_header:
                     headers["User-Agent"] = f"{headers['User-Agent']}, {user_agent_header}"
@@ -210,6 +354,10 @@ class DownloaderFactory:
             )
 
         kwargs["throttler"] = self._remote.download_throttler if self._remote.rate_limit else None
+        segment_settings = settings.DOWNLOADER_SEGMENT_SETTINGS
+        if segment_settings["MIN_SIZE"] is not None:
+            kwargs.setdefault("segments", segment_settings["SEGMENTS"])
+            kwargs.setdefault("segment_min_size", segment_settings["MIN_SIZE"])
 
         return download_class(url, **options, **kwargs)
 
@@ -1,10 +1,14 @@
+from contextlib import asynccontextmanager
+from gettext import gettext as _
 import logging
+import os
 
 import aiohttp
 import asyncio
 import backoff
+from multidict import CIMultiDict, CIMultiDictProxy
 
-from .base import BaseDownloader, DownloadResult
+from .base import BaseDownloader, DownloadResult, THREADPOOL
 from pulpcore.exceptions import (
     DigestValidationError,
     SizeValidationError,
@@ -109,6 +113,12 @@ class HttpDownloader(BaseDownloader):
     The coroutine will automatically retry 10 times with exponential backoff before allowing a
     final exception to be raised.
 
+    A retry resumes an interrupted transfer if the server advertised byte ranges and a validator
+    (an `ETag` or `Last-Modified` header) for the url. The data already written is kept, along with
+    the running digests, and the rest is requested with a `Range` request conditioned on the
+    validator by `If-Range`. Should the validator have changed, the server sends the whole file and
+    the download starts over.
+
     Attributes:
         session (aiohttp.ClientSession): The session to be used by the downloader.
         auth (aiohttp.BasicAuth): An object that represents HTTP Basic Authorization or None
@@ -135,6 +145,8 @@ class HttpDownloader(BaseDownloader):
         headers=None,
         throttler=None,
         max_retries=0,
+        segments=1,
+        segment_min_size=None,
         **kwargs,
     ):
         """
@@ -153,6 +165,10 @@ class HttpDownloader(BaseDownloader):
             headers (dict): Headers to be submitted with the request.
             throttler (asyncio_throttle.Throttler): Throttler for asyncio.
             max_retries (int): The maximum number of times to retry a download upon failure.
+            segments (int): The maximum number of parallel ranged requests to split a download
+                into.
+            segment_min_size (int): The expected size from which on downloads are segmented. None
+                disables segmenting.
             kwargs (dict): This accepts the parameters of
                 [pulpcore.plugin.download.BaseDownloader][].
         """
@@ -166,12 +182,17 @@ class HttpDownloader(BaseDownloader):
                 connector=conn, timeout=timeout, headers=headers, requote_redirect_url=False
             )
             self._close_session_on_finalize = True
+        self.headers = headers
         self.auth = auth
         self.proxy = proxy
         self.proxy_auth = proxy_auth
         self.headers_ready_callback = headers_ready_callback
         self.download_throttler = throttler
         self.max_retries = max_retries
+        self.segments = segments
+        self.segment_min_size = segment_min_size
+        self._resume_validator = None
+        self._resumed = False
         super().__init__(url, **kwargs)
 
     def raise_for_status(self, response):
@@ -197,7 +218,9 @@ class HttpDownloader(BaseDownloader):
              DownloadResult: Contains information about the result. See the DownloadResult docs for
                  more information.
         """
-        if self.headers_ready_callback:
+        # The headers of a resumed response only describe the remainder of the file, and were
+        # already reported for the response that got interrupted.
+        if self.headers_ready_callback and not self._resumed:
             await self.headers_ready_callback(response.headers)
         while True:
             chunk = await response.content.read(1048576)  # 1 megabyte
@@ -254,7 +277,8 @@ class HttpDownloader(BaseDownloader):
                 giveup=http_giveup_handler,
             )
             async def download_wrapper():
-                self._ensure_no_broken_file()
+                if not self._can_resume():
+                    self._ensure_no_broken_file()
                 try:
                     return await self._run(extra_data=extra_data)
                 except asyncio.TimeoutError:
@@ -287,21 +311,277 @@ class HttpDownloader(BaseDownloader):
         Args:
             extra_data (dict): Extra data passed by the downloader.
         """
+        if self._should_segment():
+            extra_slots = await self._acquire_segment_slots(self.segments - 1)
+            if extra_slots:
+                try:
+                    to_return = await self._run_segmented(extra_slots + 1)
+                finally:
+                    for _i in range(extra_slots):
+                        self.semaphore.release()
+                if self._close_session_on_finalize:
+                    await self.session.close()
+                return to_return
         if self.download_throttler:
             await self.download_throttler.acquire()
+        headers = self.headers
+        await self._settle_interrupted_data()
+        resume_from = self._size if self._can_resume() else 0
+        if resume_from:
+            headers = {
+                **(headers or {}),
+                "Range": f"bytes={resume_from}-",
+                "If-Range": self._resume_validator,
+            }
         async with self.session.get(
-            self.url, proxy=self.proxy, proxy_auth=self.proxy_auth, auth=self.auth
+            self.url,
+            proxy=self.proxy,
+            proxy_auth=self.proxy_auth,
+            auth=self.auth,
+            headers=headers,
         ) as response:
+            resumed = resume_from and self._is_resumed_response(response, resume_from)
+            if resume_from and not resumed and response.status in (200, 206, 416):
+                # The file changed or the range was rejected, so the partial file is useless.
+                self._ensure_no_broken_file()
+                if response.status != 200:
+                    await response.release()
+                    return await self._run(extra_data=extra_data)
             self.raise_for_status(response)
+            if not resumed:
+                self._resume_validator = self._get_resume_validator(response)
+            self._resumed = bool(resumed)
             to_return = await self._handle_response(response)
             await response.release()
         if self._close_session_on_finalize:
             await self.session.close()
         return to_return
 
+    def _should_segment(self):
+        """Whether the download is large enough to be split into ranged requests."""
+        return (
+            self.segments > 1
+            and self.segment_min_size is not None
+            and bool(self.expected_size)
+            and self.expected_size >= self.segment_min_size
+            and not self._can_resume()
+            and not self._overrides_data_handling()
+        )
+
+    def _overrides_data_handling(self):
+        """
+        Whether `handle_data` or `finalize` are overridden, on the class or on this instance.
+
+        Segments are written straight into the file, bypassing `handle_data`. So downloads whose
+        data is handled differently, e.g. streamed to a client, are never segmented.
+        """
+        return any(
+            name in vars(self) or getattr(type(self), name) is not getattr(HttpDownloader, name)
+            for name in ("handle_data", "finalize")
+        )
+
+    async def _acquire_segment_slots(self, count):
+        """
+        Acquire up to `count` additional slots of the semaphore without waiting for them.
+
+        Waiting for slots while holding one could deadlock downloaders waiting for each other.
+
+        Returns:
+            int: The number of slots acquired, which must be released after the download.
+        """
+        acquired = 0
+        while acquired < count and not self.semaphore.locked():
+            # An unlocked semaphore is acquired without suspending.
+            await self.semaphore.acquire()
+            acquired += 1
+        return acquired
+
+    async def _run_segmented(self, segments):
+        """
+        Download the file in `segments` parallel ranged requests and compute its digests.
+
+        Args:
+            segments (int): The number of segments to split the download into.
+
+        Returns:
+             DownloadResult: Contains information about the result.
+        """
+        size = self.expected_size
+        segment_size = -(-size // segments)
+        first, *rest = [
+            (start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)
+        ]
+        async with self._get_range(*first) as response:
+            if response.status == 200:
+                # The server does not support byte ranges and sent the whole file.
+                to_return = await self._handle_response(response)
+                await response.release()
+                return to_return
+            self.raise_for_status(response)
+            self._check_segment(response, *first)
+            # The headers describe the whole file, not just its first segment.
+            headers = CIMultiDict(response.headers)
+            headers.popall("Content-Range", None)
+            headers["Content-Length"] = str(size)
+            headers = CIMultiDictProxy(headers)
+            if self.headers_ready_callback:
+                await self.headers_ready_callback(headers)
+            self._ensure_writer_has_open_file()
+            os.ftruncate(self._writer.fileno(), size)
+            validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            tasks = [
+                asyncio.create_task(self._download_segment(start, end, validator))
+                for start, end in rest
+            ]
+            try:
+                await asyncio.gather(self._write_segment(response, *first), *tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            await response.release()
+        await asyncio.get_running_loop().run_in_executor(THREADPOOL, self._compute_digests)
+        await self.finalize()
+        return DownloadResult(
+            path=self.path,
+            artifact_attributes=self.artifact_attributes,
+            url=self.url,
+            headers=headers,
+        )
+
+    @asynccontextmanager
+    async def _get_range(self, start, end, validator=None):
+        """Request the bytes from `start` to `end` of the file, waiting for the throttler."""
+        if self.download_throttler:
+            await self.download_throttler.acquire()
+        headers = {**(self.headers or {}), "Range": f"bytes={start}-{end}"}
+        if validator:
+            headers["If-Range"] = validator
+        async with self.session.get(
+            self.url,
+            proxy=self.proxy,
+            proxy_auth=self.proxy_auth,
+            auth=self.auth,
+            headers=headers,
+        ) as response:
+            yield response
+
+    async def _download_segment(self, start, end, validator):
+        """Download the bytes from `start` to `end` into the preallocated file."""
+        async with self._get_range(start, end, validator) as response:
+            self.raise_for_status(response)
+            self._check_segment(response, start, end)
+            await self._write_segment(response, start, end)
+            await response.release()
+
+    def _check_segment(self, response, start, end):
+        """
+        Ensure the response contains the requested segment of a file of the expected size.
+
+        Raises:
+            aiohttp.ClientPayloadError: When the response is not the requested segment, e.g.
+                because the file changed between the requests.
+            [pulpcore.exceptions.SizeValidationError][]: When the file is not of the
+                expected size.
+        """
+        content_range = response.headers.get("Content-Range", "")
+        if response.status != 206 or not content_range.startswith(f"bytes {start}-{end}/"):
+            raise aiohttp.ClientPayloadError(
+                _("Unexpected response to the range request for bytes {}-{} of {}.").format(
+                    start, end, self.url
+                )
+            )
+        total = content_range.rpartition("/")[2]
+        if total != "*" and int(total) != self.expected_size:
+            raise SizeValidationError(int(total), self.expected_size, url=self.url)
+
+    async def _write_segment(self, response, start, end):
+        """Write the body of a ranged response to the file at its offset."""
+        loop = asyncio.get_running_loop()
+        fd = self._writer.fileno()
+        offset = start
+        while chunk := await response.content.read(1048576):  # 1 megabyte
+            await loop.run_in_executor(THREADPOOL, os.pwrite, fd, chunk, offset)
+            offset += len(chunk)
+        if offset != end + 1:
+            raise aiohttp.ClientPayloadError(
+                _("Received {} instead of {} bytes for the segment at {} of {}.").format(
+                    offset - start, end + 1 - start, start, self.url
+                )
+            )
+
+    def _compute_digests(self):
+        """Compute the size and digests of the downloaded file."""
+        with open(self.path, "rb") as f:
+            while chunk := f.read(1048576):
+                for algorithm in self._digests.values():
+                    algorithm.update(chunk)
+                self._size += len(chunk)
+
+    async def _settle_interrupted_data(self):
+        """
+        Account for the data whose handling was interrupted, before resuming after it.
+
+        That data may have been written and hashed in full, in part or not at all. The resume
+        offset is taken from the real length of the file, and the download is only resumed if
+        that matches the data that was hashed. Otherwise it starts over.
+        """
+        if self._interrupted_data is None:
+            return
+        jobs, size = self._interrupted_data
+        self._interrupted_data = None
+        # The jobs can not be cancelled, they finish on their own.
+        results = await asyncio.shield(jobs)
+        if self._writer is None or any(isinstance(result, BaseException) for result in results):
+            self._ensure_no_broken_file()
+            return
+        file_size = await asyncio.get_running_loop().run_in_executor(THREADPOOL, self._written_size)
+        if file_size != self._size + size:
+            self._ensure_no_broken_file()
+            return
+        self._size = file_size
+
+    def _written_size(self):
+        """The real length of the file written so far."""
+        self._writer.flush()
+        return os.fstat(self._writer.fileno()).st_size
+
+    def _can_resume(self):
+        """Whether a partial download is kept and can be continued with a range request."""
+        return self._writer is not None and self._size > 0 and self._resume_validator is not None
+
+    @staticmethod
+    def _get_resume_validator(response):
+        """
+        Return the validator a range request can be conditioned on, or None.
+
+        Resuming requires the server to support byte ranges and to identify the version of the file
+        it serves. Encoded responses are never resumed, because the ranges would apply to the
+        encoded data rather than to the data handed to `handle_data`.
+        """
+        if response.headers.get("Accept-Ranges", "").lower() != "bytes":
+            return None
+        if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+            return None
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            return etag
+        return response.headers.get("Last-Modified")
+
+    @staticmethod
+    def _is_resumed_response(response, resume_from):
+        """Whether the response continues the file at `resume_from`."""
+        if response.status != 206:
+            return False
+        content_range = response.headers.get("Content-Range", "")
+        return content_range.startswith(f"bytes {resume_from}-")
+
     def _ensure_no_broken_file(self):
         """Upon retry reset writer back to None to get a fresh file."""
         if self._writer is not None:
             self._writer.delete = True
             self._writer.close()
             self._writer = None
+        self._resume_validator = None
+        self._interrupted_data = None
@@ -63,4 +63,48 @@ class ArtifactsSizeCounter(MetricsEmitter):
         self.counter.add(int(amount), attributes)
 
 
+class CacheRoundTripsRecorder(MetricsEmitter):
+    def __init__(self):
+        self.meter = init_otel_meter("pulp-content")
+        self.histogram = self.meter.create_histogram(
+            "cache.redis.round_trips",
+            unit="{round_trip}",
+            description="Records the number of Redis round trips per cached content request",
+        )
+
+    def record(self, amount):
+        attributes = {
+            "domain_name": get_domain().name,
+            "worker_process": get_worker_name(),
+        }
+        self.histogram.record(amount, attributes)
+
+
+class StageMetricsRecorder(MetricsEmitter):
+    def __init__(self):
+        self.meter = init_otel_meter("pulp-worker")
+        self.items = self.meter.create_counter(
+            "stages.items",
+            unit="{item}",
+            description="Counts the items processed by Stages API pipeline stages",
+        )
+        self.durations = self.meter.create_histogram(
+            "stages.duration",
+            unit="s",
+            description="Records where Stages API pipeline stages spent their time",
+        )
+
+    def record(self, stage_name, stats):
+        attributes = {
+            "domain_name": get_domain().name,
+            "worker_process": get_worker_name(),
+            "stage": stage_name,
+        }
+        self.items.add(stats["items_in"], attributes)
+        for activity in ("get_wait", "put_wait", "busy_time"):
+            self.durations.record(stats[activity], {**attributes, "activity": activity})
+
+
 artifacts_size_counter = ArtifactsSizeCounter.build()
+cache_round_trips_recorder = CacheRoundTripsRecorder.build()
+stage_metrics_recorder = StageMetricsRecorder.build()
@@ -25,6 +25,7 @@ from pulpcore.app.models import (
     Importer,
     FilesystemExporter,
     MasterModel,
+    MasterModelQuerySet,
     ProgressReport,
     Publication,
     PublishedArtifact,
@@ -71,6 +72,7 @@ __all__ = [
     "Importer",
     "FilesystemExporter",
     "MasterModel",
+    "MasterModelQuerySet",
     "ProgressReport",
     "Publication",
     "PublishedArtifact",
@@ -2,21 +2,31 @@ from gettext import gettext as _
 
 from pulpcore.app.models import ContentArtifact
 from pulpcore.app.files import validate_file_paths
+from pulpcore.plugin.repo_version_utils import overlapping_paths, validate_version_paths
 
 
 def validate_publication_paths(publication):
     """
     Validate artifact relative paths for dupes or overlap (e.g. a/b and a/b/c).
 
+    For pass-through publications, the paths of the repository version are validated with
+    [pulpcore.plugin.repo_version_utils.validate_version_paths][], and only the paths they may
+    overlap with are checked against the published artifacts.
+
     Raises:
         ValueError: If two artifact relative paths are dupes or overlap
     """
     paths = list(publication.published_artifact.values_list("relative_path", flat=True))
 
     if publication.pass_through:
-        paths += ContentArtifact.objects.filter(
+        try:
+            validate_version_paths(publication.repository_version)
+        except ValueError as e:
+            raise ValueError(_("Cannot create publication. {err}.").format(err=e))
+        content_artifacts = ContentArtifact.objects.filter(
             content__pk__in=publication.repository_version.content
-        ).values_list("relative_path", flat=True)
+        )
+        paths += [path for path, artifact_id in overlapping_paths(content_artifacts, set(paths))]
 
     try:
         validate_file_paths(paths)
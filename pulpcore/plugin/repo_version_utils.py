@@ -113,17 +113,35 @@ def validate_version_paths(version):
     """
     Validate artifact relative paths for dupes or overlap (e.g. a/b and a/b/c).
 
+    The previous version is assumed to be valid, so only the paths of the content added since are
+    checked, against each other and against the paths of the content they may overlap with. If
+    there is no previous version, all paths are checked.
+
     Raises:
         ValueError: If two artifact relative paths overlap
     """
+    try:
+        previous = version.previous()
+    except version.DoesNotExist:
+        previous = None
+
+    if previous is None:
+        content_artifacts = ContentArtifact.objects.filter(content__pk__in=version.content)
+    else:
+        content_artifacts = ContentArtifact.objects.filter(
+            content__pk__in=version.added(base_version=previous)
+        )
     # Get unique (path, artifact) pairs to allow artifacts shared across content
-    content_artifacts = (
-        ContentArtifact.objects.filter(content__pk__in=version.content)
-        .values_list("relative_path", "artifact")
-        .distinct()
-    )
+    pairs = set(content_artifacts.values_list("relative_path", "artifact").distinct())
+    if previous is not None and pairs:
+        retained_content_artifacts = ContentArtifact.objects.filter(
+            content__pk__in=version.content
+        ).exclude(content__pk__in=version.added(base_version=previous))
+        pairs.update(
+            overlapping_paths(retained_content_artifacts, {path for path, artifact_id in pairs})
+        )
 
-    paths = [path for path, artifact_id in content_artifacts]
+    paths = [path for path, artifact_id in pairs]
 
     try:
         validate_file_paths(paths)
@@ -131,6 +149,36 @@ def validate_version_paths(version):
         raise ValueError(_("Repository version errors : {err}").format(err=e))
 
 
+def overlapping_paths(content_artifacts, paths, batch_size=500):
+    """
+    Find the content artifacts whose relative paths may be duplicates of or overlap with `paths`.
+
+    These are the relative paths equal to one of `paths`, to one of their parent directories, or
+    located below one of them. This is used to validate a few new paths against a large set of
+    paths known to be valid, without loading all of them. The prefix searches are served by the
+    `text_pattern_ops` index on `ContentArtifact.relative_path`.
+
+    Args:
+        content_artifacts (django.db.models.QuerySet): The ContentArtifacts to search.
+        paths (iterable of str): The relative paths to search for.
+        batch_size (int): How many paths are searched for in a single query.
+
+    Yields:
+        tuple: The (relative_path, artifact) pairs of the matching content artifacts.
+    """
+    paths = list(paths)
+    for i in range(0, len(paths), batch_size):
+        batch = paths[i : i + batch_size]
+        exact = set(batch)
+        query = Q()
+        for path in batch:
+            parts = path.split("/")
+            exact.update("/".join(parts[:n]) for n in range(1, len(parts)))
+            query |= Q(relative_path__startswith=f"{path}/")
+        query |= Q(relative_path__in=exact)
+        yield from content_artifacts.filter(query).values_list("relative_path", "artifact")
+
+
 def validate_repo_version(version):
     """
     Validate a repo version.
@@ -1,4 +1,4 @@
-from .api import create_pipeline, EndStage, Stage
+from .api import create_pipeline, AdaptiveBatchPolicy, EndStage, Stage, StageStats
 from .artifact_stages import (
     ACSArtifactHandler,
     ArtifactDownloader,
@@ -1,12 +1,97 @@
 import asyncio
+import contextvars
 import logging
+import time
 
 from gettext import gettext as _
 
 from pulpcore.app.util import get_domain
+from pulpcore.metrics import stage_metrics_recorder
 
 log = logging.getLogger(__name__)
 
+# A list collecting the stats of all stages run while it is set, see the "stages" task diagnostic.
+stage_stats_reports = contextvars.ContextVar("stage_stats_reports", default=None)
+
+
+class StageStats:
+    """
+    Counters describing where a stage spent its time.
+
+    Attributes:
+        items_in (int): The number of items received from the previous stage.
+        items_out (int): The number of items handed to the next stage.
+        batches (int): The number of batches yielded by `batches()`.
+        max_batch_size (int): The size of the largest batch.
+        max_queue_depth (int): The largest number of items seen waiting in the input queue.
+        get_wait (float): Seconds spent waiting for items of the previous stage.
+        put_wait (float): Seconds spent waiting for the next stage to accept items.
+        total_time (float): Seconds spent in `run()`.
+    """
+
+    def __init__(self):
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.max_queue_depth = 0
+        self.get_wait = 0.0
+        self.put_wait = 0.0
+        self.total_time = 0.0
+
+    @property
+    def busy_time(self):
+        """Seconds spent processing items, including database calls."""
+        return max(0.0, self.total_time - self.get_wait - self.put_wait)
+
+    def as_dict(self):
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "mean_batch_size": self.items_in / self.batches if self.batches else None,
+            "max_batch_size": self.max_batch_size,
+            "max_queue_depth": self.max_queue_depth,
+            "get_wait": self.get_wait,
+            "put_wait": self.put_wait,
+            "busy_time": self.busy_time,
+            "total_time": self.total_time,
+        }
+
+
+class AdaptiveBatchPolicy:
+    """
+    Sizes the batches of a stage so that processing one takes about `target_latency` seconds.
+
+    After each batch, the size is moved halfway towards the number of items that would have been
+    processed in the target latency at the measured rate, within `min_size` and `max_size`.
+
+    Args:
+        target_latency (float): The time in seconds processing a batch should take.
+        min_size (int): The minimum batch size to wait for.
+        max_size (int): The maximum number of items in a batch.
+        initial_size (int): The batch size to start with.
+    """
+
+    def __init__(self, target_latency=1.0, min_size=50, max_size=5000, initial_size=500):
+        self.target_latency = target_latency
+        self.min_size = min_size
+        self.max_size = max_size
+        self.size = max(min_size, min(max_size, initial_size))
+
+    def update(self, batch_size, duration):
+        """
+        Adapt the batch size to the time it took to process a batch.
+
+        Args:
+            batch_size (int): The number of items in the processed batch.
+            duration (float): The time in seconds processing the batch took.
+        """
+        if batch_size <= 0 or duration <= 0:
+            return
+        ideal_size = self.target_latency * batch_size / duration
+        self.size = max(self.min_size, min(self.max_size, int((self.size + ideal_size) / 2)))
+
 
 class Stage:
     """
@@ -19,6 +104,10 @@ class Stage:
         self._in_q = None
         self._out_q = None
         self.domain = get_domain()
+        # The maximum amount of items the queue feeding this stage holds, see `create_pipeline`.
+        self.queue_size = None
+        # An optional `AdaptiveBatchPolicy` superseding the `minsize` of `batches()`.
+        self.batch_policy = None
 
     def _connect(self, in_q, out_q):
         """
@@ -31,6 +120,15 @@ class Stage:
         self._in_q = in_q
         self._out_q = out_q
 
+    @property
+    def stats(self):
+        """The [pulpcore.plugin.stages.StageStats][] of this stage."""
+        try:
+            return self._stats
+        except AttributeError:
+            self._stats = StageStats()
+            return self._stats
+
     async def __call__(self):
         """
         This coroutine makes the stage callable.
@@ -38,9 +136,21 @@ class Stage:
         It calls :meth:`run` and signals the next stage that its work is finished.
         """
         log.debug(_("%(name)s - begin."), {"name": self})
+        start = time.monotonic()
         await self.run()
+        self.stats.total_time = time.monotonic() - start
         await self._out_q.put(None)
         log.debug(_("%(name)s - put end-marker."), {"name": self})
+        self._report_stats()
+
+    def _report_stats(self):
+        """Log the stats of the finished stage and hand them to the metrics and diagnostics."""
+        name = self.__class__.__name__
+        stats = self.stats.as_dict()
+        log.debug(_("%(name)s - stats: %(stats)s."), {"name": self, "stats": stats})
+        stage_metrics_recorder.record(name, stats)
+        if (reports := stage_stats_reports.get()) is not None:
+            reports.append({"stage": name, **stats})
 
     async def run(self):
         """
@@ -72,10 +182,15 @@ class Stage:
                             await self.put(d_content)
 
         """
+        stats = self.stats
         while True:
+            stats.max_queue_depth = max(stats.max_queue_depth, self._in_q.qsize())
+            start = time.monotonic()
             content = await self._in_q.get()
+            stats.get_wait += time.monotonic() - start
             if content is None:
                 break
+            stats.items_in += 1
             log.debug("%(name)s - next: %(content)s.", {"name": self, "content": content})
             yield content
 
@@ -87,6 +202,10 @@ class Stage:
         [DeclarativeContent][] as possible without blocking, but
         at least `minsize` instances.
 
+        If the stage has a `batch_policy`, its current size is used instead of `minsize`, no more
+        than its maximum size instances are batched, and the time until the next batch is
+        requested is reported back to it.
+
         Args:
             minsize (int): The minimum batch size to yield (unless it is the final batch)
 
@@ -119,17 +238,27 @@ class Stage:
                 shutdown = True
                 log.debug(_("%(name)s - shutdown."), {"name": self})
             else:
+                stats.items_in += 1
                 if not content.does_batch:
                     no_block = True
                 content._thaw_queue_event = thaw_queue_event
                 batch.append(content)
 
+        policy = getattr(self, "batch_policy", None)
+        maxsize = policy.max_size if policy else None
+        stats = self.stats
+
         get_listener = asyncio.ensure_future(self._in_q.get())
         thaw_event_listener = asyncio.ensure_future(thaw_queue_event.wait())
         while not shutdown:
+            if policy:
+                minsize = policy.size
+            stats.max_queue_depth = max(stats.max_queue_depth, self._in_q.qsize())
+            start = time.monotonic()
             done, pending = await asyncio.wait(
                 [thaw_event_listener, get_listener], return_when=asyncio.FIRST_COMPLETED
             )
+            stats.get_wait += time.monotonic() - start
             if thaw_event_listener in done:
                 thaw_event_listener = asyncio.ensure_future(thaw_queue_event.wait())
                 no_block = True
@@ -137,7 +266,7 @@ class Stage:
                 content = await get_listener
                 add_to_batch(content)
                 get_listener = asyncio.ensure_future(self._in_q.get())
-            while not shutdown:
+            while not shutdown and (maxsize is None or len(batch) < maxsize):
                 try:
                     content = self._in_q.get_nowait()
                 except asyncio.QueueEmpty:
@@ -152,7 +281,15 @@ class Stage:
                 for content in batch:
                     content._thaw_queue_event = None
                 thaw_queue_event.clear()
+                batch_size = len(batch)
+                stats.batches += 1
+                stats.max_batch_size = max(stats.max_batch_size, batch_size)
+                start, put_wait = time.monotonic(), stats.put_wait
                 yield batch
+                if policy:
+                    # Waiting on the next stage is not part of processing the batch.
+                    duration = time.monotonic() - start - (stats.put_wait - put_wait)
+                    policy.update(batch_size, duration)
                 batch = []
                 no_block = False
         thaw_event_listener.cancel()
@@ -170,7 +307,10 @@ class Stage:
         """
         if item is None:
             raise ValueError(_("(None) not permitted."))
+        start = time.monotonic()
         await self._out_q.put(item)
+        self.stats.put_wait += time.monotonic() - start
+        self.stats.items_out += 1
         log.debug("{name} - put: {content}".format(name=self, content=item))
 
     def __str__(self):
@@ -193,8 +333,8 @@ async def create_pipeline(stages, maxsize=1):
 
     Args:
         stages (list of coroutines): A list of Stages API compatible coroutines.
-        maxsize (int): The maximum amount of items a queue between two stages should hold. Optional
-            and defaults to 1.
+        maxsize (int): The maximum amount of items a queue between two stages should hold, unless
+            the receiving stage sets its own `queue_size`. Optional and defaults to 1.
 
     Returns:
         A single coroutine that can be used to run, wait, or cancel the entire pipeline with.
@@ -209,7 +349,7 @@ async def create_pipeline(stages, maxsize=1):
             raise ValueError(_("Each stage instance must be unique."))
         history.add(stage)
         if i < len(stages) - 1:
-            out_q = asyncio.Queue(maxsize=maxsize)
+            out_q = asyncio.Queue(maxsize=getattr(stages[i + 1], "queue_size", None) or maxsize)
         else:
             out_q = None
         stage._connect(in_q, out_q)
@@ -91,8 +91,8 @@ class QueryExistingArtifacts(Stage):
                                 break
 
             # For each type of digest, fetch all the existing Artifacts where digest "in"
-            # the list we built earlier. Walk over all the artifacts again compare the
-            # digest of the new artifact to those of the existing ones - if one matches,
+            # the list we built earlier and index them by that digest. Walk over all the
+            # artifacts again and look up the digest of the new artifact - if one matches,
             # swap it out with the existing one.
             for digest_type, digests in artifact_digests_by_type.items():
                 query_params = {
@@ -100,17 +100,17 @@ class QueryExistingArtifacts(Stage):
                     "pulp_domain": self.domain,
                 }
                 existing_artifacts_qs = Artifact.objects.filter(**query_params)
-                existing_artifacts = sync_to_async_iterable(existing_artifacts_qs)
                 await sync_to_async(existing_artifacts_qs.touch)()
+                existing_artifacts = {
+                    getattr(result, digest_type): result
+                    async for result in sync_to_async_iterable(existing_artifacts_qs)
+                }
                 for d_content in batch:
                     for d_artifact in d_content.d_artifacts:
                         artifact_digest = getattr(d_artifact.artifact, digest_type)
                         if artifact_digest:
-                            async for result in existing_artifacts:
-                                result_digest = getattr(result, digest_type)
-                                if result_digest == artifact_digest:
-                                    d_artifact.artifact = result
-                                    break
+                            if (result := existing_artifacts.get(artifact_digest)) is not None:
+                                d_artifact.artifact = result
             for d_content in batch:
                 await self.put(d_content)
 
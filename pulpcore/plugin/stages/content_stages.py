@@ -108,10 +108,10 @@ class ContentSaver(Stage):
                     # This prevents deadlocks when we're processing the same/similar content
                     # in concurrent workers.
                     batch.sort(key=lambda x: "".join(map(str, x.content.natural_key())))
+                    created = self._bulk_save_content(batch)
                     for d_content in batch:
                         # Are we saving to the database for the first time?
-                        content_already_saved = not d_content.content._state.adding
-                        if not content_already_saved:
+                        if d_content.content._state.adding:
                             try:
                                 with transaction.atomic():
                                     d_content.content.save()
@@ -123,19 +123,21 @@ class ContentSaver(Stage):
                                 except ObjectDoesNotExist:
                                     raise e
                             else:
-                                for d_artifact in d_content.d_artifacts:
-                                    if not d_artifact.artifact._state.adding:
-                                        artifact = d_artifact.artifact
-                                    else:
-                                        # set to None for on-demand synced artifacts
-                                        artifact = None
-                                    content_artifact = ContentArtifact(
-                                        content=d_content.content,
-                                        artifact=artifact,
-                                        relative_path=d_artifact.relative_path,
-                                    )
-                                    content_artifact_bulk.append(content_artifact)
-                                continue
+                                created.add(d_content)
+                        if d_content in created:
+                            for d_artifact in d_content.d_artifacts:
+                                if not d_artifact.artifact._state.adding:
+                                    artifact = d_artifact.artifact
+                                else:
+                                    # set to None for on-demand synced artifacts
+                                    artifact = None
+                                content_artifact = ContentArtifact(
+                                    content=d_content.content,
+                                    artifact=artifact,
+                                    relative_path=d_artifact.relative_path,
+                                )
+                                content_artifact_bulk.append(content_artifact)
+                            continue
                         # When the Content already exists, check if ContentArtifacts need to be
                         # updated
                         for d_artifact in d_content.d_artifacts:
@@ -199,6 +201,35 @@ class ContentSaver(Stage):
             for declarative_content in batch:
                 await self.put(declarative_content)
 
+    def _bulk_save_content(self, batch):
+        """
+        Save the unsaved content units of types allowing it in bulk, one query per content type.
+
+        Content units that already exist are replaced by the saved ones.
+
+        Args:
+            batch (list of [pulpcore.plugin.stages.DeclarativeContent][]): The batch of
+                [pulpcore.plugin.stages.DeclarativeContent][] objects to be saved.
+
+        Returns:
+            set: The [pulpcore.plugin.stages.DeclarativeContent][] objects whose content was
+                created.
+        """
+        d_contents_by_type = defaultdict(list)
+        for d_content in batch:
+            if d_content.content._state.adding and d_content.content.BULK_SAVE:
+                d_contents_by_type[type(d_content.content)].append(d_content)
+
+        created = set()
+        for content_type, d_contents in d_contents_by_type.items():
+            contents = content_type.objects.bulk_insert_or_get(dc.content for dc in d_contents)
+            for d_content, content in zip(d_contents, contents):
+                if content is d_content.content:
+                    created.add(d_content)
+                else:
+                    d_content.content = content
+        return created
+
     def _pre_save(self, batch):
         """
         A hook plugin-writers can override to save related objects prior to content unit saving.
@@ -2,7 +2,7 @@ import asyncio
 import tempfile
 
 from pulpcore.plugin.models import AlternateContentSource
-from pulpcore.plugin.stages.api import create_pipeline, EndStage
+from pulpcore.plugin.stages.api import AdaptiveBatchPolicy, create_pipeline, EndStage
 from pulpcore.plugin.stages.artifact_stages import (
     ACSArtifactHandler,
     ArtifactDownloader,
@@ -20,6 +20,10 @@ from pulpcore.plugin.util import get_domain_pk
 
 
 class DeclarativeVersion:
+    # The maximum amount of items queued for a database bound stage, letting the preceding stages
+    # go on while a batch is written.
+    DATABASE_STAGE_QUEUE_SIZE = 1000
+
     def __init__(self, first_stage, repository, mirror=False, acs=False):
         """
         A pipeline that creates a new [pulpcore.plugin.models.RepositoryVersion][] from a
@@ -131,22 +135,40 @@ class DeclarativeVersion:
         """
         pipeline = [
             self.first_stage,
-            QueryExistingArtifacts(),
+            self.database_stage(QueryExistingArtifacts()),
         ]
         if self.acs and AlternateContentSource.objects.filter(pulp_domain=get_domain_pk()).exists():
             pipeline.append(ACSArtifactHandler())
         pipeline.extend(
             [
                 ArtifactDownloader(),
-                ArtifactSaver(),
-                QueryExistingContents(),
-                ContentSaver(),
-                RemoteArtifactSaver(),
+                self.database_stage(ArtifactSaver()),
+                self.database_stage(QueryExistingContents()),
+                self.database_stage(ContentSaver()),
+                self.database_stage(RemoteArtifactSaver()),
                 ResolveContentFutures(),
             ]
         )
         return pipeline
 
+    def database_stage(self, stage):
+        """
+        Configure a stage writing batches to the database to track the speed of the database.
+
+        The stage gets an [pulpcore.plugin.stages.AdaptiveBatchPolicy][] and a deeper input
+        queue. Plugin-writers may override this method to tune both, or use it for their own
+        database bound stages in `pipeline_stages`.
+
+        Args:
+            stage (pulpcore.plugin.stages.Stage): A stage processing its input in `batches()`.
+
+        Returns:
+            The configured stage.
+        """
+        stage.batch_policy = AdaptiveBatchPolicy()
+        stage.queue_size = self.DATABASE_STAGE_QUEUE_SIZE
+        return stage
+
     def create(self):
         """
         Perform the work. This is the long-blocking call where all syncing occurs.
@@ -157,7 +179,7 @@ class DeclarativeVersion:
             with self.repository.new_version() as new_version:
                 loop = asyncio.get_event_loop()
                 stages = self.pipeline_stages(new_version)
-                stages.append(ContentAssociation(new_version, self.mirror))
+                stages.append(self.database_stage(ContentAssociation(new_version, self.mirror)))
                 stages.append(EndStage())
                 pipeline = create_pipeline(stages)
                 loop.run_until_complete(pipeline)
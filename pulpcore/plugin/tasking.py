@@ -1,5 +1,5 @@
 # Support plugins dispatching tasks
-from pulpcore.tasking.tasks import dispatch, adispatch
+from pulpcore.tasking.tasks import dispatch, adispatch, dispatch_many
 
 from pulpcore.app.tasks import (
     ageneral_update,
@@ -21,6 +21,7 @@ __all__ = [
     "check_content",
     "dispatch",
     "adispatch",
+    "dispatch_many",
     "fs_publication_export",
     "fs_repo_version_export",
     "general_create",
@@ -1,5 +1,6 @@
 import asyncio
 import importlib
+import json
 import logging
 import os
 import resource
@@ -86,16 +87,60 @@ def child_signal_handler(sig, frame):
 def perform_task(task_pk, task_working_dir_rel_path):
     """Setup the environment to handle a task and execute it.
     This must be called as a subprocess, while the parent holds the advisory lock of the task."""
+    _set_child_signal_handlers()
+    # All processes need to create their own postgres connection
+    connection.connection = None
+    # Isolate from the parent asyncio.
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    _perform_task(task_pk, task_working_dir_rel_path)
+
+
+def perform_tasks(conn, max_tasks, max_rss):
+    """Execute the tasks received over a pipe one after another.
+
+    This is the loop of a pooled task process, which receives `(task_pk, task_working_dir_rel_path)`
+    tuples from the worker holding the advisory locks of the tasks, and answers each executed task
+    with whether the process is about to be recycled. It exits after `max_tasks` tasks, once its
+    peak resident set size exceeds `max_rss` bytes, or when receiving None.
+    """
+    _set_child_signal_handlers()
+    # All processes need to create their own postgres connection
+    connection.connection = None
+    worker_dir = os.getcwd()
+    for performed in range(1, max_tasks + 1):
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            _perform_task(*message)
+        finally:
+            os.chdir(worker_dir)
+            loop.close()
+            connection.close_if_unusable_or_obsolete()
+        # The handlers are reset by the first signal received.
+        _set_child_signal_handlers()
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        recycle = performed == max_tasks or bool(max_rss and rss > max_rss)
+        conn.send(recycle)
+        if recycle:
+            break
+
+
+def _set_child_signal_handlers():
     signal.signal(signal.SIGINT, child_signal_handler)
     signal.signal(signal.SIGTERM, child_signal_handler)
     signal.signal(signal.SIGHUP, child_signal_handler)
     signal.signal(signal.SIGUSR1, child_signal_handler)
-    # All processes need to create their own postgres connection
-    connection.connection = None
+
+
+def _perform_task(task_pk, task_working_dir_rel_path):
     # enc_args and enc_kwargs are deferred by default but we actually want them
     task = Task.objects.defer(None).select_related("pulp_domain").get(pk=task_pk)
-    # Isolate from the parent asyncio.
-    asyncio.set_event_loop(asyncio.new_event_loop())
     # Set current contexts
     os.chdir(task_working_dir_rel_path)
 
@@ -121,6 +166,8 @@ def _execute_task_and_profile(task, profile_options):
             _execute_task = _pyinstrument_diagnostic_decorator(temp_dir, _execute_task)
         if "memray" in profile_options:
             _execute_task = _memray_diagnostic_decorator(temp_dir, _execute_task)
+        if "stages" in profile_options:
+            _execute_task = _stages_diagnostic_decorator(temp_dir, _execute_task)
 
         _execute_task(task)
 
@@ -218,6 +265,40 @@ def _memray_diagnostic_decorator(temp_dir, func):
     return __memray_diagnostic_decorator
 
 
+def _stages_diagnostic_decorator(temp_dir, func):
+    def __stages_diagnostic_decorator(task):
+        from pulpcore.plugin.stages.api import stage_stats_reports
+
+        reports = []
+        ctx_token = stage_stats_reports.set(reports)
+        try:
+            func(task)
+        finally:
+            stage_stats_reports.reset(ctx_token)
+
+        if reports:
+            profile_file_path = os.path.join(temp_dir, "stages_profile.json")
+            with open(profile_file_path, "w+") as f:
+                json.dump(reports, f, indent=2)
+                f.flush()
+
+            artifact = Artifact.init_and_validate(str(profile_file_path))
+            try:
+                # it is possible for the diagnostic artifact (stages report) to be identical to
+                # a previous report, in which case we need to handle the case where saving a new
+                # artifact fails.
+                artifact.save()
+            except IntegrityError:
+                artifact = Artifact.objects.get(sha256=artifact.sha256)
+
+            ProfileArtifact.objects.get_or_create(
+                artifact=artifact, name="stages_profile", task=task
+            )
+            _logger.info("Created stages profile data.")
+
+    return __stages_diagnostic_decorator
+
+
 def dispatch_scheduled_tasks():
     # Warning, dispatch_scheduled_tasks is not race condition free!
     now = timezone.now()
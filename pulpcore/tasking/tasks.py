@@ -12,7 +12,7 @@ from contextlib import contextmanager
 from asgiref.sync import sync_to_async, async_to_sync
 
 from django.conf import settings
-from django.db import connection
+from django.db import connection, transaction
 from django.db.models import Model
 from django_guid import get_guid
 from pulpcore.app.apps import MODULE_PLUGIN_VERSIONS
@@ -35,6 +35,8 @@ from pulpcore.tasking.kafka import send_task_notification
 
 _logger = logging.getLogger(__name__)
 
+_dispatch_batch = contextvars.ContextVar("_dispatch_batch", default=None)
+
 
 def _validate_and_get_resources(resources):
     resource_set = set()
@@ -262,6 +264,17 @@ def dispatch(
         ValueError: When `resources` is an unsupported type.
     """
 
+    if (batch := _dispatch_batch.get()) is not None:
+        if not immediate:
+            task = _init_deferred_task(
+                func, args, kwargs, task_group, exclusive_resources, shared_resources, versions
+            )
+            batch.append(task)
+            return task
+        # Keep the order of the tasks.
+        _create_tasks(batch)
+        batch.clear()
+
     execute_now = immediate and not called_from_content_app()
     assert deferred or immediate, "A task must be at least `deferred` or `immediate`."
     send_wakeup_signal = not execute_now
@@ -291,6 +304,101 @@ def dispatch(
     return task
 
 
+def dispatch_many(dispatches, task_group=None):
+    """
+    Enqueue several deferred tasks to Pulp workers at once.
+
+    The tasks are created in a single statement, in the given order, and the workers are woken up
+    once. This is meant for fanning out many tasks, where dispatching them one by one would cost
+    several round trips to the database and a wakeup of all workers per task.
+
+    Args:
+        dispatches (list): A dictionary of `dispatch` arguments for each task. The supported keys
+            are `func`, `args`, `kwargs`, `task_group`, `exclusive_resources`,
+            `shared_resources` and `versions`.
+        task_group (pulpcore.app.models.TaskGroup): A TaskGroup to add the created Tasks to, unless
+            specified per task.
+
+    Returns (list): The Pulp Tasks that were created.
+
+    Raises:
+        ValueError: When `resources` is an unsupported type.
+    """
+    tasks = [
+        _init_deferred_task(**{"task_group": task_group, **dispatch_kwargs})
+        for dispatch_kwargs in dispatches
+    ]
+    _create_tasks(tasks)
+    return tasks
+
+
+@contextmanager
+def batched_dispatch():
+    """
+    Create the deferred tasks dispatched within the context in bulk, see `dispatch_many`.
+
+    Until the context is left, `dispatch` returns these tasks unsaved. They are refreshed from the
+    database once created, so they can be used like tasks returned by `dispatch` outside of the
+    context afterwards. Dispatching an immediate task creates the tasks dispatched before it
+    first, to keep the order of the tasks. If the context is left with an exception, the collected
+    tasks are discarded.
+    """
+    batch = []
+    token = _dispatch_batch.set(batch)
+    try:
+        yield
+    finally:
+        _dispatch_batch.reset(token)
+    _create_tasks(batch)
+
+
+def _init_deferred_task(
+    func,
+    args=None,
+    kwargs=None,
+    task_group=None,
+    exclusive_resources=None,
+    shared_resources=None,
+    versions=None,
+):
+    function_name = get_function_name(func)
+    versions = get_version(versions, function_name)
+    _, resources = get_resources(exclusive_resources, shared_resources, False)
+    task_payload = get_task_payload(
+        function_name, task_group, args, kwargs, resources, versions, False, True, None
+    )
+    return Task(**task_payload)
+
+
+def _create_tasks(tasks):
+    """Create deferred tasks in bulk, refresh them from the database and wake up the workers."""
+    if not tasks:
+        return
+    resources = {
+        resource.removeprefix("shared:")
+        for task in tasks
+        for resource in task.reserved_resources_record
+    }
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # The insert trigger locks the resources of each task. Lock them all upfront in the
+            # same order, so concurrent dispatches cannot deadlock.
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(4711, q.id) FROM ("
+                "SELECT DISTINCT hashtext(res) AS id FROM unnest(%s::text[]) AS res ORDER BY id"
+                ") AS q",
+                [list(resources)],
+            )
+        Task.objects.bulk_create(tasks)
+        Task.bulk_add_perms(tasks)
+    # The database will have assigned the timestamps.
+    created_tasks = Task.objects.in_bulk([task.pk for task in tasks])
+    for task in tasks:
+        for field in Task._meta.concrete_fields:
+            setattr(task, field.attname, getattr(created_tasks[task.pk], field.attname))
+    wakeup_worker(TASK_WAKEUP_UNBLOCK)
+
+
 async def adispatch(
     func,
     args=None,
@@ -7,13 +7,13 @@ import random
 import select
 import signal
 from datetime import datetime, timedelta
-from multiprocessing import Process
+from multiprocessing import Pipe, Process
 from tempfile import TemporaryDirectory
 from packaging.version import parse as parse_version
 
 from django.conf import settings
 from django.db import connection, transaction, DatabaseError, IntegrityError
-from django.db.models import Case, Count, F, Max, Value, When
+from django.db.models import Case, Count, F, Max, Q, Value, When
 from django.utils import timezone
 
 from pulpcore.constants import (
@@ -36,6 +36,7 @@ from pulpcore.tasking._util import (
     delete_incomplete_resources,
     dispatch_scheduled_tasks,
     perform_task,
+    perform_tasks,
     startup_hook,
 )
 from pulpcore.tasking.tasks import using_workdir, execute_task
@@ -57,6 +58,11 @@ WORKER_CLEANUP_INTERVAL = 100
 IGNORED_TASKS_CLEANUP_INTERVAL = 100
 # Threshold time in seconds of an unblocked task before we consider a queue stalled
 THRESHOLD_UNBLOCKED_WAITING_TIME = 5
+# Seconds between unblocking passes over all incomplete tasks instead of the affected ones
+UNBLOCK_FULL_SCAN_INTERVAL = 300
+# Seconds by which changes are looked back beyond the last unblocking pass, covering clock skew
+# between hosts and transactions committed after that pass started
+UNBLOCK_CURSOR_MARGIN = 60
 
 
 def exclusive(lock):
@@ -83,6 +89,178 @@ def exclusive(lock):
     return _decorator
 
 
+def _split_resources(reserved_resources_record):
+    """
+    Split the reserved resources of a task.
+
+    Returns:
+        tuple: The list of exclusive resources and the list of shared resources not also reserved
+            exclusively.
+    """
+    reserved_resources_record = reserved_resources_record or []
+    exclusive_resources = [
+        resource for resource in reserved_resources_record if not resource.startswith("shared:")
+    ]
+    shared_resources = [
+        resource[7:]
+        for resource in reserved_resources_record
+        if resource.startswith("shared:") and resource[7:] not in exclusive_resources
+    ]
+    return exclusive_resources, shared_resources
+
+
+def _incomplete_tasks():
+    """The incomplete tasks, with only the fields needed to unblock them."""
+    return (
+        Task.objects.filter(state__in=TASK_INCOMPLETE_STATES)
+        .select_related("pulp_domain")
+        .only(
+            "pk",
+            "pulp_created",
+            "state",
+            "unblocked_at",
+            "reserved_resources_record",
+            "pulp_domain__name",
+        )
+    )
+
+
+def _affected_tasks(since):
+    """
+    Find the incomplete tasks whose blocking may have changed since `since`, in order of creation.
+
+    Those are the tasks dispatched since then, the canceling tasks yet to be unblocked, and
+    the tasks blocking or blocked by them or by the tasks finished since then. The set is
+    extended by the tasks blocking or blocked by the tasks found, until it is closed, so the tasks
+    can be unblocked as if all incomplete tasks were considered, while the other tasks are
+    unaffected by the changes.
+
+    Tasks only sharing a resource never block each other, so the set is only extended through
+    resources reserved exclusively by one of the tasks. In particular, the domain every task
+    shares only pulls in the tasks reserving it exclusively.
+
+    The resource lookups are served by the index on the resources of incomplete tasks.
+    """
+    tasks = {
+        task.pk: task
+        for task in _incomplete_tasks().filter(
+            Q(pulp_created__gte=since) | Q(state=TASK_STATES.CANCELING, unblocked_at=None)
+        )
+    }
+    exclusive_resources = set()
+    shared_resources = set()
+
+    def add_resources(reserved_resources_record):
+        exclusive, shared = _split_resources(reserved_resources_record)
+        exclusive_resources.update(exclusive)
+        shared_resources.update(shared)
+
+    for task in tasks.values():
+        add_resources(task.reserved_resources_record)
+    for reserved_resources_record in Task.objects.filter(finished_at__gte=since).values_list(
+        "reserved_resources_record", flat=True
+    ):
+        add_resources(reserved_resources_record)
+
+    queried_exclusive_resources = set()
+    queried_shared_resources = set()
+    while True:
+        # Exclusive resources are matched in both forms, shared ones in the exclusive form only.
+        new_exclusive_resources = exclusive_resources - queried_exclusive_resources
+        new_shared_resources = shared_resources - queried_shared_resources - exclusive_resources
+        if not new_exclusive_resources and not new_shared_resources:
+            break
+        queried_exclusive_resources.update(new_exclusive_resources)
+        queried_shared_resources.update(new_shared_resources)
+        records = [
+            *new_exclusive_resources,
+            *("shared:" + resource for resource in new_exclusive_resources),
+            *new_shared_resources,
+        ]
+        for task in (
+            _incomplete_tasks()
+            .filter(reserved_resources_record__overlap=records)
+            # Spelled like the condition of the partial index, for it to be used.
+            .exclude(
+                state__in=[
+                    TASK_STATES.COMPLETED,
+                    TASK_STATES.FAILED,
+                    TASK_STATES.CANCELED,
+                    TASK_STATES.SKIPPED,
+                ]
+            )
+            .exclude(pk__in=list(tasks))
+        ):
+            tasks[task.pk] = task
+            add_resources(task.reserved_resources_record)
+    return sorted(tasks.values(), key=lambda task: task.pulp_created)
+
+
+class TaskProcessPool:
+    """
+    A warm task process executing the tasks of a worker one after another.
+
+    The process is started on demand and replaced once it exits, which it does after the
+    configured number of tasks, above the configured peak memory usage, or when it was killed.
+    See `TASK_PROCESS_POOL` and `perform_tasks`.
+    """
+
+    def __init__(self, max_tasks, max_rss):
+        self.max_tasks = max_tasks
+        self.max_rss = max_rss
+        self.process = None
+        self.conn = None
+
+    def submit(self, task_pk, task_working_dir_rel_path):
+        """
+        Send a task to the process, starting a new one if needed.
+
+        Returns:
+            multiprocessing.Process: The process executing the task.
+        """
+        if self.process is None or not self.process.is_alive():
+            self._start()
+        self.conn.send((task_pk, task_working_dir_rel_path))
+        return self.process
+
+    def task_done(self):
+        """Whether the process reported the submitted task done, discarding it if it's recycled."""
+        if not self.conn.poll():
+            return False
+        try:
+            recycle = self.conn.recv()
+        except EOFError:
+            return False
+        if recycle:
+            self._discard()
+        return True
+
+    def close(self):
+        """Let the process exit."""
+        if self.process is not None and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self._discard()
+
+    def _start(self):
+        self._discard()
+        self.conn, child_conn = Pipe()
+        self.process = Process(
+            target=perform_tasks, args=(child_conn, self.max_tasks, self.max_rss)
+        )
+        self.process.start()
+        child_conn.close()
+
+    def _discard(self):
+        if self.process is not None:
+            self.process.join()
+            self.conn.close()
+        self.process = None
+        self.conn = None
+
+
 class PulpcoreWorker:
     def __init__(self, auxiliary=False):
         # Notification states from several signal handlers
@@ -94,8 +272,19 @@ class PulpcoreWorker:
         self.ignored_task_ids = []
         self.ignored_task_countdown = IGNORED_TASKS_CLEANUP_INTERVAL
 
+        # Start of the last unblocking passes performed by this worker
+        self.last_unblock = None
+        self.last_full_unblock = None
+
         self.auxiliary = auxiliary
         self.task = None
+        pool_settings = settings.TASK_PROCESS_POOL
+        if pool_settings["ENABLED"]:
+            self.task_process_pool = TaskProcessPool(
+                pool_settings["MAX_TASKS"], pool_settings["MAX_RSS"]
+            )
+        else:
+            self.task_process_pool = None
         self.name = get_worker_name()
         self.heartbeat_period = timedelta(seconds=settings.WORKER_TTL / 3)
         self.last_metric_heartbeat = timezone.now()
@@ -178,6 +367,8 @@ class PulpcoreWorker:
                 self.cancel_task = True
 
     def shutdown(self):
+        if self.task_process_pool is not None:
+            self.task_process_pool.close()
         self.app_status.delete()
         _logger.info(_("Worker %s was shut down."), self.name)
 
@@ -360,27 +551,29 @@ class PulpcoreWorker:
 
     @exclusive(TASK_UNBLOCKING_LOCK)
     def _unblock_tasks(self):
-        """Iterate over waiting tasks and mark them unblocked accordingly."""
+        """
+        Iterate over waiting tasks and mark them unblocked accordingly.
+
+        Only the tasks sharing resources with the tasks dispatched or finished since the last pass
+        of this worker are considered, see `_affected_tasks`. All incomplete tasks are considered
+        on the first pass and every `UNBLOCK_FULL_SCAN_INTERVAL` seconds.
+        """
+
+        now = timezone.now()
+        if self.last_full_unblock is None or (now - self.last_full_unblock).total_seconds() > (
+            UNBLOCK_FULL_SCAN_INTERVAL
+        ):
+            # When batching this query, be sure to use "pulp_created" as a cursor
+            tasks = _incomplete_tasks().order_by("pulp_created")
+            self.last_full_unblock = now
+        else:
+            tasks = _affected_tasks(self.last_unblock - timedelta(seconds=UNBLOCK_CURSOR_MARGIN))
+        self.last_unblock = now
 
         taken_exclusive_resources = set()
         taken_shared_resources = set()
-        # When batching this query, be sure to use "pulp_created" as a cursor
-        for task in (
-            Task.objects.filter(state__in=TASK_INCOMPLETE_STATES)
-            .order_by("pulp_created")
-            .select_related("pulp_domain")
-        ):
-            reserved_resources_record = task.reserved_resources_record or []
-            exclusive_resources = [
-                resource
-                for resource in reserved_resources_record
-                if not resource.startswith("shared:")
-            ]
-            shared_resources = [
-                resource[7:]
-                for resource in reserved_resources_record
-                if resource.startswith("shared:") and resource[7:] not in exclusive_resources
-            ]
+        for task in tasks:
+            exclusive_resources, shared_resources = _split_resources(task.reserved_resources_record)
             if task.state == TASK_STATES.CANCELING:
                 if task.unblocked_at is None:
                     _logger.debug(
@@ -465,9 +658,17 @@ class PulpcoreWorker:
         cancel_state = None
         cancel_reason = None
         domain = task.pulp_domain
+        # Profiled tasks get a process of their own, for the diagnostics to cover only them.
+        pool = None if task.profile_options else self.task_process_pool
+        task_done = False
         with TemporaryDirectory(dir=".") as task_working_dir_rel_path:
-            task_process = Process(target=perform_task, args=(task.pk, task_working_dir_rel_path))
-            task_process.start()
+            if pool is not None:
+                task_process = pool.submit(task.pk, task_working_dir_rel_path)
+            else:
+                task_process = Process(
+                    target=perform_task, args=(task.pk, task_working_dir_rel_path)
+                )
+                task_process.start()
             while True:
                 if cancel_state:
                     if self.task_grace_timeout is None or self.task_grace_timeout > timezone.now():
@@ -484,7 +685,8 @@ class PulpcoreWorker:
                         os.kill(task_process.pid, signal.SIGUSR1)
 
                 r, w, x = select.select(
-                    [self.sentinel, connection.connection, task_process.sentinel],
+                    [self.sentinel, connection.connection, task_process.sentinel]
+                    + ([pool.conn] if pool is not None else []),
                     [],
                     [],
                     0 if self.wakeup_unblock or self.cancel_task else self.heartbeat_period.seconds,
@@ -502,6 +704,10 @@ class PulpcoreWorker:
                     self.cancel_task = False
                 if self.wakeup_unblock:
                     self.unblock_tasks()
+                if pool is not None and (pool.conn in r or task_process.sentinel in r):
+                    if pool.task_done():
+                        task_done = True
+                        break
                 if task_process.sentinel in r:
                     if not task_process.is_alive():
                         break
@@ -524,8 +730,14 @@ class PulpcoreWorker:
                         cancel_state = TASK_STATES.FAILED
                         cancel_reason = "Aborted during worker shutdown."
 
-            task_process.join()
-            if not cancel_state and task_process.exitcode != 0:
+            if not task_done:
+                task_process.join()
+            # A pooled process only exits during a task if it's aborted.
+            if (
+                not cancel_state
+                and not task_done
+                and (task_process.exitcode != 0 or pool is not None)
+            ):
                 _logger.warning(
                     "Task process for %s exited with non zero exitcode %i.",
                     task.pk,
@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from unittest.mock import Mock
+
+from pulpcore.content.distribution_index import DistributionIndex
+from pulpcore.content.handler import Handler
+
+
+@pytest.fixture
+def index():
+    index = DistributionIndex()
+    index.active = True
+    return index
+
+
+def _distro(base_path):
+    return Mock(base_path=base_path)
+
+
+def test_get_matches_parent_base_path(index):
+    domain_pk = uuid.uuid4()
+    distro = _distro("foo/bar")
+    index.add("model", domain_pk, distro, index.generation)
+
+    assert index.get("model", domain_pk, Handler._base_paths("foo/bar/baz/file.rpm")) is distro
+    assert index.get("model", domain_pk, Handler._base_paths("foo/bar/")) is distro
+    assert index.get("model", domain_pk, Handler._base_paths("foo/other/file.rpm")) is None
+    assert index.get("model", uuid.uuid4(), Handler._base_paths("foo/bar/file.rpm")) is None
+    assert index.get("other", domain_pk, Handler._base_paths("foo/bar/file.rpm")) is None
+
+
+def test_inactive_index_is_bypassed(index):
+    domain_pk = uuid.uuid4()
+    index.add("model", domain_pk, _distro("foo"), index.generation)
+    index.active = False
+
+    assert index.get("model", domain_pk, ["foo"]) is None
+    index.add("model", domain_pk, _distro("bar"), index.generation)
+    index.active = True
+    assert index.get("model", domain_pk, ["bar"]) is None
+
+
+def test_invalidate_domain(index):
+    domain_pk, other_domain_pk = uuid.uuid4(), uuid.uuid4()
+    index.add("model", domain_pk, _distro("foo"), index.generation)
+    index.add("model", other_domain_pk, _distro("foo"), index.generation)
+
+    index.invalidate(str(domain_pk))
+
+    assert index.get("model", domain_pk, ["foo"]) is None
+    assert index.get("model", other_domain_pk, ["foo"]) is not None
+
+    index.invalidate()
+    assert index.get("model", other_domain_pk, ["foo"]) is None
+
+
+def test_add_discarded_after_concurrent_invalidation(index):
+    domain_pk = uuid.uuid4()
+    generation = index.generation
+    index.invalidate(domain_pk)
+    index.add("model", domain_pk, _distro("foo"), generation)
+
+    assert index.get("model", domain_pk, ["foo"]) is None
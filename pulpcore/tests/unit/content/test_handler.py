@@ -1,8 +1,10 @@
+import asyncio
 from datetime import timedelta
 import pytest
 import uuid
 import pytest_asyncio
 
+from multidict import CIMultiDict
 from unittest.mock import Mock, AsyncMock
 
 from pulpcore.constants import TASK_STATES
@@ -22,6 +24,10 @@ from pulpcore.plugin.models import (
     Publication,
 )
 from pulpcore.app.models import AppStatus
+import pulpcore.cache.cache
+from pulpcore.cache import AsyncContentCache
+from pulpcore.cache.cache import LocalCache
+from pulpcore.download import BaseDownloader, DownloadResult, HttpDownloader
 
 
 @pytest.fixture
@@ -595,3 +601,149 @@ async def test_async_pull_through_add(ca1, monkeypatch, app_status):
         await repo.adelete()
         if task:
             await task.adelete()
+
+
+class BlockingDownloader(BaseDownloader):
+    """A downloader serving fixed data once it is released."""
+
+    def __init__(self, url, release, headers_ready_callback=None, **kwargs):
+        self.release = release
+        self.headers_ready_callback = headers_ready_callback
+        super().__init__(url, **kwargs)
+
+    async def _run(self, extra_data=None):
+        await self.headers_ready_callback(CIMultiDict({"Content-Length": "6"}))
+        await self.release.wait()
+        await self.handle_data(b"abc")
+        await self.handle_data(b"def")
+        await self.finalize()
+        return DownloadResult(
+            path=self.path, artifact_attributes=self.artifact_attributes, url=self.url, headers={}
+        )
+
+
+def _stream_response_mock():
+    response = Mock(status=200, prepared=False, headers={}, written=b"")
+
+    async def prepare(request):
+        response.prepared = True
+
+    async def write(data):
+        response.written += data
+
+    response.prepare = AsyncMock(side_effect=prepare)
+    response.write = AsyncMock(side_effect=write)
+    response.write_eof = AsyncMock()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_download(tmp_path, monkeypatch, settings):
+    """Concurrent requests for the same RemoteArtifact are served from a single download."""
+    settings.WORKING_DIRECTORY = tmp_path
+    monkeypatch.chdir(tmp_path)
+    release = asyncio.Event()
+    remote = Mock(pk=uuid.uuid4(), policy=Remote.ON_DEMAND)
+    remote.get_downloader = Mock(
+        side_effect=lambda remote_artifact, **kwargs: BlockingDownloader(
+            remote_artifact.url, release, **kwargs
+        )
+    )
+    remote_artifact = Mock(
+        url="https://example.com/c123",
+        size=None,
+        content_artifact=ContentArtifact(relative_path="c123"),
+        remote=Mock(acast=AsyncMock(return_value=remote)),
+    )
+    request = Mock(method="GET", http_range=slice(None, None), match_info={"path": "c123"})
+    responses = [_stream_response_mock() for _ in range(3)]
+    handler = Handler()
+
+    streams = [
+        asyncio.create_task(
+            handler._stream_remote_artifact(request, response, remote_artifact, save_artifact=False)
+        )
+        for response in responses
+    ]
+    await asyncio.sleep(0.1)
+    release.set()
+    await asyncio.gather(*streams)
+
+    remote.get_downloader.assert_called_once()
+    assert Handler._shared_downloads == {}
+    for response in responses:
+        assert response.written == b"abcdef"
+        assert response.headers["X-PULP-ARTIFACT-SIZE"] == "6"
+
+
+class RangeDownloader(HttpDownloader):
+    """A downloader answering ranged requests like a remote supporting them."""
+
+    async def _run(self, extra_data=None):
+        assert self.headers == {"Range": "bytes=2-3"}
+        await self.headers_ready_callback(
+            CIMultiDict({"Content-Length": "2", "Content-Range": "bytes 2-3/6"})
+        )
+        await self.handle_data(b"cd")
+        await self.finalize()
+        return DownloadResult(path=None, artifact_attributes={}, url=self.url, headers={})
+
+
+@pytest.mark.asyncio
+async def test_range_request_forwarded_to_remote(settings, monkeypatch):
+    """Ranged requests are forwarded and popular artifacts are completed in the background."""
+    settings.REMOTE_CONTENT_RANGE_REQUESTS = True
+    settings.REMOTE_CONTENT_RANGE_COMPLETION_THRESHOLD = 2
+    monkeypatch.setattr(Handler, "_range_request_counts", Handler._range_request_counts.copy())
+    remote = Mock(pk=uuid.uuid4(), policy=Remote.ON_DEMAND)
+    remote.get_downloader = Mock(
+        side_effect=lambda url, **kwargs: RangeDownloader(url, session=Mock(), **kwargs)
+    )
+    remote_artifact = Mock(
+        url="https://example.com/c123",
+        size=6,
+        content_artifact=ContentArtifact(relative_path="c123"),
+        remote=Mock(acast=AsyncMock(return_value=remote)),
+    )
+    request = Mock(
+        method="GET",
+        http_range=slice(2, 4),
+        headers={"Range": "bytes=2-3"},
+        match_info={"path": "c123"},
+    )
+    handler = Handler()
+    handler._join_shared_download = Mock()
+
+    for i in range(2):
+        response = _stream_response_mock()
+        await handler._stream_remote_artifact(request, response, remote_artifact)
+
+        assert response.written == b"cd"
+        assert response.headers["Content-Range"] == "bytes 2-3/6"
+        assert response.headers["Content-Length"] == "2"
+
+    handler._join_shared_download.assert_called_once_with(remote, remote_artifact, True, request)
+
+
+@pytest.mark.asyncio
+async def test_find_base_path_cached_prefers_local_cache(monkeypatch):
+    """Tests that the cached entry is only fetched from Redis if not held locally"""
+    local = LocalCache(max_entries=10, expires_ttl=60)
+    local.active = True
+    monkeypatch.setattr(pulpcore.cache.cache, "local_cache", local)
+    cached = AsyncContentCache()
+    cached.find_base_key = AsyncMock(return_value=0)
+    request = Mock(match_info={"path": "base/file"}, path="/pulp/content/base/file", method="GET")
+    key = cached.make_key(request)
+    local.set(key, {"type": "Redirect"}, "base", local.generation)
+
+    assert await Handler.find_base_path_cached(request, cached) == "base"
+    cached.find_base_key.assert_awaited_once_with(["base"], fields=[Handler.CACHE_GUARD_KEY])
+
+    local.set(Handler.CACHE_GUARD_KEY, b"False", "base", local.generation)
+    assert await Handler.find_base_path_cached(request, cached) == "base"
+    cached.find_base_key.assert_awaited_once()
+
+    local.invalidate()
+    assert await Handler.find_base_path_cached(request, cached) == "base"
+    cached.find_base_key.assert_awaited_with(["base"], fields=[Handler.CACHE_GUARD_KEY, key])
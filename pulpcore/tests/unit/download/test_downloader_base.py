@@ -1,4 +1,7 @@
+import hashlib
+
 import pytest
+from django.conf import settings
 
 from pulpcore.app.models import Artifact
 from pulpcore.download import BaseDownloader
@@ -45,3 +48,41 @@ def test_expected_digests():
         semaphore=None,
     )
     assert downloader.expected_digests == digests
+
+
+@pytest.mark.asyncio
+async def test_handle_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "WORKING_DIRECTORY", tmp_path)
+    downloader = BaseDownloader(
+        "http://example.com/file",
+        expected_digests={"sha256": hashlib.sha256(b"abc" * 1000000).hexdigest()},
+        expected_size=3000000,
+    )
+    for _ in range(3):
+        await downloader.handle_data(b"abc" * 333333)
+    await downloader.handle_data(b"abc")
+    await downloader.finalize()
+
+    assert downloader.artifact_attributes == {
+        "size": 3000000,
+        "sha256": hashlib.sha256(b"abc" * 1000000).hexdigest(),
+        "sha512": hashlib.sha512(b"abc" * 1000000).hexdigest(),
+    }
+    with open(downloader.path, "rb") as f:
+        assert f.read() == b"abc" * 1000000
+
+
+def test_record_size_and_digests_for_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "WORKING_DIRECTORY", tmp_path)
+    downloader = BaseDownloader("http://example.com/file")
+    downloader._ensure_writer_has_open_file()
+    downloader._record_size_and_digests_for_data(b"abc")
+    downloader._record_size_and_digests_for_data(b"def")
+
+    assert downloader.artifact_attributes == {
+        "size": 6,
+        "sha256": hashlib.sha256(b"abcdef").hexdigest(),
+        "sha512": hashlib.sha512(b"abcdef").hexdigest(),
+    }
@@ -1,6 +1,8 @@
+import asyncio
 import pytest
+from unittest.mock import AsyncMock, Mock
 
-from pulpcore.download.factory import DownloaderFactory
+from pulpcore.download.factory import DownloaderFactory, SessionPool
 from pulpcore.plugin.models import Remote
 
 
@@ -29,3 +31,80 @@ async def test_custom_headers():
     factory = DownloaderFactory(remote)
     downloader = factory.build(remote.url)
     assert downloader.session.headers["Connection"] == "keep-alive"
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("fake_domain")
+async def test_session_shared_by_equal_remotes():
+    remote = Remote(url="http://example.org/", name="foo")
+    same_remote = Remote(url="http://example.org/other/", name="bar")
+    other_remote = Remote(url="http://example.org/", name="foo", tls_validation=False)
+
+    other_user_remote = Remote(url="http://example.org/", name="foo", username="u", password="p")
+
+    factory = DownloaderFactory(remote)
+    assert DownloaderFactory(same_remote)._session is factory._session
+    assert DownloaderFactory(other_remote)._session is not factory._session
+    assert DownloaderFactory(other_user_remote)._session is not factory._session
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("fake_domain")
+async def test_session_of_custom_factory_not_shared_by_remotes():
+    class CustomSessionFactory(DownloaderFactory):
+        def _make_aiohttp_session_from_remote(self):
+            session = super()._make_aiohttp_session_from_remote()
+            session.headers["Authorization"] = f"Bearer {self._remote.name}"
+            return session
+
+    remote = Remote(url="http://example.org/", name="foo")
+    other_remote = Remote(url="http://example.org/", name="bar")
+
+    factory = CustomSessionFactory(remote)
+    assert CustomSessionFactory(remote)._session is factory._session
+    assert CustomSessionFactory(other_remote)._session is not factory._session
+
+
+def test_session_pool_evicts_idle_sessions(settings):
+    settings.DOWNLOADER_SESSION_SETTINGS = {**settings.DOWNLOADER_SESSION_SETTINGS, "POOL_SIZE": 1}
+    loop = asyncio.new_event_loop()
+    pool = SessionPool()
+    sessions = {}
+
+    def make_session(name):
+        session = Mock(closed=False, close=AsyncMock())
+        sessions[name] = session
+        return lambda: session
+
+    try:
+        assert pool.acquire((loop, "a"), make_session("a")) is sessions["a"]
+        pool.acquire((loop, "b"), make_session("b"))
+        # Both are in use
+        assert not sessions["a"].close.called
+        pool.release((loop, "a"))
+        assert sessions["a"].close.called
+        assert pool.acquire((loop, "b"), make_session("c")) is sessions["b"]
+    finally:
+        pool.close()
+        loop.close()
+    assert sessions["b"].close.called
+
+
+def test_session_pool_release_during_acquire():
+    """Finalizers releasing sessions while the pool is busy don't deadlock."""
+    loop = asyncio.new_event_loop()
+    pool = SessionPool()
+    session_a = Mock(closed=False, close=AsyncMock())
+    session_b = Mock(closed=False, close=AsyncMock())
+
+    def make_session_b():
+        pool.release((loop, "a"))
+        return session_b
+
+    try:
+        pool.acquire((loop, "a"), lambda: session_a)
+        assert pool.acquire((loop, "b"), make_session_b) is session_b
+        assert pool._sessions[(loop, "a")][1] == 0
+    finally:
+        pool.close()
+        loop.close()
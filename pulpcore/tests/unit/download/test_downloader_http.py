@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from django.conf import settings
+
+from pulpcore.app.models import Artifact
+from pulpcore.download import HttpDownloader
+
+DATA = b"0123456789" * 100000
+
+
+@pytest.fixture(autouse=True)
+def _working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "WORKING_DIRECTORY", tmp_path)
+    monkeypatch.setattr(Artifact, "DIGEST_FIELDS", {"sha256"})
+
+
+async def _download(handler, **kwargs):
+    app = web.Application()
+    app.router.add_get("/file", handler)
+    async with TestServer(app) as server:
+        downloader = HttpDownloader(
+            str(server.make_url("/file")),
+            expected_digests={"sha256": hashlib.sha256(DATA).hexdigest()},
+            expected_size=len(DATA),
+            max_retries=2,
+            **kwargs,
+        )
+        return await downloader.run()
+
+
+def _parse_range(range_header):
+    return int(range_header.removeprefix("bytes=").rstrip("-"))
+
+
+def _range_start(request):
+    if range_header := request.headers.get("Range"):
+        return _parse_range(range_header)
+    return 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("file_changed", [False, True])
+async def test_retry_resumes_download(file_changed):
+    requests = []
+    ready_headers = []
+    etag = '"v1"'
+
+    async def headers_ready_callback(headers):
+        ready_headers.append(headers)
+
+    async def handler(request):
+        requests.append(dict(request.headers))
+        # A changed file no longer matches the If-Range validator and is sent in full.
+        start = 0 if file_changed else _range_start(request)
+        response = web.StreamResponse(
+            status=206 if start else 200,
+            headers={
+                "Accept-Ranges": "bytes",
+                "ETag": etag,
+                "Content-Length": str(len(DATA) - start),
+            },
+        )
+        if start:
+            response.headers["Content-Range"] = f"bytes {start}-{len(DATA) - 1}/{len(DATA)}"
+        await response.prepare(request)
+        if len(requests) == 1:
+            # Cut the connection halfway through the first transfer.
+            await response.write(DATA[: len(DATA) // 2])
+            request.transport.close()
+            return response
+        await response.write(DATA[start:])
+        await response.write_eof()
+        return response
+
+    result = await _download(handler, headers_ready_callback=headers_ready_callback)
+
+    assert len(requests) == 2
+    # The headers of the resumed response are not reported again.
+    assert len(ready_headers) == (2 if file_changed else 1)
+    assert all(headers["Content-Length"] == str(len(DATA)) for headers in ready_headers)
+    # Only the data received before the connection was cut is skipped.
+    assert 0 < _parse_range(requests[1]["Range"]) <= len(DATA) // 2
+    assert requests[1]["If-Range"] == etag
+    with open(result.path, "rb") as f:
+        assert f.read() == DATA
+    assert result.artifact_attributes["size"] == len(DATA)
+
+
+@pytest.mark.asyncio
+async def test_retry_without_validator_restarts():
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.headers))
+        response = web.StreamResponse(headers={"Content-Length": str(len(DATA))})
+        await response.prepare(request)
+        if len(requests) == 1:
+            await response.write(DATA[: len(DATA) // 2])
+            request.transport.close()
+            return response
+        await response.write(DATA)
+        await response.write_eof()
+        return response
+
+    result = await _download(handler)
+
+    assert len(requests) == 2
+    assert "Range" not in requests[1]
+    with open(result.path, "rb") as f:
+        assert f.read() == DATA
+
+
+@pytest.mark.asyncio
+async def test_segmented_download():
+    ranges = []
+    ready_headers = []
+
+    async def headers_ready_callback(headers):
+        ready_headers.append(headers)
+
+    async def handler(request):
+        start, end = map(int, request.headers["Range"].removeprefix("bytes=").split("-"))
+        ranges.append((start, end))
+        headers = {"Content-Range": f"bytes {start}-{end}/{len(DATA)}"}
+        return web.Response(status=206, body=DATA[start : end + 1], headers=headers)
+
+    semaphore = asyncio.Semaphore(3)
+    result = await _download(
+        handler,
+        segments=4,
+        segment_min_size=1,
+        semaphore=semaphore,
+        headers_ready_callback=headers_ready_callback,
+    )
+
+    # Only the idle download slots were used.
+    assert sorted(ranges) == [(0, 333333), (333334, 666667), (666668, 999999)]
+    with open(result.path, "rb") as f:
+        assert f.read() == DATA
+    assert result.artifact_attributes["sha256"] == hashlib.sha256(DATA).hexdigest()
+    assert result.artifact_attributes["size"] == len(DATA)
+    assert not semaphore.locked()
+    # The headers describe the whole file
+    assert len(ready_headers) == 1
+    assert ready_headers[0]["Content-Length"] == str(len(DATA))
+    assert "Content-Range" not in ready_headers[0]
+
+
+@pytest.mark.asyncio
+async def test_segmented_download_without_range_support():
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.headers))
+        return web.Response(body=DATA)
+
+    result = await _download(
+        handler, segments=4, segment_min_size=1, semaphore=asyncio.Semaphore(4)
+    )
+
+    assert len(requests) == 1
+    with open(result.path, "rb") as f:
+        assert f.read() == DATA
+
+
+@pytest.mark.asyncio
+async def test_streamed_download_not_segmented():
+    """Downloads handling their data themselves receive it all through `handle_data`."""
+    requests = []
+    chunks = []
+
+    async def handler(request):
+        requests.append(dict(request.headers))
+        return web.Response(body=DATA)
+
+    async def handle_data(data):
+        chunks.append(data)
+        await original_handle_data(data)
+
+    app = web.Application()
+    app.router.add_get("/file", handler)
+    async with TestServer(app) as server:
+        downloader = HttpDownloader(
+            str(server.make_url("/file")),
+            expected_size=len(DATA),
+            segments=4,
+            segment_min_size=1,
+            semaphore=asyncio.Semaphore(4),
+        )
+        original_handle_data = downloader.handle_data
+        downloader.handle_data = handle_data
+        await downloader.run()
+
+    assert len(requests) == 1
+    assert "Range" not in requests[0]
+    assert b"".join(chunks) == DATA
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("file_matches", [True, False])
+async def test_retry_after_interrupted_handle_data(file_matches):
+    """Downloads are resumed from the data written and hashed before an interruption only."""
+    requests = []
+    handled = []
+    interrupted = []
+
+    async def handler(request):
+        requests.append(dict(request.headers))
+        start = _range_start(request)
+        response = web.StreamResponse(
+            status=206 if start else 200,
+            headers={"Accept-Ranges": "bytes", "ETag": '"v1"'},
+        )
+        if start:
+            response.headers["Content-Range"] = f"bytes {start}-{len(DATA) - 1}/{len(DATA)}"
+        await response.prepare(request)
+        if start:
+            await response.write(DATA[start:])
+        else:
+            # Send the data in two parts, for the second one to be interrupted.
+            await response.write(DATA[: len(DATA) // 2])
+            await asyncio.sleep(0.1)
+            await response.write(DATA[len(DATA) // 2 :])
+        await response.write_eof()
+        return response
+
+    async def handle_data(data):
+        if handled and len(requests) == 1:
+            # Time out while the data is written and hashed.
+            interrupted.append(sum(map(len, handled)) + len(data))
+            task = asyncio.ensure_future(original_handle_data(data))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            if not file_matches:
+                await asyncio.shield(downloader._interrupted_data[0])
+                downloader._writer.write(b"unexpected")
+            raise asyncio.TimeoutError()
+        handled.append(data)
+        await original_handle_data(data)
+
+    app = web.Application()
+    app.router.add_get("/file", handler)
+    async with TestServer(app) as server:
+        downloader = HttpDownloader(
+            str(server.make_url("/file")),
+            expected_digests={"sha256": hashlib.sha256(DATA).hexdigest()},
+            expected_size=len(DATA),
+            max_retries=2,
+        )
+        original_handle_data = downloader.handle_data
+        downloader.handle_data = handle_data
+        result = await downloader.run()
+
+    assert len(requests) == 2
+    assert interrupted
+    if file_matches:
+        # The interrupted data was written and hashed in full.
+        assert _parse_range(requests[1]["Range"]) == interrupted[0]
+    else:
+        assert "Range" not in requests[1]
+    with open(result.path, "rb") as f:
+        assert f.read() == DATA
+    assert result.artifact_attributes["size"] == len(DATA)
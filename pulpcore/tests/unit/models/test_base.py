@@ -54,6 +54,24 @@ def test_cast(django_assert_num_queries):
         assert repository.remote.pk == remote.pk
 
 
+@pytest.mark.django_db
+def test_queryset_cast(django_assert_num_queries):
+    remote = FileRemote.objects.create(name=str(uuid4()))
+    names = [str(uuid4()) for _ in range(3)]
+    for name in names:
+        FileRepository.objects.create(name=name, remote=remote)
+    queryset = Repository.objects.filter(name__in=names).select_related("remote").order_by("-name")
+
+    # One query for the master objects and one for the detail objects.
+    with django_assert_num_queries(2):
+        repositories = queryset.cast()
+    assert [repository.name for repository in repositories] == sorted(names, reverse=True)
+    assert all(isinstance(repository, FileRepository) for repository in repositories)
+    with django_assert_num_queries(0):
+        # Remote is still prefetched.
+        assert all(repository.remote.pk == remote.pk for repository in repositories)
+
+
 def test_get_model_for_pulp_type():
     assert Repository.get_model_for_pulp_type("core.repository") is Repository
     assert Repository.get_model_for_pulp_type("file.file") is FileRepository
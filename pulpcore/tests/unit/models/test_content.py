@@ -181,3 +181,54 @@ def test_remoteartifact_with_forbidden_checksums(remote_artifact_setup):
             remote=remote_artifact_setup.remote,
         )
         ra.validate_checksums()
+
+
+@pytest.mark.django_db
+def test_bulk_insert_or_get_content(monkeypatch):
+    from pulp_file.app.models import FileContent
+
+    existing = FileContent.objects.create(relative_path="existing", digest="1" * 64)
+    other = FileContent.objects.create(relative_path="other", digest="2" * 64)
+    units = [
+        FileContent(relative_path="new", digest="0" * 64),
+        FileContent(relative_path="existing", digest="1" * 64),
+        FileContent(relative_path="other", digest="2" * 64),
+    ]
+
+    def get(*args, **kwargs):
+        raise AssertionError("Conflicting units are fetched one by one.")
+
+    monkeypatch.setattr(type(FileContent.objects), "get", get)
+    saved = FileContent.objects.bulk_insert_or_get(units)
+    monkeypatch.undo()
+
+    assert saved[0] is units[0]
+    assert not saved[0]._state.adding
+    assert FileContent.objects.get(pk=saved[0].pk).relative_path == "new"
+    assert saved[1].pk == existing.pk
+    assert saved[2].pk == other.pk
+    assert not Content.objects.filter(pk__in=[units[1].pk, units[2].pk]).exists()
+
+    with pytest.raises(TypeError):
+        Content.objects.bulk_insert_or_get([Content()])
+
+
+@pytest.mark.django_db
+def test_bulk_get_or_create_content_artifacts(django_assert_max_num_queries):
+    contents = [Content.objects.create() for _ in range(3)]
+    existing = ContentArtifact.objects.create(content=contents[1], relative_path="b")
+    content_artifacts = [
+        ContentArtifact(content=contents[0], relative_path="a"),
+        ContentArtifact(content=contents[1], relative_path="b"),
+        ContentArtifact(content=contents[2], relative_path="c"),
+    ]
+
+    # One insert and one fetch of the conflicting rows, besides the savepoint.
+    with django_assert_max_num_queries(4):
+        saved = ContentArtifact.objects.bulk_get_or_create(content_artifacts)
+
+    assert saved[0] is content_artifacts[0]
+    assert saved[2] is content_artifacts[2]
+    assert not saved[0]._state.adding
+    assert saved[1].pk == existing.pk
+    assert ContentArtifact.objects.filter(content__in=contents).count() == 3
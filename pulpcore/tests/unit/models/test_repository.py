@@ -3,6 +3,7 @@ from uuid import uuid4
 
 from itertools import compress
 
+from pulpcore.app.models import repository as repository_module
 from pulpcore.plugin.models import Artifact, Content, ContentArtifact, Repository
 from pulpcore.plugin.repo_version_utils import validate_version_paths
 
@@ -171,6 +172,46 @@ def test_multiple_adds_and_removes(repository, add_content, remove_content, veri
     verify_content_sets(version2, [1, 1, 0, 1, 0], [0, 1, 0, 1, 0], [0, 0, 1, 0, 1])
 
 
+def test_content_ids_deltas(
+    repository, content_pks, add_content, remove_content, verify_content_sets, monkeypatch
+):
+    """Verify the content ids are stored as differences to a snapshot, and rebased on deletion."""
+    monkeypatch.setattr(repository_module, "CONTENT_IDS_DELTA_MIN_SIZE", 0)
+    monkeypatch.setattr(repository_module, "CONTENT_IDS_DELTA_RATIO", 1)
+    version0 = repository.latest_version()
+    with repository.new_version() as version1:
+        add_content(version1, [1, 1, 1, 0, 0])
+    assert version1.content_ids_base == version0
+    with repository.new_version() as version2:
+        remove_content(version2, [1, 0, 0, 0, 0])
+    # The difference to version0 outgrew the empty snapshot.
+    assert version2.content_ids_base is None
+    assert sorted(version2.content_ids) == content_pks[1:3]
+    with repository.new_version() as version3:
+        add_content(version3, [1, 0, 0, 1, 0])
+    with repository.new_version() as version4:
+        remove_content(version4, [0, 1, 0, 0, 0])
+
+    assert version4.content_ids is None
+    assert version4.content_ids_base == version2
+    assert sorted(version4.content_ids_added) == [content_pks[0], content_pks[3]]
+    assert version4.content_ids_removed == [content_pks[1]]
+    assert version3.contains(Content.objects.get(pk=content_pks[3]))
+    assert not version4.contains(Content.objects.get(pk=content_pks[1]))
+    verify_content_sets(version4, [1, 0, 1, 1, 0], [0, 0, 0, 0, 0], [0, 1, 0, 0, 0], version3)
+    verify_content_sets(version4, [1, 0, 1, 1, 0], [1, 0, 0, 1, 0], [0, 1, 0, 0, 0], version2)
+
+    version2.delete()
+    version3.refresh_from_db()
+    version4.refresh_from_db()
+    assert sorted(version3.content_ids) == content_pks[:4]
+    assert version3.content_ids_base is None
+    assert version4.content_ids_base == version3
+    assert version4.content_ids_added == []
+    assert version4.content_ids_removed == [content_pks[1]]
+    verify_content_sets(version4, [1, 0, 1, 1, 0], [0, 0, 0, 0, 0], [0, 1, 0, 0, 0], version3)
+
+
 def test_content_batch_qs(repository, content_pks, add_content):
     """Verify content iteration using content_batch_qs()."""
     sorted_pks = content_pks[:4]
@@ -341,3 +382,32 @@ def test_different_artifacts_same_path_validation_fails(tmp_path):
     # This should raise a validation error due to path conflict
     with pytest.raises(ValueError, match="Repository version errors"):
         validate_version_paths(new_version)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "path,valid",
+    [("c/d.txt", True), ("a/b.txt/c.txt", False), ("a", False)],
+)
+def test_incremental_path_validation(path, valid):
+    """
+    Test that content added to a version is validated against the content already present.
+    """
+    repository = Repository.objects.create(name=uuid4())
+    repository.CONTENT_TYPES = [Content]
+    existing = Content.objects.create(pulp_type="core.content")
+    ContentArtifact.objects.create(content=existing, relative_path="a/b.txt")
+    with repository.new_version() as version1:
+        version1.add_content(Content.objects.filter(pk=existing.pk))
+    validate_version_paths(version1)
+
+    added = Content.objects.create(pulp_type="core.content")
+    ContentArtifact.objects.create(content=added, relative_path=path)
+    with repository.new_version() as version2:
+        version2.add_content(Content.objects.filter(pk=added.pk))
+
+    if valid:
+        validate_version_paths(version2)
+    else:
+        with pytest.raises(ValueError, match="Repository version errors"):
+            validate_version_paths(version2)
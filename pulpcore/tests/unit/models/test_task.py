@@ -1,7 +1,9 @@
 import pytest
 import sys
-from pulpcore.app.models import AppStatus, Task, ProgressReport
+from pulpcore.app.models import AppStatus, Task, TaskGroup, ProgressReport
 from pulpcore.constants import TASK_STATES
+from pulpcore.tasking import tasks as tasks_module
+from pulpcore.tasking.tasks import batched_dispatch, dispatch, dispatch_many
 
 
 @pytest.mark.parametrize(
@@ -44,3 +46,45 @@ def test_report_state_changes(monkeypatch, to_state, use_canceled):
             assert to_state == report.state
         else:
             assert state == report.state
+
+
+def _noop():
+    pass
+
+
+@pytest.mark.django_db
+def test_dispatch_many(monkeypatch):
+    monkeypatch.setattr(tasks_module, "wakeup_worker", lambda reason: None)
+    task_group = TaskGroup.objects.create(description="test")
+
+    tasks = dispatch_many(
+        [
+            {"func": _noop, "exclusive_resources": ["a"]},
+            {"func": _noop, "exclusive_resources": ["b"], "shared_resources": ["a"]},
+        ],
+        task_group=task_group,
+    )
+
+    assert [task.reserved_resources_record for task in tasks] == [["a"], ["b", "shared:a"]]
+    assert all(task.state == TASK_STATES.WAITING for task in tasks)
+    assert all(task.task_group == task_group for task in tasks)
+    assert tasks[0].pulp_created < tasks[1].pulp_created
+
+
+@pytest.mark.django_db
+def test_batched_dispatch(monkeypatch):
+    monkeypatch.setattr(tasks_module, "wakeup_worker", lambda reason: None)
+
+    with batched_dispatch():
+        task = dispatch(_noop, exclusive_resources=["a"])
+        assert task._state.adding
+        assert not Task.objects.filter(pk=task.pk).exists()
+    assert Task.objects.filter(pk=task.pk).exists()
+    assert not task._state.adding
+    assert task.pulp_created is not None
+
+    with pytest.raises(ValueError):
+        with batched_dispatch():
+            task = dispatch(_noop, exclusive_resources=["a"])
+            raise ValueError()
+    assert not Task.objects.filter(pk=task.pk).exists()
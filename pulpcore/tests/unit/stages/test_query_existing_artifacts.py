@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from unittest import mock
+
+from pulpcore.plugin.models import Artifact
+from pulpcore.plugin.stages import DeclarativeArtifact, DeclarativeContent
+from pulpcore.plugin.stages.artifact_stages import QueryExistingArtifacts
+
+pytestmark = pytest.mark.usefixtures("fake_domain")
+
+BATCH_SIZE = 500
+EXISTING = 450
+
+
+class ArtifactQuerySetMock(list):
+    """A list standing in for the queryset of existing artifacts, counting its evaluations."""
+
+    iterations = 0
+
+    def __iter__(self):
+        ArtifactQuerySetMock.iterations += 1
+        return super().__iter__()
+
+    def touch(self):
+        pass
+
+
+def _digest(i):
+    return f"{i:064x}"
+
+
+@pytest.mark.asyncio
+async def test_query_existing_artifacts_batch():
+    """
+    Benchmark a batch of mostly pre-existing artifacts.
+
+    The existing artifacts must be fetched once per batch and matched without re-iterating them
+    for every declarative artifact.
+    """
+    existing = ArtifactQuerySetMock(
+        Artifact(sha256=_digest(i), size=i, pulp_domain_id=None) for i in range(EXISTING)
+    )
+    ArtifactQuerySetMock.iterations = 0
+    in_q, out_q = asyncio.Queue(), asyncio.Queue()
+    for i in range(BATCH_SIZE):
+        d_artifact = DeclarativeArtifact(
+            artifact=Artifact(sha256=_digest(i)),
+            url=f"http://example.com/{i}",
+            relative_path=str(i),
+            remote=mock.Mock(),
+        )
+        in_q.put_nowait(DeclarativeContent(content=mock.Mock(), d_artifacts=[d_artifact]))
+    in_q.put_nowait(None)
+
+    stage = QueryExistingArtifacts()
+    stage._connect(in_q, out_q)
+    with mock.patch.object(Artifact, "objects") as objects:
+        objects.filter.return_value = existing
+        await stage()
+
+    results = []
+    while (d_content := out_q.get_nowait()) is not None:
+        results.append(d_content.d_artifacts[0].artifact)
+
+    assert ArtifactQuerySetMock.iterations == 1
+    assert all(results[i] is existing[i] for i in range(EXISTING))
+    assert all(results[i]._state.adding for i in range(EXISTING, BATCH_SIZE))
@@ -4,7 +4,14 @@ import pytest_asyncio
 
 import mock
 
-from pulpcore.plugin.stages import Stage, EndStage, DeclarativeContent
+from pulpcore.plugin.stages.api import stage_stats_reports
+from pulpcore.plugin.stages import (
+    AdaptiveBatchPolicy,
+    DeclarativeContent,
+    EndStage,
+    Stage,
+    create_pipeline,
+)
 
 
 pytestmark = pytest.mark.usefixtures("fake_domain")
@@ -155,3 +162,72 @@ async def test_batch_queue_and_min_sizes():
                 last_stage._connect(queues[1], queues[2])
                 end_stage._connect(queues[2], None)
                 await asyncio.gather(last_stage(), middle_stage(), first_stage(), end_stage())
+
+
+def test_adaptive_batch_policy():
+    policy = AdaptiveBatchPolicy(target_latency=1.0, min_size=10, max_size=1000, initial_size=100)
+    # 100 items took 0.1s, 1000 would have matched the target latency
+    policy.update(100, 0.1)
+    assert policy.size == 550
+    policy.update(550, 55.0)
+    assert policy.size == 280
+    policy.update(10, 1000.0)
+    assert policy.size == 140
+    for _ in range(10):
+        policy.update(10, 1000.0)
+    assert policy.size == 10
+
+
+@pytest.mark.asyncio
+async def test_batch_policy_limits_batch(stage, in_q):
+    stage.batch_policy = AdaptiveBatchPolicy(min_size=2, max_size=3, initial_size=2)
+    for _ in range(5):
+        in_q.put_nowait(mock.Mock())
+    in_q.put_nowait(None)
+    batch_it = stage.batches()
+    assert len(await batch_it.__anext__()) == 3
+    assert len(await batch_it.__anext__()) == 2
+    with pytest.raises(StopAsyncIteration):
+        await batch_it.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_pipeline_queue_size():
+    class QueueSizeStage(EndStage):
+        async def __call__(self):
+            self.maxsize = self._in_q.maxsize
+            await super().__call__()
+
+    first, second, last = Stage(), Stage(), QueueSizeStage()
+    first.run = second.run = mock.AsyncMock()
+    second.queue_size = 42
+    await create_pipeline([first, second, last], maxsize=7)
+    assert second._in_q.maxsize == 42
+    assert last.maxsize == 7
+
+
+@pytest.mark.asyncio
+async def test_stage_stats_reported():
+    class PassStage(Stage):
+        async def run(self):
+            async for batch in self.batches(minsize=2):
+                for item in batch:
+                    await self.put(item)
+
+    class FirstStage(Stage):
+        async def run(self):
+            for _ in range(3):
+                await self.put(mock.Mock())
+
+    reports = []
+    token = stage_stats_reports.set(reports)
+    try:
+        await create_pipeline([FirstStage(), PassStage(), EndStage()])
+    finally:
+        stage_stats_reports.reset(token)
+
+    assert [report["stage"] for report in reports] == ["FirstStage", "PassStage"]
+    assert reports[0]["items_out"] == 3
+    assert reports[1]["items_in"] == reports[1]["items_out"] == 3
+    assert reports[1]["batches"] == 2
+    assert reports[1]["max_batch_size"] == 2
@@ -1,8 +1,17 @@
+import asyncio
 import pytest
 from time import sleep
 
 import pulpcore.app.redis_connection
-from pulpcore.cache import Cache
+import pulpcore.cache.cache
+from pulpcore.cache import AsyncCache, AsyncContentCache, Cache
+from pulpcore.cache.cache import (
+    LocalCache,
+    _RequestState,
+    _request_state,
+    decode_entry,
+    encode_entry,
+)
 
 
 @pytest.fixture
@@ -106,3 +115,138 @@ def test_clear(pulp_redisdb):
     cache.redis.flushdb()
     for key, _, base_key in tuples:
         assert not cache.exists(key, base_key=base_key)
+
+
+@pytest.mark.asyncio
+async def test_find_base_key_prefetches_fields(pulp_redisdb):
+    """Tests that the base-key lookup serves the requested fields without further round trips"""
+    cache = AsyncCache()
+    await cache.set("key", "hello", base_key="base2")
+    await cache.set("guard", "False", expires=60, base_key="base2")
+    assert pulp_redisdb.ttl("base2") > 0
+
+    state = _RequestState()
+    token = _request_state.set(state)
+    try:
+        index = await cache.find_base_key(["base1", "base2"], fields=["guard", "key", "absent"])
+        assert index == 1
+        assert await cache.get("guard", base_key="base2") == b"False"
+        assert await cache.get("key", base_key="base2") == b"hello"
+        assert await cache.get("absent", base_key="base2") is None
+        assert state.round_trips == 1
+        assert await cache.find_base_key(["base1", "base3"]) is None
+    finally:
+        _request_state.reset(token)
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        {"type": "Response", "body": b"\x00\xff" * 2048, "headers": {"a": "b"}, "expires": None},
+        {"type": "Response", "text": "<html>index</html>", "status": 200},
+        {"type": "Redirect", "location": "https://example.com/file"},
+    ],
+)
+def test_entry_roundtrip(entry):
+    """Tests that entries survive the binary format"""
+    assert decode_entry(encode_entry(entry)) == entry
+
+
+def test_entry_compressed():
+    """Tests that large compressible bodies are stored compressed"""
+    entry = {"type": "Response", "text": "repeated " * 1000}
+    data = encode_entry(entry)
+    assert len(data) < 1000
+    assert decode_entry(data) == entry
+
+
+def test_legacy_json_entry():
+    """Tests that entries written in the previous JSON format are still readable"""
+    data = b'{"type": "Response", "body": "00ff", "expires": null}'
+    assert decode_entry(data) == {"type": "Response", "body": b"\x00\xff", "expires": None}
+
+
+def test_local_cache_lru_and_invalidation():
+    """Tests the bounds and invalidation of the in-process cache"""
+    local = LocalCache(max_entries=2, expires_ttl=60)
+    local.active = True
+    local.set("k1", {"type": "Redirect"}, "base1", local.generation)
+    local.set("k2", {"type": "Redirect"}, "base2", local.generation)
+    assert local.get("k1", "base1") == {"type": "Redirect"}
+    local.set("k3", {"type": "Redirect"}, "base2", local.generation)
+    # k2 was the least recently used entry
+    assert local.get("k2", "base2") is None
+    assert local.get("k1", "base1") is not None
+
+    local.invalidate(["base2"])
+    assert local.get("k3", "base2") is None
+    assert local.get("k1", "base1") is not None
+
+    generation = local.generation
+    local.invalidate()
+    local.set("k1", {"type": "Redirect"}, "base1", generation)
+    assert local.get("k1", "base1") is None
+
+
+def test_local_cache_returns_copies():
+    """Tests that consumers can not alter the cached entries"""
+    local = LocalCache(max_entries=2, expires_ttl=60)
+    local.active = True
+    local.set("k", {"type": "Redirect"}, "base", local.generation)
+    local.get("k", "base").pop("type")
+    assert local.get("k", "base") == {"type": "Redirect"}
+
+
+def test_local_base_key_and_values(monkeypatch):
+    """Tests that requests fully held by the local cache are found without Redis"""
+    local = LocalCache(max_entries=10, expires_ttl=60)
+    local.active = True
+    monkeypatch.setattr(pulpcore.cache.cache, "local_cache", local)
+    cache = AsyncContentCache()
+
+    state = _RequestState()
+    token = _request_state.set(state)
+    try:
+        cache.set_local("guard", b"False", base_key="base2")
+        local.set("key", {"type": "Redirect"}, "base2", local.generation)
+        assert cache.get_local("guard", base_key="base2") == b"False"
+        assert cache.find_local_base_key(["base1", "base2"], ["guard", "key"]) == 1
+        assert cache.find_local_base_key(["base1", "base2"], ["guard", "absent"]) is None
+        assert state.round_trips == 0
+
+        # Values read before an invalidation are not kept
+        local.invalidate(["base2"])
+        cache.set_local("guard", b"False", base_key="base2")
+        assert cache.get_local("guard", base_key="base2") is None
+    finally:
+        _request_state.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_local_cache_listener_recovers(monkeypatch):
+    """Tests that the listener reconnects after any error, serving nothing in between"""
+    local = LocalCache(max_entries=10, expires_ttl=60)
+    monkeypatch.setattr(LocalCache, "RECONNECT_INTERVAL", 0)
+    attempts = []
+
+    class PubSub:
+        async def subscribe(self, channel):
+            attempts.append(channel)
+            if len(attempts) == 1:
+                raise ValueError("unexpected")
+            local.set("k", {"type": "Redirect"}, "base", local.generation)
+            raise asyncio.CancelledError()
+
+        async def aclose(self):
+            pass
+
+    class Connection:
+        def pubsub(self):
+            return PubSub()
+
+    monkeypatch.setattr(pulpcore.cache.cache, "get_async_redis_connection", Connection)
+    with pytest.raises(asyncio.CancelledError):
+        await local.listen()
+    assert len(attempts) == 2
+    assert not local.active
+    assert local.get("k", "base") is None
@@ -1,12 +1,23 @@
+import io
 import json
+import tarfile
 import typing as t
 from pathlib import Path
+from unittest.mock import Mock
 
 import pytest
+from django.core.files.storage import default_storage
 from rest_framework.exceptions import ValidationError
 
-from pulpcore.app.models import ProgressReport
-from pulpcore.app.tasks.importer import ChunkedFile
+from pulpcore.app.models import Artifact, ProgressReport
+from pulpcore.app.tasks import importer
+from pulpcore.app.tasks.export import ChunkedFileWriter
+from pulpcore.app.tasks.importer import (
+    ChunkedFile,
+    ImportArchive,
+    _ArtifactPlacer,
+    _repo_version_members,
+)
 from pulpcore.app.util import Crc32Hasher, compute_file_hash
 
 
@@ -148,3 +159,164 @@ def test_chunked_file_shortread_exception(tmp_path):
         with chunked_file as fp:
             content_size = len(contiguous_data)
             fp.read(content_size)
+
+
+@pytest.mark.parametrize("data,chunk_size", [(b"123456789", 4), (b"12345678", 4), (b"12", None)])
+def test_chunked_file_writer_roundtrip(tmp_path, monkeypatch, data, chunk_size):
+    """Files written by the exporter's ChunkedFileWriter are read back by ChunkedFile."""
+    monkeypatch.setattr(ProgressReport, "save", lambda *args, **kwargs: None)
+    path = str(tmp_path / "export.tar")
+
+    with ChunkedFileWriter(path, chunk_size=chunk_size) as writer:
+        writer.write(data[:3])
+        writer.write(data[3:])
+        assert writer.tell() == len(data)
+
+    expected_count = -(-len(data) // chunk_size) if chunk_size else 1
+    assert len(writer.paths) == expected_count
+    for chunk_path, checksum in writer.checksums.items():
+        assert checksum == compute_file_hash(chunk_path, hasher=Crc32Hasher())
+
+    toc_path = tmp_path / "toc.json"
+    toc_path.write_text(
+        json.dumps(
+            {
+                "files": {Path(p).name: c for p, c in writer.checksums.items()},
+                "meta": {"chunk_size": chunk_size} if chunk_size else {},
+            }
+        )
+    )
+    chunked_file = ChunkedFile(toc_path)
+    chunked_file.validate_chunks()
+    with chunked_file as fp:
+        assert fp.read(len(data)) == data
+
+
+def test_chunked_file_writer_removes_files_on_error(tmp_path):
+    path = str(tmp_path / "export.tar")
+
+    with pytest.raises(ValueError):
+        with ChunkedFileWriter(path, chunk_size=2) as writer:
+            writer.write(b"12345")
+            raise ValueError()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def write_export(path: str, members: t.Dict[str, bytes], chunk_size: t.Optional[int] = None):
+    """Utility to write an export tarball of `members` and return its writer."""
+    with ChunkedFileWriter(path, chunk_size=chunk_size) as writer:
+        with tarfile.open(path, "w|", fileobj=writer) as tar:
+            directory = tarfile.TarInfo("artifact")
+            directory.type = tarfile.DIRTYPE
+            tar.addfile(directory)
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+    return writer
+
+
+@pytest.mark.parametrize("chunk_size", [None, 700])
+def test_import_archive_reads_members_in_place(tmp_path, chunk_size):
+    """Members of a (chunked) export are read through the index handed over by another task."""
+    members = {
+        "versions.json": b"[]",
+        "artifact/ab/cdef": b"x" * 1500,
+        "empty": b"",
+        "repository-foo_1/content.json": b"[]",
+        "repository-foo_1/mapping.json": b"{}",
+    }
+    path = str(tmp_path / "export.tar")
+    writer = write_export(path, members, chunk_size=chunk_size)
+
+    toc_path = None
+    if chunk_size:
+        toc_path = str(tmp_path / "export-toc.json")
+        Path(toc_path).write_text(
+            json.dumps(
+                {
+                    "files": {Path(p).name: c for p, c in writer.checksums.items()},
+                    "meta": {"chunk_size": chunk_size},
+                }
+            )
+        )
+
+    with ImportArchive(toc_path or path, toc_path=toc_path) as archive:
+        assert set(archive) == set(members)
+        index = archive.index
+        repo_version_members = _repo_version_members(archive, "foo")
+        assert set(repo_version_members) == {
+            "repository-foo_1/content.json",
+            "repository-foo_1/mapping.json",
+        }
+        assert _repo_version_members(archive, "bar") == {}
+
+    with ImportArchive(toc_path or path, toc_path=toc_path, index=index) as archive:
+        assert "artifact/ab/cdef" in archive
+        assert "artifact" not in archive
+        for name, data in reversed(members.items()):
+            with archive.open(name) as member:
+                assert member.read() == data
+        with pytest.raises(KeyError):
+            archive.open("missing")
+
+    with ImportArchive(toc_path or path, toc_path=toc_path, index=repo_version_members) as archive:
+        with archive.open("repository-foo_1/mapping.json") as member:
+            assert member.read() == b"{}"
+
+
+def test_artifact_placer_copies_missing_files(tmp_path, db, monkeypatch):
+    monkeypatch.setattr(ProgressReport, "save", lambda *args, **kwargs: None)
+    artifacts = []
+    for data in (b"stored", b"missing"):
+        tmp_file = tmp_path / data.decode()
+        tmp_file.write_bytes(data)
+        artifact = Artifact.init_and_validate(str(tmp_file))
+        artifact.save()
+        artifacts.append(artifact)
+    stored, missing = artifacts
+    default_storage.delete(missing.file.name)
+
+    path = str(tmp_path / "export.tar")
+    write_export(
+        path,
+        {
+            f"artifact/{a.sha256[0:2]}/{a.sha256[2:]}": b"from export " + a.sha256.encode()
+            for a in artifacts
+        },
+    )
+
+    pb = ProgressReport(message="Importing Artifacts", code="import.artifacts")
+    with ImportArchive(path) as archive, _ArtifactPlacer(archive, pb) as placer:
+        placer.place([Mock(object_id=a.pk) for a in artifacts])
+
+    with default_storage.open(stored.file.name) as f:
+        assert f.read() == b"stored"
+    with default_storage.open(missing.file.name) as f:
+        assert f.read() == b"from export " + missing.sha256.encode()
+    assert pb.done == 2
+    assert pb.suffix.endswith("MiB/s")
+
+
+def test_artifact_placer_bounds_listings(monkeypatch):
+    storage = Mock()
+    storage.exists.side_effect = lambda path: path.endswith("0")
+    storage.listdir.side_effect = lambda directory: ([], ["f0", "f1"])
+    monkeypatch.setattr(importer, "default_storage", storage)
+    monkeypatch.setattr(importer, "ARTIFACT_LISTING_THRESHOLD", 2)
+    monkeypatch.setattr(importer, "ARTIFACT_LISTINGS_CACHED", 1)
+    placer = _ArtifactPlacer(None, None)
+
+    # Few artifacts of the batch in a directory are checked one by one
+    assert placer._existing(["artifact/aa/f0", "artifact/ab/f9"]) == {"artifact/aa/f0"}
+    storage.listdir.assert_not_called()
+
+    # Many are checked against a listing of the directory, which is kept
+    paths = ["artifact/bb/f0", "artifact/bb/f1", "artifact/bb/f2"]
+    assert placer._existing(paths) == {"artifact/bb/f0", "artifact/bb/f1"}
+    assert placer._existing(["artifact/bb/f2"]) == set()
+    storage.listdir.assert_called_once_with("artifact/bb")
+
+    placer._existing(["artifact/cc/f0", "artifact/cc/f1"])
+    assert list(placer.listings) == ["artifact/cc"]
@@ -0,0 +1,126 @@
+import datetime
+import decimal
+import io
+import json
+import os
+import tarfile
+from contextvars import copy_context
+import uuid
+from unittest.mock import Mock
+
+import pytest
+from tablib import Dataset
+
+from pulpcore.app import importexport
+from pulpcore.app.importexport import _export_datasets, _prefetch_artifacts, _write_export
+from pulpcore.app.contexts import _current_domain
+from pulpcore.app.modelresource import RepositoryResource
+from pulpcore.app.models import Domain, Repository
+from pulpcore.app.util import set_domain
+from pulpcore.app.tasks.importer import _impfile_iterator
+
+
+def _artifact(data, on_open=None):
+    def _open(mode):
+        if on_open:
+            on_open()
+        return io.BytesIO(data)
+
+    return Mock(size=len(data), file=Mock(open=_open))
+
+
+def test_prefetch_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(importexport, "EXPORT_PREFETCH_ARTIFACTS", 2)
+    artifacts = [_artifact(str(i).encode() * 1000) for i in range(5)]
+
+    seen = []
+    for artifact, path in _prefetch_artifacts(artifacts, str(tmp_path)):
+        with open(path, "rb") as f:
+            assert f.read() == artifact.file.open("rb").read()
+        seen.append(artifact)
+        # The current file and at most the next two are on disk
+        assert len(os.listdir(tmp_path)) <= 3
+    assert seen == artifacts
+    assert os.listdir(tmp_path) == []
+
+
+def test_prefetch_artifacts_bounded_by_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(importexport, "EXPORT_PREFETCH_BYTES", 10)
+    opened = []
+    artifacts = [_artifact(b"x" * 10, on_open=lambda i=i: opened.append(i)) for i in range(3)]
+
+    prefetched = _prefetch_artifacts(artifacts, str(tmp_path))
+    next(prefetched)
+    # The first artifact alone fills the prefetch space.
+    assert opened == [0]
+    next(prefetched)
+    assert opened == [0, 1]
+    prefetched.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_prefetch_artifacts_download_failure(tmp_path):
+    def fail():
+        raise OSError("boom")
+
+    artifacts = [_artifact(b"ok"), _artifact(b"bad", on_open=fail), _artifact(b"later")]
+
+    prefetched = _prefetch_artifacts(artifacts, str(tmp_path))
+    next(prefetched)
+    with pytest.raises(OSError, match="boom"):
+        next(prefetched)
+    # Only the file of the artifact after the failing one may be left over
+    assert len(os.listdir(tmp_path)) <= 1
+
+
+def test_prefetch_artifacts_in_current_domain(tmp_path):
+    """Artifacts are downloaded from the storage of the domain being exported."""
+    domain = Domain(pk=uuid.uuid4(), name="other")
+    domains = []
+    artifacts = [_artifact(b"x", on_open=lambda: domains.append(_current_domain.get()))] * 3
+
+    def export():
+        set_domain(domain)
+        for _ in _prefetch_artifacts(artifacts, str(tmp_path)):
+            pass
+
+    copy_context().run(export)
+    assert domains == [domain] * 3
+
+
+@pytest.mark.parametrize("rows", [0, 1, 5])
+def test_write_export_roundtrip(tmp_path, monkeypatch, rows):
+    """Rows are written as Dataset.json would, and are read back in batches by the importer."""
+    monkeypatch.setattr("pulpcore.app.tasks.importer.IMPORT_BATCH_SIZE", 2)
+    dataset = Dataset(headers=["pk", "created", "price", "name"])
+    for i in range(rows):
+        dataset.append(
+            [uuid.uuid4(), datetime.datetime(2020, 1, i + 1), decimal.Decimal(i), f"naïve-{i}"]
+        )
+    resource = Mock(queryset=None, export=Mock(return_value=dataset))
+
+    path = tmp_path / "export.tar"
+    with tarfile.open(path, "w") as tar:
+        _write_export(tar, resource, dest_dir="repo")
+
+    with tarfile.open(path, "r") as tar:
+        data = tar.extractfile(f"repo/{resource.__module__}.Mock.json").read()
+        assert json.loads(data) == json.loads(dataset.json)
+
+        batches = list(_impfile_iterator(io.BytesIO(data)))
+    assert [len(batch) for batch in batches] == [2] * (rows // 2) + [rows % 2]
+    assert [row for batch in batches for row in batch.dict] == json.loads(dataset.json)
+
+
+@pytest.mark.parametrize("count", [0, 4, 5])
+def test_export_datasets_keyset_batches(db, monkeypatch, count):
+    monkeypatch.setattr(importexport, "EXPORT_BATCH_SIZE", 2)
+    repositories = [Repository.objects.create(name=str(uuid.uuid4())) for _ in range(count)]
+    resource = RepositoryResource()
+    resource.queryset = Repository.objects.filter(pk__in=[r.pk for r in repositories])
+
+    datasets = list(_export_datasets(resource))
+
+    assert [len(dataset) for dataset in datasets] == [2] * (count // 2) + [1] * (count % 2)
+    names = [row["name"] for dataset in datasets for row in dataset.dict]
+    assert sorted(names) == sorted(r.name for r in repositories)
@@ -0,0 +1,136 @@
+import os
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.utils import timezone
+
+from pulpcore.app.models import Task
+from pulpcore.app.util import get_domain, get_prn
+from pulpcore.constants import TASK_STATES
+from pulpcore.tasking import _util, worker as worker_module
+from pulpcore.tasking.tasks import get_resources
+from pulpcore.tasking.worker import PulpcoreWorker, TaskProcessPool, _affected_tasks
+
+
+@pytest.fixture(autouse=True)
+def _no_cursor_margin(monkeypatch):
+    # Only consider the changes since the last pass, which all happen in this process.
+    monkeypatch.setattr(worker_module, "UNBLOCK_CURSOR_MARGIN", 0)
+
+
+def _unblock(worker):
+    return PulpcoreWorker._unblock_tasks(worker)
+
+
+def _resources(exclusive=(), shared=()):
+    # Reserved like `dispatch` does, including the shared domain.
+    return get_resources(list(exclusive), list(shared), False)[1]
+
+
+def _task(name, exclusive=(), shared=(), state=TASK_STATES.WAITING, **kwargs):
+    return Task.objects.create(
+        name=name,
+        state=state,
+        reserved_resources_record=_resources(exclusive, shared),
+        **kwargs,
+    )
+
+
+def _unblocked(*tasks):
+    return {
+        task.name
+        for task in Task.objects.filter(pk__in=[task.pk for task in tasks])
+        if task.unblocked_at is not None
+    }
+
+
+@pytest.mark.django_db
+def test_incremental_unblock():
+    worker = SimpleNamespace(last_unblock=None, last_full_unblock=None)
+    running = _task("running", ["r1"], state=TASK_STATES.RUNNING, unblocked_at=timezone.now())
+    exclusive = _task("exclusive", ["r1"])
+    other = _task("other", ["r2"])
+    shared = _task("shared", shared=["r1"])
+    _unblock(worker)
+    assert _unblocked(exclusive, other, shared) == {"other"}
+
+    Task.objects.filter(pk=running.pk).update(
+        state=TASK_STATES.COMPLETED, finished_at=timezone.now()
+    )
+    new = _task("new", shared=["r2"])
+    unrelated = _task("unrelated", ["r3"])
+    Task.objects.filter(pk=unrelated.pk).update(pulp_created=timezone.now() - timedelta(hours=1))
+    affected = _affected_tasks(worker.last_unblock)
+    assert [task.name for task in affected] == ["exclusive", "other", "shared", "new"]
+    _unblock(worker)
+
+    # The exclusive tasks still block the ones sharing their resources.
+    assert _unblocked(exclusive, other, shared, new) == {"other", "exclusive"}
+
+
+@pytest.mark.django_db
+def test_unblock_affected_tasks(django_assert_max_num_queries):
+    """
+    Only the tasks sharing resources with a finished task are considered for unblocking.
+
+    The domain all tasks share does not make every task affected.
+    """
+    worker = SimpleNamespace(last_unblock=None, last_full_unblock=None)
+    finished = _task("finished", ["released"], state=TASK_STATES.RUNNING)
+    _task("waiting", ["released"])
+    Task.objects.bulk_create(
+        Task(
+            name="blocked",
+            state=TASK_STATES.WAITING,
+            reserved_resources_record=_resources([f"r{i % 100}"]),
+        )
+        for i in range(1000)
+    )
+    _unblock(worker)
+
+    Task.objects.filter(pk=finished.pk).update(
+        state=TASK_STATES.COMPLETED, finished_at=timezone.now()
+    )
+    # The new and canceling tasks, the finished tasks, and one lookup of the resources.
+    with django_assert_max_num_queries(3):
+        affected = _affected_tasks(worker.last_unblock)
+    assert [task.name for task in affected] == ["waiting"]
+
+    _unblock(worker)
+    assert Task.objects.filter(name="waiting").exclude(unblocked_at=None).exists()
+
+
+@pytest.mark.django_db
+def test_affected_tasks_follow_exclusive_domain():
+    """A task reserving the domain exclusively is related to all tasks of that domain."""
+    worker = SimpleNamespace(last_unblock=None, last_full_unblock=None)
+    _task("other", ["r1"])
+    _unblock(worker)
+
+    _task("domain", [get_prn(get_domain())])
+    assert [task.name for task in _affected_tasks(worker.last_unblock)] == ["other", "domain"]
+
+
+def test_task_process_pool_recycles_process(tmp_path, monkeypatch):
+    def fake_perform_task(task_pk, task_working_dir_rel_path):
+        (tmp_path / task_pk).write_text(f"{os.getpid()} {task_working_dir_rel_path}")
+
+    # The pooled process is forked and inherits the patch.
+    monkeypatch.setattr(_util, "_perform_task", fake_perform_task)
+    pool = TaskProcessPool(max_tasks=2, max_rss=None)
+    try:
+        for task_pk in ["a", "b", "c"]:
+            pool.submit(task_pk, f"dir-{task_pk}")
+            assert pool.conn.poll(10)
+            assert pool.task_done()
+    finally:
+        pool.close()
+
+    pids = {}
+    for task_pk in ["a", "b", "c"]:
+        pid, task_dir = (tmp_path / task_pk).read_text().split()
+        assert task_dir == f"dir-{task_pk}"
+        pids[task_pk] = pid
+    assert pids["a"] == pids["b"] != pids["c"]
+    assert pool.process is None